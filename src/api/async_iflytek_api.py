@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import time
+import uuid
+import aiohttp
+from api.iflytek_api import IflytekAPI
+from api.shards import is_shard_error
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncIflytekAPI:
+    """asyncio client for the iFlytek audit API
+
+    Signing, audio_list building and result parsing are shared with
+    IflytekAPI; only the transport and the waiting are asynchronous, so
+    thousands of submissions and polls can share one event loop.
+    """
+
+    def __init__(self, api=None, max_concurrency=100):
+        self.api = api or IflytekAPI()
+        self.max_concurrency = max_concurrency  # 同时进行的HTTP请求上限
+        self.jobs = {}  # job_id -> asyncio.Task
+        self._semaphore = None
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Cancel outstanding jobs and close the HTTP session"""
+        for task in list(self.jobs.values()):
+            task.cancel()
+        if self.jobs:
+            await asyncio.gather(*self.jobs.values(), return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        # 会话和信号量必须在事件循环内创建
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=60)
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def _post(self, url, data, limiter, shard=None):
+        """Send one POST signed with shard's credentials and return the decoded JSON body"""
+        session = self._get_session()
+        headers = {
+            'Content-Type': 'application/json;charset=UTF-8',
+            'Accept': 'application/json'
+        }
+        await limiter.acquire_async()
+        async with self._semaphore:
+            params = self.api.generate_signature(shard)
+            endpoint = self.api.http.endpoint_for(url)
+            status = "error"
+            start = time.perf_counter()
+            try:
+                async with session.post(url, params=params, headers=headers, json=data) as response:
+                    status = response.status
+                    if response.status == 429:
+                        limiter.on_throttle()
+                    if response.status != 200:
+                        # HTTP错误只在这里计入分片健康状态，调用方不再重复计数
+                        if shard is not None and is_shard_error(status=response.status):
+                            self.api.shards.record_failure(shard)
+                        raise Exception(f"API request failed with status code: {response.status}")
+                    return await response.json(content_type=None)
+            finally:
+                metrics.observe('http_request_seconds', time.perf_counter() - start, endpoint=endpoint, method='POST')
+                metrics.inc('http_requests_total', endpoint=endpoint, method='POST', status=status)
+
+    async def submit_audio_list(self, audio_list):
+        """Submit an audio_list and return its request_id"""
+        api = self.api
+        data = {
+            "audio_list": audio_list,
+            "notify_url": api.callback_receiver.url if api.callback_receiver else ""
+        }
+        for attempt in range(api.max_retries):
+            # 每次尝试重新选择分片，出错的凭据会被跳过
+            shard = api.shards.pick()
+            try:
+                result = await self._post(shard.post_audio_url, data, shard.submit_limiter, shard)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                api.shards.record_failure(shard)
+                logger.error(f"Network error during API call ({shard.name}): {str(e)}")
+                if attempt < api.max_retries - 1:
+                    await asyncio.sleep(api.retry_delay)
+                    continue
+                raise Exception(f"Network error after {api.max_retries} attempts: {str(e)}")
+
+            if result.get('code') == "000000":
+                shard.submit_limiter.on_success()
+                request_id = result.get('data', {}).get('request_id')
+                if not request_id:
+                    raise Exception("No request_id in response")
+                api.shards.record_success(shard)
+                api.assign_request(request_id, shard)
+                return request_id
+
+            error_message = result.get('desc', result.get('message', 'Unknown error'))
+            error_code = result.get('code', 'Unknown code')
+            if is_shard_error(code=error_code):
+                api.shards.record_failure(shard)
+            if error_code == "100002" and attempt < api.max_retries - 1:
+                logger.warning(f"API Error 100002: {error_message}. Retrying... (Attempt {attempt + 1}/{api.max_retries})")
+                shard.submit_limiter.on_throttle()
+                continue
+            raise Exception(f"API Error {error_code}: {error_message}")
+
+        raise Exception(f"Failed after {api.max_retries} attempts")
+
+    async def query_once(self, request_id):
+        """Send a single query request and return its data section"""
+        api = self.api
+        shard = api.shard_for(request_id)
+        limiter = shard.query_limiter
+        try:
+            result = await self._post(shard.query_url, {"request_id": request_id}, limiter, shard)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            api.shards.record_failure(shard)
+            raise
+        if result.get('code') == "100002":
+            limiter.on_throttle()
+        if result.get('code') != "000000":
+            if is_shard_error(code=result.get('code')):
+                api.shards.record_failure(shard)
+            raise Exception(f"API Error {result.get('code')}: {result.get('desc')}")
+        limiter.on_success()
+        api.shards.record_success(shard)
+        return result.get('data', {})
+
+    async def wait_for_result(self, request_id, poll_state=None):
+        """Poll until the audit finishes and return the final data section"""
+        api = self.api
+        policy = api.poll_policy
+        poll_state = poll_state or policy.new_state()
+        start_time = time.monotonic()
+        errors = 0
+
+        pushed = None
+        if api.callback_receiver is not None:
+            pushed = asyncio.wrap_future(api.callback_receiver.register(request_id))
+
+        delay = policy.first_delay(poll_state)
+        try:
+            while True:
+                if pushed is None:
+                    await asyncio.sleep(delay)
+                else:
+                    # 等待回调推送，超时后才兜底查询
+                    await asyncio.wait({pushed}, timeout=max(delay, api.callback_poll_interval))
+                    if pushed.done():
+                        # 推送只作为唤醒信号，结果一律通过查询确认
+                        pushed = asyncio.wrap_future(api.callback_receiver.register(request_id))
+
+                elapsed_time = time.monotonic() - start_time
+                if elapsed_time > api.max_wait_time:
+                    raise Exception("分析超时，请稍后重试")
+
+                try:
+                    data = await self.query_once(request_id)
+                    audit_status = data.get('audit_status')
+                    policy.observe(poll_state, audit_status, elapsed_time)
+                    if audit_status == 2:  # 审核完成
+                        policy.record_completion(poll_state, elapsed_time)
+                        return data
+                    if audit_status == 4:  # 审核异常
+                        raise Exception(f"审核异常: {data.get('message', 'Unknown error')}")
+
+                    # 待审核或审核中，在预测的完成时间附近再次查询
+                    delay = policy.next_delay(poll_state, elapsed_time)
+
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    errors += 1
+                    logger.error(f"查询失败: {str(e)}")
+                    if errors >= api.max_retries:
+                        raise
+                    delay = api.retry_delay
+        finally:
+            api.release_request(request_id)
+            if pushed is not None:
+                pushed.cancel()
+                api.callback_receiver.unregister(request_id)
+
+    async def analyze_audio(self, audio_url):
+        """Analyze one file and return its analysis_results dict"""
+        request_id = await self.submit_audio_list([self.api.build_audio_item(audio_url)])
+        poll_state = self.api.poll_policy.new_state(size_bytes=self.api.get_file_size(audio_url))
+        data = await self.wait_for_result(request_id, poll_state)
+        return self.api.parse_result_list(data.get('result_list', []))
+
+    def start(self, audio_url):
+        """Schedule analysis of audio_url on the running loop and return a job id"""
+        job_id = uuid.uuid4().hex
+        task = asyncio.get_running_loop().create_task(self.analyze_audio(audio_url))
+        self.jobs[job_id] = task
+        task.add_done_callback(lambda _task: self.jobs.pop(job_id, None))
+        return job_id
+
+    def cancel(self, job_id):
+        """Cancel a running job; returns False if it is unknown or already done"""
+        task = self.jobs.get(job_id)
+        if task is None or task.done():
+            return False
+        return task.cancel()
+
+    async def analyze_many(self, audio_urls):
+        """Analyze many files concurrently and return a dict keyed by URL"""
+        audio_urls = list(dict.fromkeys(audio_urls))
+        job_ids = [self.start(audio_url) for audio_url in audio_urls]
+        tasks = [self.jobs[job_id] for job_id in job_ids]
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+
+        results = {}
+        for audio_url, outcome in zip(audio_urls, outcomes):
+            if isinstance(outcome, asyncio.CancelledError):
+                results[audio_url] = {"status": "cancelled", "message": "Analysis cancelled"}
+            elif isinstance(outcome, Exception):
+                results[audio_url] = {"status": "error", "message": str(outcome)}
+            else:
+                results[audio_url] = outcome
+        return results
@@ -0,0 +1,155 @@
+import json
+import logging
+import secrets
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackHandler(BaseHTTPRequestHandler):
+    """Accept notify_url pushes and hand them to the owning CallbackReceiver"""
+
+    def do_POST(self):
+        receiver = self.server.receiver
+        # 路径中带有随机令牌，未知路径一律拒绝
+        if not secrets.compare_digest(self.path.split('?')[0], receiver.notify_path):
+            self.send_error(404)
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except (ValueError, json.JSONDecodeError) as e:
+            logger.warning(f"Invalid callback payload: {str(e)}")
+            self.send_error(400)
+            return
+        if not isinstance(payload, dict):
+            logger.warning(f"Callback payload is not a JSON object: {str(payload)[:200]}")
+            self.send_error(400)
+            return
+
+        receiver.handle_payload(payload)
+        body = json.dumps({"code": "000000", "desc": "success"}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json;charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"Callback server: {format % args}")
+
+
+class CallbackReceiver:
+    """Embedded HTTP endpoint that wakes pending audits from notify_url pushes
+
+    A push is only a hint that request_id may be finished: waiters always
+    confirm it with query_once, so a forged push cannot supply a verdict.
+    The endpoint listens on 127.0.0.1 unless told otherwise and only accepts
+    `path` followed by a random per-receiver `token`. `url` is what gets sent
+    as notify_url; set public_url (without the token, which is appended) when
+    the service reaches this machine through a proxy or NAT. Pushes that
+    arrive before their request_id is registered are kept for `early_ttl`
+    seconds.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, public_url=None, path="/iflytek/notify", early_ttl=600,
+                 token=None):
+        self.host = host
+        self.port = port
+        self.public_url = public_url
+        self.path = path.rstrip('/')
+        self.token = token or secrets.token_urlsafe(24)
+        self.early_ttl = early_ttl
+        self._futures = {}  # request_id -> Future
+        self._early = {}    # request_id -> (received_at, data)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def notify_path(self):
+        return f"{self.path}/{self.token}"
+
+    @property
+    def url(self):
+        if self.public_url:
+            return f"{self.public_url.rstrip('/')}/{self.token}"
+        host = "127.0.0.1" if self.host in ("", "0.0.0.0") else self.host
+        return f"http://{host}:{self.port}{self.notify_path}"
+
+    def start(self):
+        """Start serving on a daemon thread (idempotent)"""
+        if self._server is not None:
+            return self
+        self._server = ThreadingHTTPServer((self.host, self.port), CallbackHandler)
+        self._server.daemon_threads = True
+        self._server.receiver = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="callback-receiver", daemon=True)
+        self._thread.start()
+        logger.info(f"Callback receiver listening on {self.host}:{self.port}{self.path}/...")
+        return self
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
+
+    def register(self, request_id):
+        """Return a Future resolved with the pushed data section for request_id
+
+        Each Future fires once; register again after it to wait for the next push.
+        """
+        with self._lock:
+            early = self._early.pop(request_id, None)
+            if early is not None:
+                future = Future()
+                future.set_result(early[1])
+                return future
+            future = self._futures.get(request_id)
+            if future is None:
+                future = Future()
+                self._futures[request_id] = future
+        return future
+
+    def unregister(self, request_id):
+        with self._lock:
+            self._futures.pop(request_id, None)
+
+    def handle_payload(self, payload):
+        """Route one pushed payload to its waiter; returns True if someone was waiting"""
+        if not isinstance(payload, dict):
+            return False
+        data = payload.get('data', payload)
+        if not isinstance(data, dict):
+            data = {}
+        request_id = data.get('request_id') or payload.get('request_id')
+        if not request_id:
+            logger.warning(f"Callback without request_id: {str(payload)[:200]}")
+            return False
+        if data.get('audit_status') not in (None, 2, 4):
+            # 仅处理审核完成或异常的推送
+            logger.debug(f"Ignoring callback for {request_id} with audit_status={data.get('audit_status')}")
+            return False
+
+        with self._lock:
+            future = self._futures.pop(request_id, None)
+            if future is None:
+                self._prune_early()
+                self._early[request_id] = (time.monotonic(), data)
+                return False
+        if not future.done():
+            future.set_result(data)
+        return True
+
+    def _prune_early(self):
+        cutoff = time.monotonic() - self.early_ttl
+        for request_id in [key for key, (received_at, _) in self._early.items() if received_at < cutoff]:
+            del self._early[request_id]
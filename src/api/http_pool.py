@@ -0,0 +1,115 @@
+import logging
+import threading
+import time
+import urllib.parse
+import requests
+from requests.adapters import HTTPAdapter
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPSessionPool:
+    """Keep-alive requests sessions, one connection pool per endpoint
+
+    Each registered endpoint (scheme, host and path) gets its own Session
+    whose adapter keeps up to `pool_size` idle connections, so submit traffic
+    never evicts the warm connections used for polling and vice versa. Other
+    URLs share one pool per host.
+    """
+
+    def __init__(self, pool_size=10, pool_block=False, endpoints=()):
+        self.pool_size = pool_size
+        self.pool_block = pool_block
+        self.endpoints = {self._split(url) for url in endpoints}
+        self._sessions = {}  # endpoint -> requests.Session
+        self._requests = {}  # endpoint -> 请求次数
+        self._lock = threading.Lock()
+
+    def _split(self, url):
+        parts = urllib.parse.urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+    def endpoint_for(self, url):
+        endpoint = self._split(url)
+        if endpoint in self.endpoints:
+            return endpoint
+        parts = urllib.parse.urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def session_for(self, url):
+        """Return the pooled Session for url's endpoint, creating it on first use"""
+        endpoint = self.endpoint_for(url)
+        with self._lock:
+            session = self._sessions.get(endpoint)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, pool_block=self.pool_block)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers['Connection'] = 'keep-alive'
+                self._sessions[endpoint] = session
+                self._requests[endpoint] = 0
+                logger.debug(f"Created HTTP pool for {endpoint} (size {self.pool_size})")
+            self._requests[endpoint] += 1
+        return session
+
+    def request(self, method, url, **kwargs):
+        """Send one request over the pooled session, recording its latency and status"""
+        session = self.session_for(url)
+        if not metrics.enabled:
+            return session.request(method, url, **kwargs)
+        endpoint = self.endpoint_for(url)
+        status = "error"
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            metrics.observe('http_request_seconds', time.perf_counter() - start, endpoint=endpoint, method=method)
+            metrics.inc('http_requests_total', endpoint=endpoint, method=method, status=status)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.request('HEAD', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._requests.clear()
+        for session in sessions:
+            session.close()
+
+    def stats(self):
+        """Per-endpoint counts of requests, new connections and reused connections"""
+        with self._lock:
+            items = list(self._sessions.items())
+            counts = dict(self._requests)
+
+        stats = {}
+        for endpoint, session in items:
+            new_connections = 0
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in list(pools.keys()):
+                    pool = pools.get(key)
+                    if pool is not None:
+                        new_connections += pool.num_connections
+            total = counts.get(endpoint, 0)
+            stats[endpoint] = {
+                "requests": total,
+                "new_connections": new_connections,
+                "reused_connections": max(0, total - new_connections)
+            }
+        return stats
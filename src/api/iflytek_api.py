@@ -1,22 +1,26 @@
-import hmac
-import hashlib
-import urllib.parse
 import requests
-import uuid
-from datetime import datetime, timezone, timedelta
-import base64
 import logging
 import time
 import json
-import random
-import string
 import os
+import concurrent.futures
 from config import load_api_config
+from api.poll_policy import AdaptivePollPolicy
+from api.http_pool import HTTPSessionPool
+from api.callback_server import CallbackReceiver
+from api.poll_scheduler import PollScheduler
+from api.uploader import ChunkedUploader
+from api.job_store import STATE_DONE
+from api.result_model import AnalysisResult
+from api.shards import ShardPool, is_shard_error
+from utils.keyword_matcher import KeywordMatcher, tag_violations
+from utils.lexicons import Lexicon, LexiconRegistry
+from utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 # 关键词列表：移民领域中可能包含偏见或歧视的语言
 
-IMMIGRATION\_BIAS\_KEYWORDS = \[
+IMMIGRATION_BIAS_KEYWORDS = [
 "deportation", "illegal alien", "go back to your country", "they don't belong here",
 "anchor baby", "invasion", "drain our resources", "taking our jobs", "flooding the border",
 "criminal immigrants", "foreign threat", "stealing benefits", "build the wall",
@@ -24,57 +28,106 @@ IMMIGRATION\_BIAS\_KEYWORDS = \[
 "unvetted migrants", "open border disaster", "burden on taxpayers"
 ]
 
+
+def notify_status(on_status, stage, audit_status=None):
+    """Report a job stage to an optional on_status callback without letting it break the job"""
+    if on_status is None:
+        return
+    try:
+        on_status(stage, audit_status)
+    except Exception as e:
+        logger.warning(f"Status callback failed: {str(e)}")
+
+
 class IflytekAPI:
-    def __init__(self):
-        self.api_config = load_api_config()
+    def __init__(self, api_config=None):
+        # 未传入配置时从api_config.json读取
+        self.api_config = api_config if api_config is not None else load_api_config()
         self.max_retries = 30  # 增加最大重试次数
         self.retry_delay = 10  # 增加重试延迟时间
         self.query_interval = 100  # 增加查询间隔时间
-        self.post_audio_url = "https://audit.iflyaisol.com/audit/v2/audio"
-        self.query_url = "https://audit.iflyaisol.com/audit/v2/query"
+        self.max_wait_time = 3600  # 最大等待时间1小时
+        self.batch_size = 10  # 批量提交时每个audio_list包含的文件数
+        self.poll_scheduler = None  # 可选的共享轮询调度器(PollScheduler)
+        # 根据历史审核耗时自适应调整查询间隔，最长不超过原来的最大间隔
+        self.poll_policy = AdaptivePollPolicy(max_interval=self.query_interval * 3)
+        # 配置了callback_port或callback_url时启动回调接收器，提交时附带notify_url
+        self.callback_receiver = None
+        if self.api_config.get('callback_port') is not None or self.api_config.get('callback_url'):
+            self.callback_receiver = CallbackReceiver(
+                host=self.api_config.get('callback_host', '127.0.0.1'),
+                port=int(self.api_config.get('callback_port') or 0),
+                public_url=self.api_config.get('callback_url')
+            ).start()
+        self.callback_poll_interval = 600  # 使用回调时的兜底查询间隔
+        self.result_cache = None  # 可选的结果缓存(ResultCache)
+        self.job_store = None  # 可选的持久化任务记录(JobStore)
+        # 本地关键词预筛：在返回的违规内容中标记移民偏见用语，设为None可关闭
+        self.keyword_matcher = KeywordMatcher(IMMIGRATION_BIAS_KEYWORDS)
+        # 配置了lexicon_dir时，改用可热更新的词表(内置词表一并编入)
+        self.lexicons = None
+        if self.api_config.get('lexicon_dir'):
+            self.lexicons = LexiconRegistry(
+                self.api_config['lexicon_dir'],
+                builtin=[Lexicon('immigration_bias', IMMIGRATION_BIAS_KEYWORDS)],
+                locales=self.api_config.get('lexicon_locales'),
+                projects=self.api_config.get('lexicon_projects')
+            ).start()
+        # 凭据分片：新任务按负载分配到各应用，每个分片有独立的限流器和健康状态
+        # api_base_url可指向本地mock服务(tools/mock_iflytek.py)
+        self.shards = ShardPool.from_config(self.api_config)
+        self._request_shards = {}  # request_id -> Shard，查询必须使用提交时的凭据
+        primary = self.shards.shards[0]
+        self.post_audio_url = primary.post_audio_url
+        self.query_url = primary.query_url
+        # 提交和查询分别使用独立的长连接池
+        endpoints = {url for shard in self.shards.shards for url in (shard.post_audio_url, shard.query_url)}
+        self.http = HTTPSessionPool(pool_size=10, endpoints=sorted(endpoints))
+        # 配置了upload_url时，本地文件先分片上传再提交审核
+        self.uploader = None
+        if self.api_config.get('upload_url'):
+            self.uploader = ChunkedUploader(self.api_config['upload_url'], session=self.http)
+        # 第一个分片的限流器和签名器(单凭据配置时即进程内共享的submit/query限流器)
+        self.submit_limiter = primary.submit_limiter
+        self.query_limiter = primary.query_limiter
+        self.signer = primary.signer
         
         # 支持的音频格式
         self.supported_formats = ['mp3', 'alaw', 'ulaw', 'pcm', 'aac', 'wav']
         
-    def generate_signature(self):
-        """Generate signature for iFlytek API"""
-        # Get UTC time
-        tz = timezone(timedelta())
-        fmt = '%Y-%m-%dT%H:%M:%S%z'
-        zoned_time = datetime.today().astimezone(tz)
-        zoned_time = str(zoned_time.strftime(fmt))
-        
-        # Prepare parameters
-        data_dict = {
-            "appId": self.api_config['app_id'],
-            "accessKeyId": self.api_config['api_key'],
-            "accessKeySecret": self.api_config['api_secret'],
-            "utc": zoned_time,
-            "uuid": ''.join(random.sample(string.ascii_letters + string.digits, 32))
-        }
+    @metrics.timed('iflytek_signature_seconds')
+    def generate_signature(self, shard=None):
+        """Generate signature for iFlytek API (with the given shard's credentials)"""
+        return (shard.signer if shard is not None else self.signer).sign()
         
-        # Sort parameters
-        params_list = sorted(data_dict.items(), key=lambda e: e[0], reverse=False)
-        params_str_dict = dict(params_list)
+    def assign_request(self, request_id, shard):
+        """Remember which shard accepted request_id and count it as in flight"""
+        self.shards.acquire(shard)
+        self._request_shards[request_id] = shard
         
-        # URL encode parameters
-        params_str_urlencode = urllib.parse.urlencode(params_str_dict)
+    def shard_for(self, request_id):
+        """Shard that request_id was submitted with (job store, then the first shard, as fallback)"""
+        shard = self._request_shards.get(request_id)
+        if shard is None and self.job_store is not None:
+            shard = self.shards.get(self.job_store.shard_for(request_id))
+        return shard or self.shards.shards[0]
         
-        # Generate signature
-        base_string = hmac.new(
-            self.api_config['api_secret'].encode('utf-8'),
-            params_str_urlencode.encode('utf-8'),
-            hashlib.sha1
-        ).digest()
+    def release_request(self, request_id):
+        """Drop request_id from its shard's in-flight count once it has finished or failed"""
+        shard = self._request_shards.pop(request_id, None)
+        if shard is not None:
+            self.shards.release(shard)
         
-        signature = base64.b64encode(base_string).decode('utf-8')
-        params_str_dict["signature"] = signature
+    def close(self):
+        """Release pooled HTTP connections and stop the lexicon watcher and callback receiver"""
+        self.http.close()
+        if self.lexicons is not None:
+            self.lexicons.stop()
+        if self.callback_receiver is not None:
+            self.callback_receiver.stop()
         
-        return params_str_dict
-        
-    def analyze_audio(self, audio_url):
-        """Analyze content using iFlytek Audio Moderation API"""
-        # 检查音频格式
+    def get_audio_format(self, audio_url):
+        """Detect audio format from URL, falling back to mp3"""
         audio_format = None
         # 尝试从URL中提取格式
         if '.' in audio_url:
@@ -88,11 +141,28 @@ class IflytekAPI:
             audio_format = 'mp3'
             
         logger.info(f"使用音频格式: {audio_format}")
-            
+        return audio_format
+        
+    def build_audio_item(self, audio_url, name=None):
+        """Build one audio_list entry for the audit request"""
+        return {
+            "audio_type": self.get_audio_format(audio_url),
+            "file_url": audio_url,
+            "name": name or os.path.basename(audio_url)
+        }
+        
+    def submit_audio_list(self, audio_list, sources=None):
+        """Submit an audio_list to the audit endpoint and return its request_id
+
+        sources ({name: original path or URL}) is recorded in the job store so
+        uploaded local files can be found again by their path.
+        """
         for attempt in range(self.max_retries):
+            # 每次尝试重新选择分片，出错的分片会被暂时剔除
+            shard = self.shards.pick()
             try:
                 # Generate signature and parameters
-                params = self.generate_signature()
+                params = self.generate_signature(shard)
                 
                 # Prepare request headers
                 headers = {
@@ -101,24 +171,21 @@ class IflytekAPI:
                 }
                 
                 # Log request details
-                logger.debug(f"Request URL: {self.post_audio_url}")
+                logger.debug(f"Request URL: {shard.post_audio_url} (shard {shard.name})")
                 logger.debug(f"Request headers: {headers}")
                 logger.debug(f"Request params: {params}")
-                logger.debug(f"Audio URL: {audio_url}")
+                logger.debug(f"Audio list: {audio_list}")
                 
                 # Prepare request data according to official documentation
                 data = {
-                    "audio_list": [{
-                        "audio_type": audio_format,
-                        "file_url": audio_url,
-                        "name": os.path.basename(audio_url)
-                    }],
-                    "notify_url": ""  # 暂时不使用回调
+                    "audio_list": audio_list,
+                    "notify_url": self.callback_receiver.url if self.callback_receiver else ""
                 }
                 
                 # Send request
-                response = requests.post(
-                    self.post_audio_url,
+                shard.submit_limiter.acquire()
+                response = self.http.post(
+                    shard.post_audio_url,
                     params=params,
                     headers=headers,
                     json=data,
@@ -130,24 +197,38 @@ class IflytekAPI:
                 logger.debug(f"Response headers: {response.headers}")
                 logger.debug(f"Response content: {response.text[:500]}...")
                 
+                if response.status_code == 429:
+                    shard.submit_limiter.on_throttle()
+                    self.shards.record_failure(shard)
+                    continue
+                    
                 if response.status_code == 200:
                     try:
                         result = response.json()
                         if result.get('code') == "000000":  # 成功状态码
+                            shard.submit_limiter.on_success()
                             # Get request_id for querying results
                             request_id = result.get('data', {}).get('request_id')
                             if request_id:
-                                return self.query_results(request_id)
+                                self.shards.record_success(shard)
+                                self.assign_request(request_id, shard)
+                                # 立即持久化，进程重启后可继续轮询而无需重新提交
+                                if self.job_store is not None:
+                                    self.job_store.record_submission(request_id, audio_list, shard=shard.name, sources=sources)
+                                return request_id
                             else:
                                 raise Exception("No request_id in response")
                         else:
                             error_message = result.get('desc', result.get('message', 'Unknown error'))
                             error_code = result.get('code', 'Unknown code')
+                            if is_shard_error(code=error_code):
+                                self.shards.record_failure(shard)
                             
                             if error_code == "100002":
                                 logger.warning(f"API Error 100002: {error_message}. Retrying... (Attempt {attempt + 1}/{self.max_retries})")
                                 if attempt < self.max_retries - 1:
-                                    time.sleep(self.retry_delay)
+                                    # 由共享限流器降速，避免所有线程同时重试
+                                    shard.submit_limiter.on_throttle()
                                     continue
                             
                             raise Exception(f"API Error {error_code}: {error_message}")
@@ -156,10 +237,13 @@ class IflytekAPI:
                         logger.error(f"Raw response: {response.text}")
                         raise Exception(f"Invalid API response format: {str(e)}")
                 else:
+                    if is_shard_error(status=response.status_code):
+                        self.shards.record_failure(shard)
                     raise Exception(f"API request failed with status code: {response.status_code}")
                     
             except requests.exceptions.RequestException as e:
                 logger.error(f"Network error during API call: {str(e)}")
+                self.shards.record_failure(shard)
                 if attempt < self.max_retries - 1:
                     logger.info(f"Retrying in {self.retry_delay} seconds... (Attempt {attempt + 1}/{self.max_retries})")
                     time.sleep(self.retry_delay)
@@ -171,140 +255,433 @@ class IflytekAPI:
                 
         raise Exception(f"Failed after {self.max_retries} attempts")
         
-    def query_results(self, request_id):
-        """Query analysis results"""
-        start_time = time.time()
-        max_wait_time = 3600  # 最大等待时间1小时
+    def analyze_audio(self, audio_url, on_status=None):
+        """Analyze content using iFlytek Audio Moderation API
         
-        for attempt in range(self.max_retries):
+        on_status(stage, audit_status=None) is called as the job moves through
+        "cached", "uploading", "submitted", "polling" (with the audit_status of
+        each query), "done" and "failed".
+        """
+        # 相同内容的音频直接返回缓存结果
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = self.result_cache.key_for(audio_url)
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                notify_status(on_status, "cached")
+                return cached
+                
+        # 已提交且结果尚未交付的文件直接复用其request_id
+        job = self.job_store.find_by_url(audio_url) if self.job_store is not None else None
+        if job is not None:
+            logger.info(f"Resuming stored job {job['request_id']} for {audio_url}")
+            request_id = job['request_id']
+            name = job['name']
+        else:
+            if os.path.isfile(audio_url):
+                notify_status(on_status, "uploading")
+            file_url = self.upload_if_local(audio_url)
+            item = self.build_audio_item(file_url, os.path.basename(audio_url))
+            request_id = self.submit_audio_list([item], sources={item['name']: audio_url})
+            name = item['name']
+        notify_status(on_status, "submitted")
+        if job is not None and job['state'] == STATE_DONE:
+            # 同批次的其他文件已等到了结果，直接使用保存的数据
+            data = job['data']
+            notify_status(on_status, "done", 2)
+        else:
+            if job is not None:
+                self.assign_request(request_id, self.shard_for(request_id))
+            poll_state = self.poll_policy.new_state(size_bytes=self.get_file_size(audio_url))
+            data = self.wait_for_result(request_id, poll_state, on_status)
+        if job is not None:
+            # 恢复的任务可能是批量提交的，只取该文件自己的结果；其他文件的结果留在任务记录中
+            analysis_results = self.results_for_name(data, name)
+        else:
+            analysis_results = self.parse_result_list(data.get('result_list', []))
+        if self.job_store is not None:
+            self.job_store.mark_delivered(request_id, [name])
+        
+        if cache_key is not None:
+            self.result_cache.put(cache_key, analysis_results, source=audio_url)
+        return analysis_results
+        
+    def analyze_batch(self, audio_urls, batch_size=None):
+        """Analyze many files, packing them into shared audio_list requests
+        
+        Returns a dict mapping each URL to its own analysis result.
+        """
+        batch_size = batch_size or self.batch_size
+        # 去重并保持原有顺序
+        audio_urls = list(dict.fromkeys(audio_urls))
+        results = {}
+        pending = []  # [(request_id, {name: url})]
+        
+        # 缓存命中的文件不再提交
+        cache_keys = {}
+        to_submit = audio_urls
+        if self.result_cache is not None:
+            to_submit = []
+            for audio_url in audio_urls:
+                cache_keys[audio_url] = self.result_cache.key_for(audio_url)
+                cached = self.result_cache.get(cache_keys[audio_url])
+                if cached is not None:
+                    results[audio_url] = cached
+                else:
+                    to_submit.append(audio_url)
+                    
+        # 已有未交付任务的文件不再重复提交
+        stored_data = {}  # 已完成任务的request_id -> 保存的数据
+        if self.job_store is not None:
+            stored = {}
+            remaining = []
+            for audio_url in to_submit:
+                job = self.job_store.find_by_url(audio_url)
+                if job is None:
+                    remaining.append(audio_url)
+                    continue
+                stored.setdefault(job['request_id'], {})[job['name']] = audio_url
+                if job['state'] == STATE_DONE:
+                    stored_data[job['request_id']] = job['data']
+                else:
+                    self.assign_request(job['request_id'], self.shard_for(job['request_id']))
+            pending.extend(stored.items())
+            to_submit = remaining
+            
+        # 先提交所有批次，让服务端并行审核
+        for start in range(0, len(to_submit), batch_size):
+            chunk = to_submit[start:start + batch_size]
+            names = {}
+            audio_list = []
             try:
-                # 检查是否超过最大等待时间
-                elapsed_time = time.time() - start_time
-                if elapsed_time > max_wait_time:
-                    raise Exception("分析超时，请稍后重试")
+                for audio_url in chunk:
+                    name = self._unique_name(audio_url, names)
+                    names[name] = audio_url
+                    audio_list.append(self.build_audio_item(self.upload_if_local(audio_url), name))
                     
-                # Generate signature and parameters
-                params = self.generate_signature()
-                
-                # Prepare request headers
-                headers = {
-                    'Content-Type': 'application/json;charset=UTF-8',
-                    'Accept': 'application/json'
-                }
+                request_id = self.submit_audio_list(audio_list, sources=names)
+                logger.info(f"Batch submitted: {len(audio_list)} files, request_id={request_id}")
+                pending.append((request_id, names))
+            except Exception as e:
+                logger.error(f"Batch submission failed: {str(e)}")
+                for audio_url in chunk:
+                    results[audio_url] = {"status": "error", "message": str(e)}
+                    
+        # 配置了调度器时由其统一轮询，否则逐个等待
+        futures = {}
+        if self.poll_scheduler is not None:
+            for request_id, names in pending:
+                if request_id not in stored_data:
+                    futures[request_id] = self.poll_scheduler.add(request_id)
                 
-                # Prepare request data
-                data = {
-                    "request_id": request_id
-                }
+        # 每个request_id只轮询一次，结果按name分发回各个文件
+        for request_id, names in pending:
+            try:
+                if request_id in stored_data:
+                    data = stored_data[request_id]
+                elif request_id in futures:
+                    data = futures[request_id].result()
+                else:
+                    data = self.wait_for_result(request_id)
+                for name, audio_url in names.items():
+                    results[audio_url] = self.results_for_name(data, name)
+                    if cache_keys.get(audio_url) is not None:
+                        self.result_cache.put(cache_keys[audio_url], results[audio_url], source=audio_url)
+                if self.job_store is not None:
+                    self.job_store.mark_delivered(request_id, list(names))
+            except Exception as e:
+                logger.error(f"Batch query failed for {request_id}: {str(e)}")
+                for audio_url in names.values():
+                    results[audio_url] = {"status": "error", "message": str(e)}
+                    
+        return {audio_url: results[audio_url] for audio_url in audio_urls}
+        
+    def upload_if_local(self, audio_url, on_progress=None):
+        """Upload a local file through the chunked uploader and return its URL"""
+        if self.uploader is None or not os.path.isfile(audio_url):
+            return audio_url
+        return self.uploader.upload(audio_url, on_progress=on_progress)
+        
+    def get_file_size(self, audio_url):
+        """File size for local paths, used as a latency hint by the poll policy"""
+        try:
+            return os.path.getsize(audio_url)
+        except OSError:
+            return None
+            
+    def _unique_name(self, audio_url, names):
+        """Pick a name for audio_url that is unique within one audio_list"""
+        name = os.path.basename(audio_url) or "audio"
+        if name not in names:
+            return name
+        stem, ext = os.path.splitext(name)
+        index = 1
+        while f"{stem}_{index}{ext}" in names:
+            index += 1
+        return f"{stem}_{index}{ext}"
+        
+    def query_once(self, request_id, session=None):
+        """Send a single query request and return its data section"""
+        # 查询必须使用提交时的凭据
+        shard = self.shard_for(request_id)
+        
+        # Generate signature and parameters
+        params = self.generate_signature(shard)
+        
+        # Prepare request headers
+        headers = {
+            'Content-Type': 'application/json;charset=UTF-8',
+            'Accept': 'application/json'
+        }
+        
+        # Prepare request data
+        data = {
+            "request_id": request_id
+        }
+        
+        # Send query request
+        shard.query_limiter.acquire()
+        try:
+            response = (session or self.http).post(
+                shard.query_url,
+                params=params,
+                headers=headers,
+                json=data,
+                timeout=60
+            )
+        except requests.exceptions.RequestException:
+            self.shards.record_failure(shard)
+            raise
+        
+        if response.status_code == 429:
+            shard.query_limiter.on_throttle()
+        if response.status_code != 200:
+            if is_shard_error(status=response.status_code):
+                self.shards.record_failure(shard)
+            raise Exception(f"请求失败，状态码: {response.status_code}")
+            
+        result = response.json()
+        code = result.get('code')
+        desc = result.get('desc')
+        sid = result.get('sid')
+        
+        # 记录会话ID，用于排查问题
+        logger.info(f"Session ID: {sid}")
+        
+        if code == "100002":
+            shard.query_limiter.on_throttle()
+        if code != "000000":
+            if is_shard_error(code=code):
+                self.shards.record_failure(shard)
+            raise Exception(f"API Error {code}: {desc}")
+            
+        shard.query_limiter.on_success()
+        self.shards.record_success(shard)
+        return result.get('data', {})
+        
+    def resume_pending_jobs(self):
+        """Deliver every stored job whose results were not handed out before a restart
+        
+        Unfinished jobs are polled again through the PollScheduler; finished
+        jobs with undelivered files are answered from their stored data
+        section. Returns a dict mapping each file's source (the path or URL
+        originally passed in) to a Future of its analysis_results; the file is
+        marked delivered when its Future resolves.
+        """
+        if self.poll_scheduler is None:
+            self.poll_scheduler = PollScheduler(self)
+        results = {}
+        for job in self.job_store.undelivered_jobs():
+            request_id = job['request_id']
+            if job['state'] == STATE_DONE:
+                data_future = concurrent.futures.Future()
+                data_future.set_result(job['data'])
+            else:
+                delay = max(0, job['next_poll'] - time.time())
+                logger.info(f"Resuming job {request_id} ({len(job['files'])} files), next poll in {int(delay)}s")
+                self.assign_request(request_id, self.shard_for(request_id))
+                data_future = self.poll_scheduler.add(request_id, delay=delay)
+            for name, source in job['files'].items():
+                future = concurrent.futures.Future()
+                results[source] = future
+                data_future.add_done_callback(
+                    lambda done, request_id=request_id, name=name, future=future:
+                        self._deliver_stored(request_id, name, done, future))
+        return results
+        
+    def _deliver_stored(self, request_id, name, data_future, future):
+        """Resolve one file's Future from its job's data Future and mark it delivered"""
+        if data_future.cancelled():
+            future.cancel()  # 调度器已停止，下次启动时再交付
+            return
+        try:
+            analysis_results = self.results_for_name(data_future.result(), name)
+        except Exception as e:
+            analysis_results = {"status": "error", "message": str(e)}
+        self.job_store.mark_delivered(request_id, [name])
+        future.set_result(analysis_results)
+        
+    def record_poll(self, request_id, audit_status, delay):
+        """Persist the outcome of a poll and when the next one is due"""
+        if self.job_store is not None:
+            self.job_store.update_poll(request_id, audit_status, time.time() + delay)
+            
+    def wait_for_result(self, request_id, poll_state=None, on_status=None):
+        """Wait until the audit finishes and return the final data section
+        
+        With a poll_scheduler set, the request joins its shared queue instead
+        of running a polling loop on the calling thread.
+        """
+        if self.poll_scheduler is not None:
+            return self.wait_on_scheduler(request_id, poll_state, on_status)
+        try:
+            if self.callback_receiver is not None:
+                data = self.wait_for_callback(request_id, poll_state, on_status)
+            else:
+                data = self.poll_until_done(request_id, poll_state, on_status)
+        except Exception as e:
+            if self.job_store is not None:
+                self.job_store.mark_failed(request_id, e)
+            notify_status(on_status, "failed")
+            raise
+        finally:
+            self.release_request(request_id)
+            
+        if self.job_store is not None:
+            self.job_store.mark_done(request_id, data)
+        notify_status(on_status, "done", 2)
+        return data
+        
+    def wait_on_scheduler(self, request_id, poll_state=None, on_status=None):
+        """Block on the shared poll_scheduler; it records completion in the job store"""
+        future = self.poll_scheduler.add(request_id, poll_state=poll_state, on_status=on_status)
+        try:
+            data = future.result()
+        except Exception:
+            notify_status(on_status, "failed")
+            raise
+        notify_status(on_status, "done", 2)
+        return data
+        
+    def poll_until_done(self, request_id, poll_state=None, on_status=None):
+        """Poll until the audit finishes and return the final data section"""
+        start_time = time.time()
+        max_wait_time = self.max_wait_time
+        poll_state = poll_state or self.poll_policy.new_state()
+        errors = 0
+        
+        # 按照历史审核耗时决定首次查询时间
+        time.sleep(self.poll_policy.first_delay(poll_state))
+        
+        while True:
+            # 检查是否超过最大等待时间
+            elapsed_time = time.time() - start_time
+            if elapsed_time > max_wait_time:
+                raise Exception("分析超时，请稍后重试")
                 
-                # Send query request
-                response = requests.post(
-                    self.query_url,
-                    params=params,
-                    headers=headers,
-                    json=data,
-                    timeout=60
-                )
+            try:
+                data = self.query_once(request_id)
+                audit_status = data.get('audit_status')
+                self.poll_policy.observe(poll_state, audit_status, elapsed_time)
+                notify_status(on_status, "polling", audit_status)
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    code = result.get('code')
-                    desc = result.get('desc')
-                    sid = result.get('sid')
-                    
-                    # 记录会话ID，用于排查问题
-                    logger.info(f"Session ID: {sid}")
+                if audit_status == 2:  # 审核完成
+                    self.poll_policy.record_completion(poll_state, elapsed_time)
+                    return data
+                elif audit_status == 4:  # 审核异常
+                    raise Exception(f"审核异常: {data.get('message', 'Unknown error')}")
+                else:  # 待审核或审核中
+                    # 计算进度百分比
+                    progress = min(100, int((elapsed_time / max_wait_time) * 100))
+                    status_text = "待审核" if audit_status == 0 else "审核中"
+                    logger.info(f"{status_text} (进度: {progress}%, 已用时间: {int(elapsed_time)}秒)")
                     
-                    if code != "000000":
-                        raise Exception(f"API Error {code}: {desc}")
-                        
-                    data = result.get('data', {})
-                    audit_status = data.get('audit_status')
-                    
-                    if audit_status == 2:  # 审核完成
-                        result_list = data.get('result_list', [])
-                        if not result_list:
-                            return {
-                                "status": "success",
-                                "message": "未发现违规内容",
-                                "suggest": "pass"
-                            }
-                            
-                        # 处理审核结果
-                        analysis_results = {
-                            "status": "success",
-                            "suggest": "pass",  # 默认通过
-                            "violations": []
-                        }
-                        
-                        for item in result_list:
-                            name = item.get('name')
-                            suggest = item.get('suggest')
-                            
-                            # 更新整体建议
-                            if suggest == "block":
-                                analysis_results["suggest"] = "block"
-                            elif suggest == "review" and analysis_results["suggest"] != "block":
-                                analysis_results["suggest"] = "review"
-                                
-                            detail = item.get('detail', {})
-                            audios = detail.get('audios', [])
-                            
-                            for audio in audios:
-                                content = audio.get('content')
-                                offset_time = audio.get('offsetTime')
-                                duration = audio.get('duration')
-                                audio_url = audio.get('audio_url')
-                                audio_suggest = audio.get('suggest')
-                                
-                                # 处理分类结果
-                                categories = []
-                                for category in audio.get('category_list', []):
-                                    category_info = {
-                                        "description": category.get('category_description'),
-                                        "suggest": category.get('suggest'),
-                                        "words": category.get('word_list', [])
-                                    }
-                                    categories.append(category_info)
-                                    
-                                # 只记录需要关注的内容
-                                if audio_suggest != "pass":
-                                    analysis_results["violations"].append({
-                                        "name": name,
-                                        "content": content,
-                                        "offset_time": offset_time,
-                                        "duration": duration,
-                                        "audio_url": audio_url,
-                                        "suggest": audio_suggest,
-                                        "categories": categories
-                                    })
-                                    
-                        return analysis_results
-                        
-                    elif audit_status == 4:  # 审核异常
-                        raise Exception(f"审核异常: {data.get('message', 'Unknown error')}")
-                    else:  # 待审核或审核中
-                        # 计算进度百分比
-                        progress = min(100, int((elapsed_time / max_wait_time) * 100))
-                        status_text = "待审核" if audit_status == 0 else "审核中"
-                        logger.info(f"{status_text} (进度: {progress}%, 已用时间: {int(elapsed_time)}秒)")
-                        
-                        # 根据进度调整查询间隔
-                        if progress < 30:
-                            time.sleep(self.query_interval)
-                        elif progress < 60:
-                            time.sleep(self.query_interval * 2)
-                        else:
-                            time.sleep(self.query_interval * 3)
-                        continue
-                else:
-                    raise Exception(f"请求失败，状态码: {response.status_code}")
+                    # 在预测的完成时间附近再次查询
+                    delay = self.poll_policy.next_delay(poll_state, elapsed_time)
+                    self.record_poll(request_id, audit_status, delay)
+                    time.sleep(delay)
                     
             except Exception as e:
+                errors += 1
                 logger.error(f"查询失败: {str(e)}")
-                if attempt < self.max_retries - 1:
+                if errors < self.max_retries:
                     time.sleep(self.retry_delay)
                     continue
                 raise
                 
-        raise Exception(f"查询失败，已达到最大重试次数: {self.max_retries}") 
+    def wait_for_callback(self, request_id, poll_state=None, on_status=None):
+        """Wait for the notify_url push, querying only as a slow safety net"""
+        start_time = time.time()
+        future = self.callback_receiver.register(request_id)
+        errors = 0
+        
+        try:
+            while True:
+                elapsed_time = time.time() - start_time
+                remaining = self.max_wait_time - elapsed_time
+                if remaining <= 0:
+                    raise Exception("分析超时，请稍后重试")
+                    
+                try:
+                    future.result(timeout=min(self.callback_poll_interval, remaining))
+                    # 推送只作为唤醒信号，结果一律通过查询确认
+                    future = self.callback_receiver.register(request_id)
+                except concurrent.futures.TimeoutError:
+                    pass
+                    
+                # 收到推送或等待超时(兜底，防止回调丢失)后查询
+                try:
+                    data = self.query_once(request_id)
+                except Exception as e:
+                    errors += 1
+                    logger.error(f"查询失败: {str(e)}")
+                    if errors >= self.max_retries:
+                        raise
+                    continue
+                    
+                notify_status(on_status, "polling", data.get('audit_status'))
+                if data.get('audit_status') == 2:
+                    break
+                elif data.get('audit_status') == 4:
+                    raise Exception(f"审核异常: {data.get('message', 'Unknown error')}")
+        finally:
+            self.callback_receiver.unregister(request_id)
+            
+        if poll_state is not None:
+            self.poll_policy.record_completion(poll_state, time.time() - start_time)
+        return data
+        
+    def query_results(self, request_id, poll_state=None, on_status=None):
+        """Query analysis results"""
+        data = self.wait_for_result(request_id, poll_state, on_status)
+        return self.parse_result_list(data.get('result_list', []))
+        
+    def results_for_name(self, data, name):
+        """analysis_results for one file of a (possibly batched) data section"""
+        grouped = self.group_result_list(data.get('result_list', []))
+        return self.parse_result_list(grouped.get(name, []))
+        
+    def group_result_list(self, result_list):
+        """Group result_list items by file name"""
+        grouped = {}
+        for item in result_list:
+            grouped.setdefault(item.get('name'), []).append(item)
+        return grouped
+        
+    def parse_result_list(self, result_list):
+        """Convert a result_list into analysis_results (an AnalysisResult parsed on first access)"""
+        if not result_list:
+            return AnalysisResult.from_result_list(result_list)
+        return AnalysisResult.from_result_list(result_list, on_parse=self.tag_violations)
+
+    def tag_violations(self, violations, transcripts=None):
+        """Run the local keyword pre-screen over violations; returns (violations, local_bias)"""
+        matcher = self.lexicons.matcher if self.lexicons is not None else self.keyword_matcher
+        if matcher is None:
+            return violations, None
+        return tag_violations(violations, matcher, transcripts)
+
+    def tag_local_bias(self, analysis_results, transcripts=None):
+        """Copy of analysis_results re-screened over its violation content and optional transcript lines"""
+        violations, local_bias = self.tag_violations(analysis_results.violations, transcripts)
+        return analysis_results.replace(violations=violations, local_bias=local_bias)
@@ -0,0 +1,225 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# 任务状态
+STATE_SUBMITTED = 'submitted'
+STATE_POLLING = 'polling'
+STATE_DONE = 'done'
+STATE_FAILED = 'failed'
+PENDING_STATES = (STATE_SUBMITTED, STATE_POLLING)
+
+
+class JobStore:
+    """Durable record of submitted audits, backed by SQLite in WAL mode
+
+    Every request_id is written as soon as the audit endpoint accepts it,
+    together with the files it covers and the next scheduled poll. After a
+    crash or restart, pending jobs can be resumed instead of resubmitted.
+    Each file of a job is marked delivered once its result has been handed
+    to the caller, so the other files of a finished batch are answered from
+    the stored data section rather than resubmitted. Delivered results are
+    not reused as a cache; that is ResultCache's job, with its TTL and ETag
+    checks.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(DATA_DIR, 'jobs.sqlite3')
+        if self.db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " request_id TEXT PRIMARY KEY,"
+            " state TEXT NOT NULL,"
+            " audit_status INTEGER,"
+            " submitted_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " next_poll REAL NOT NULL,"
+            " polls INTEGER NOT NULL DEFAULT 0,"
+            " data TEXT,"
+            " error TEXT,"
+            " shard TEXT);"
+            "CREATE TABLE IF NOT EXISTS job_files ("
+            " request_id TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " file_url TEXT NOT NULL,"
+            " source TEXT,"
+            " delivered INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (request_id, name));"
+            "CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs (state, next_poll);"
+            "CREATE INDEX IF NOT EXISTS idx_job_files_url ON job_files (file_url);"
+        )
+        # 旧版本数据库没有shard列
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if 'shard' not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN shard TEXT")
+        # 旧版本数据库没有source列(调用方传入的原始路径或URL)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(job_files)")}
+        if 'source' not in columns:
+            self._conn.execute("ALTER TABLE job_files ADD COLUMN source TEXT")
+        # 旧版本数据库没有delivered列(结果是否已交给调用方)
+        if 'delivered' not in columns:
+            self._conn.execute("ALTER TABLE job_files ADD COLUMN delivered INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_job_files_source ON job_files (source)")
+        self._conn.commit()
+
+    def record_submission(self, request_id, audio_list, next_poll=None, shard=None, sources=None):
+        """Persist a freshly submitted request_id, the files it covers and the credential shard used
+
+        sources maps an item's name to the path or URL the caller passed in,
+        when that differs from the submitted file_url (uploaded local files).
+        """
+        sources = sources or {}
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (request_id, state, submitted_at, updated_at, next_poll, shard)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (request_id, STATE_SUBMITTED, now, now, next_poll or now, shard)
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO job_files (request_id, name, file_url, source) VALUES (?, ?, ?, ?)",
+                [(request_id, item['name'], item['file_url'], sources.get(item['name'], item['file_url']))
+                 for item in audio_list]
+            )
+
+    def update_poll(self, request_id, audit_status, next_poll):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, audit_status = ?, next_poll = ?, polls = polls + 1, updated_at = ?"
+                " WHERE request_id = ?",
+                (STATE_POLLING, audit_status, next_poll, time.time(), request_id)
+            )
+
+    def mark_done(self, request_id, data):
+        """Store the final data section of a finished audit"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, audit_status = ?, data = ?, updated_at = ? WHERE request_id = ?",
+                (STATE_DONE, data.get('audit_status'), json.dumps(data, ensure_ascii=False), time.time(), request_id)
+            )
+
+    def mark_failed(self, request_id, error):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, error = ?, updated_at = ? WHERE request_id = ?",
+                (STATE_FAILED, str(error), time.time(), request_id)
+            )
+
+    def mark_delivered(self, request_id, names):
+        """Record that the results of these files of request_id were handed to the caller"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE job_files SET delivered = 1 WHERE request_id = ? AND name = ?",
+                [(request_id, name) for name in names]
+            )
+
+    def get(self, request_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT request_id, state, next_poll, data, error FROM jobs WHERE request_id = ?", (request_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def shard_for(self, request_id):
+        """Name of the credential shard request_id was submitted with, if recorded"""
+        with self._lock:
+            row = self._conn.execute("SELECT shard FROM jobs WHERE request_id = ?", (request_id,)).fetchone()
+        return row[0] if row else None
+
+    def find_by_url(self, file_url):
+        """Most recent job covering file_url that is pending, or done with the file not yet delivered
+
+        file_url may be the submitted URL or the caller's original path. The
+        job carries the name the file was submitted under.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT j.request_id, j.state, j.next_poll, j.data, j.error, f.name"
+                " FROM job_files f JOIN jobs j ON j.request_id = f.request_id"
+                " WHERE (f.source = ? OR f.file_url = ?)"
+                " AND (j.state IN (?, ?) OR (j.state = ? AND f.delivered = 0))"
+                " ORDER BY j.submitted_at DESC LIMIT 1",
+                (file_url, file_url) + PENDING_STATES + (STATE_DONE,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = self._row_to_job(row[:5])
+        job['name'] = row[5]
+        return job
+
+    def pending_jobs(self):
+        """Jobs still waiting on the audit service, earliest next_poll first
+
+        Each job's "files" maps the submitted name to the caller's source.
+        """
+        return self._jobs_with_files("j.state IN (?, ?)", PENDING_STATES)
+
+    def undelivered_jobs(self):
+        """Pending jobs plus finished jobs with files whose results were never handed out
+
+        Each job's "files" maps the submitted name to the caller's source,
+        for the undelivered files only.
+        """
+        return self._jobs_with_files("(j.state IN (?, ?) OR j.state = ?) AND f.delivered = 0",
+                                     PENDING_STATES + (STATE_DONE,))
+
+    def _jobs_with_files(self, condition, params):
+        with self._lock:
+            files = {}
+            for request_id, name, source in self._conn.execute(
+                    "SELECT f.request_id, f.name, COALESCE(f.source, f.file_url) FROM job_files f"
+                    f" JOIN jobs j ON j.request_id = f.request_id WHERE {condition}",
+                    params):
+                files.setdefault(request_id, {})[name] = source
+            rows = self._conn.execute(
+                "SELECT DISTINCT j.request_id, j.state, j.next_poll, j.data, j.error FROM jobs j"
+                f" JOIN job_files f ON f.request_id = j.request_id WHERE {condition} ORDER BY j.next_poll",
+                params
+            ).fetchall()
+
+        jobs = []
+        for row in rows:
+            job = self._row_to_job(row)
+            job['files'] = files.get(job['request_id'], {})
+            jobs.append(job)
+        return jobs
+
+    def purge(self, older_than):
+        """Delete finished or failed jobs last updated more than older_than seconds ago"""
+        cutoff = time.time() - older_than
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM job_files WHERE request_id IN ("
+                " SELECT request_id FROM jobs WHERE state IN (?, ?) AND updated_at < ?)",
+                (STATE_DONE, STATE_FAILED, cutoff)
+            )
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE state IN (?, ?) AND updated_at < ?",
+                (STATE_DONE, STATE_FAILED, cutoff)
+            )
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _row_to_job(self, row):
+        request_id, state, next_poll, data, error = row
+        return {
+            "request_id": request_id,
+            "state": state,
+            "next_poll": next_poll,
+            "data": json.loads(data) if data else None,
+            "error": error
+        }
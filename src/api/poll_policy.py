@@ -0,0 +1,133 @@
+import bisect
+import math
+import random
+import threading
+from collections import deque
+from utils.metrics import metrics, COUNT_BUCKETS
+
+
+class LatencyHistogram:
+    """Sliding window of observed latencies (seconds), kept sorted"""
+
+    def __init__(self, max_samples=200):
+        self._window = deque(maxlen=max_samples)
+        self._sorted = []
+
+    def __len__(self):
+        return len(self._sorted)
+
+    def add(self, value):
+        if len(self._window) == self._window.maxlen:
+            oldest = self._window[0]
+            del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+        self._window.append(value)
+        bisect.insort(self._sorted, value)
+
+    def conditional_quantile(self, q, above=0.0):
+        """Quantile q of the samples greater than `above`, or None if there are none"""
+        start = bisect.bisect_right(self._sorted, above)
+        count = len(self._sorted) - start
+        if count <= 0:
+            return None
+        return self._sorted[start + min(count - 1, int(q * count))]
+
+    def count_above(self, above):
+        return len(self._sorted) - bisect.bisect_right(self._sorted, above)
+
+
+class PollState:
+    """Per-request polling state tracked by AdaptivePollPolicy"""
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.audit_status = None
+        self.processing_started = None  # 首次观察到"审核中"时的已用时间
+        self.fallback_polls = 0
+        self.polls = 0
+
+
+class AdaptivePollPolicy:
+    """Choose the next query delay from previously observed audit latencies
+
+    Completed jobs feed two histograms per size/duration bucket: total latency
+    since submission, and processing time after audit_status moved to 1. The
+    next query is scheduled at the median of the samples that are still
+    longer than the current wait; with too few samples the policy falls back
+    to jittered exponential backoff.
+    """
+
+    def __init__(self, initial_interval=5, min_interval=2, max_interval=300,
+                 backoff=2.0, jitter=0.2, min_samples=5, quantile=0.5):
+        self.initial_interval = initial_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.min_samples = min_samples
+        self.quantile = quantile
+        self._lock = threading.Lock()
+        self._latency = {}     # bucket -> LatencyHistogram (提交到完成)
+        self._processing = {}  # bucket -> LatencyHistogram (审核中到完成)
+
+    def bucket_for(self, size_bytes=None, duration=None):
+        """Log2 bucket label for an audio duration (seconds) or file size (bytes)"""
+        if duration:
+            return f"d{int(math.log2(max(duration, 1)))}"
+        if size_bytes:
+            return f"s{int(math.log2(max(size_bytes, 1)))}"
+        return "unknown"
+
+    def new_state(self, size_bytes=None, duration=None):
+        return PollState(self.bucket_for(size_bytes, duration))
+
+    def observe(self, state, audit_status, elapsed):
+        """Record the audit_status seen by a query made `elapsed` seconds after submission"""
+        state.polls += 1
+        metrics.inc('audit_status_total', status=audit_status)
+        if audit_status != state.audit_status:
+            metrics.inc('audit_transitions_total', from_status=state.audit_status, to_status=audit_status)
+        if audit_status == 1 and state.processing_started is None:
+            state.processing_started = elapsed
+            metrics.observe('audit_queue_seconds', elapsed)
+        state.audit_status = audit_status
+
+    def record_completion(self, state, elapsed):
+        """Feed a finished job's latency back into the histograms"""
+        metrics.observe('audit_wait_seconds', elapsed)
+        metrics.observe('audit_polls_per_job', state.polls, COUNT_BUCKETS)
+        with self._lock:
+            self._latency.setdefault(state.bucket, LatencyHistogram()).add(elapsed)
+            if state.processing_started is not None:
+                self._processing.setdefault(state.bucket, LatencyHistogram()).add(
+                    elapsed - state.processing_started)
+
+    def first_delay(self, state):
+        """Delay before the first query after submission"""
+        return self.next_delay(state, 0.0)
+
+    def next_delay(self, state, elapsed):
+        """Seconds to wait before querying again"""
+        predicted = self._predict(state, elapsed)
+        if predicted is not None:
+            state.fallback_polls = 0
+            return self._clamp(predicted - elapsed)
+
+        delay = self.initial_interval * (self.backoff ** state.fallback_polls)
+        state.fallback_polls += 1
+        return self._clamp(delay * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def _predict(self, state, elapsed):
+        with self._lock:
+            if state.processing_started is not None:
+                processing = self._processing.get(state.bucket)
+                done_for = elapsed - state.processing_started
+                if processing is not None and processing.count_above(done_for) >= self.min_samples:
+                    return state.processing_started + processing.conditional_quantile(self.quantile, done_for)
+
+            latency = self._latency.get(state.bucket)
+            if latency is not None and latency.count_above(elapsed) >= self.min_samples:
+                return latency.conditional_quantile(self.quantile, elapsed)
+        return None
+
+    def _clamp(self, delay):
+        return max(self.min_interval, min(self.max_interval, delay))
@@ -0,0 +1,195 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class PollJob:
+    """Book-keeping for one request_id waiting on the scheduler"""
+
+    def __init__(self, request_id, future, poll_state, on_status=None):
+        self.request_id = request_id
+        self.future = future
+        self.poll_state = poll_state
+        self.on_status = on_status
+        self.submitted_at = time.monotonic()
+        self.seq = None  # 最近一次入堆的序号，旧的堆条目据此忽略
+        self.polls = 0
+        self.errors = 0
+        self.audit_status = None
+
+
+class PollScheduler:
+    """Multiplex query_results polling for many request_ids on one thread
+
+    Pending jobs are kept in a heap ordered by next-due time; the loop sleeps
+    until the earliest one is due, queries it over the client's pooled query
+    connection and either resolves its Future or pushes it back with a new
+    due time.
+    """
+
+    def __init__(self, api):
+        self.api = api
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """Start the polling thread (idempotent)"""
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="poll-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, cancel_pending=True):
+        """Stop the polling thread"""
+        with self._cond:
+            self._running = False
+            pending = [entry[2] for entry in self._heap]
+            self._heap.clear()
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if cancel_pending:
+            for job in pending:
+                job.future.cancel()
+
+    def add(self, request_id, callback=None, delay=None, poll_state=None, on_status=None):
+        """Schedule request_id for polling and return a Future of its data section
+
+        The optional callback is attached with Future.add_done_callback;
+        on_status("polling", audit_status) is called after every query.
+        """
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        poll_state = poll_state or self.api.poll_policy.new_state()
+        job = PollJob(request_id, future, poll_state, on_status)
+        if delay is None:
+            delay = self.api.poll_policy.first_delay(poll_state)
+
+        receiver = self.api.callback_receiver
+        if receiver is not None:
+            # 回调到达时立即查询，轮询仅作为兜底
+            self._watch(job)
+            future.add_done_callback(lambda _future: receiver.unregister(request_id))
+            delay = max(delay, self.api.callback_poll_interval)
+        self._push(job, delay)
+        self.start()
+        return future
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._heap)
+
+    def _push(self, job, delay):
+        with self._cond:
+            job.seq = next(self._counter)
+            heapq.heappush(self._heap, (time.monotonic() + delay, job.seq, job))
+            # 新任务可能比当前等待的任务更早到期，唤醒调度线程重新计算
+            self._cond.notify()
+
+    def _watch(self, job):
+        self.api.callback_receiver.register(job.request_id).add_done_callback(lambda _pushed: self._on_push(job))
+
+    def _on_push(self, job):
+        if job.future.done():
+            return
+        # 推送只作为唤醒信号：立即查询确认结果，并继续等待下一次推送
+        self._watch(job)
+        self._push(job, 0)
+
+    def _next_due_job(self):
+        with self._cond:
+            while self._running:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due = self._heap[0][0]
+                now = time.monotonic()
+                if due > now:
+                    self._cond.wait(due - now)
+                    continue
+                _, seq, job = heapq.heappop(self._heap)
+                if seq != job.seq:
+                    continue  # 已被更新的入堆条目取代
+                return job
+        return None
+
+    def _run(self):
+        while True:
+            job = self._next_due_job()
+            if job is None:
+                return
+            if job.future.done():
+                continue
+            self._poll(job)
+
+    def _poll(self, job):
+        api = self.api
+        elapsed_time = time.monotonic() - job.submitted_at
+        try:
+            if elapsed_time > api.max_wait_time:
+                raise Exception("分析超时，请稍后重试")
+
+            job.polls += 1
+            data = api.query_once(job.request_id)
+            job.audit_status = data.get('audit_status')
+            api.poll_policy.observe(job.poll_state, job.audit_status, elapsed_time)
+            self._notify(job)
+
+            if job.audit_status == 2:  # 审核完成
+                api.poll_policy.record_completion(job.poll_state, elapsed_time)
+                self._complete(job, data)
+                return
+            if job.audit_status == 4:  # 审核异常
+                raise Exception(f"审核异常: {data.get('message', 'Unknown error')}")
+
+            logger.info(f"{job.request_id}: audit_status={job.audit_status}, 已用时间: {int(elapsed_time)}秒")
+            delay = api.poll_policy.next_delay(job.poll_state, elapsed_time)
+            if api.callback_receiver is not None:
+                delay = max(delay, api.callback_poll_interval)
+            api.record_poll(job.request_id, job.audit_status, delay)
+            self._push(job, delay)
+
+        except Exception as e:
+            job.errors += 1
+            logger.error(f"查询失败 ({job.request_id}): {str(e)}")
+            if job.errors < api.max_retries and elapsed_time <= api.max_wait_time:
+                self._push(job, api.retry_delay)
+            else:
+                self._fail(job, e)
+
+    def _notify(self, job):
+        if job.on_status is None:
+            return
+        try:
+            job.on_status("polling", job.audit_status)
+        except Exception as e:
+            logger.warning(f"Status callback failed: {str(e)}")
+
+    def _complete(self, job, data):
+        if job.future.done():
+            return
+        self.api.release_request(job.request_id)
+        if self.api.job_store is not None:
+            self.api.job_store.mark_done(job.request_id, data)
+        job.future.set_result(data)
+
+    def _fail(self, job, error):
+        if job.future.done():
+            return
+        self.api.release_request(job.request_id)
+        if self.api.job_store is not None:
+            self.api.job_store.mark_failed(job.request_id, error)
+        job.future.set_exception(error)
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import threading
+import time
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveRateLimiter:
+    """Token bucket whose rate backs off on throttling and recovers on success
+
+    Callers reserve a token and sleep until it becomes valid, so waiters are
+    served in arrival order instead of retrying in lockstep. A throttling
+    response halves the rate (down to min_rate) and drains the bucket; every
+    `success_threshold` consecutive successes add `increase_step` back, up to
+    max_rate.
+    """
+
+    def __init__(self, name, rate, burst=None, min_rate=None, max_rate=None,
+                 decrease=0.5, increase_step=None, success_threshold=20):
+        self.name = name
+        self.rate = float(rate)
+        self.burst = burst or max(1, int(rate))
+        self.min_rate = min_rate or self.rate / 10
+        self.max_rate = max_rate or self.rate * 2
+        self.decrease = decrease
+        self.increase_step = increase_step or self.rate / 10
+        self.success_threshold = success_threshold
+        self.tokens = float(self.burst)
+        self.waiting = 0
+        self.acquired = 0
+        self.throttled = 0
+        self._successes = 0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self):
+        """Take a token and return how many seconds the caller must wait before using it"""
+        with self._lock:
+            self._refill()
+            self.tokens -= 1
+            self.acquired += 1
+            wait = max(0.0, -self.tokens / self.rate)
+        metrics.observe('rate_limit_wait_seconds', wait, limiter=self.name)
+        return wait
+
+    def acquire(self):
+        """Block until a token is available"""
+        wait = self.reserve()
+        if wait > 0:
+            with self._lock:
+                self.waiting += 1
+            try:
+                time.sleep(wait)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+
+    async def acquire_async(self):
+        """Wait for a token without blocking the event loop"""
+        wait = self.reserve()
+        if wait > 0:
+            with self._lock:
+                self.waiting += 1
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+
+    def on_success(self):
+        with self._lock:
+            self._successes += 1
+            if self._successes >= self.success_threshold and self.rate < self.max_rate:
+                self._successes = 0
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+                logger.debug(f"Rate limiter {self.name}: rate raised to {self.rate:.2f}/s")
+
+    def on_throttle(self):
+        with self._lock:
+            self._refill()
+            self._successes = 0
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = min(self.tokens, 0.0)
+        metrics.inc('rate_limit_throttled_total', limiter=self.name)
+        logger.warning(f"Rate limiter {self.name}: throttled, rate lowered to {self.rate:.2f}/s")
+
+    def stats(self):
+        with self._lock:
+            self._refill()
+            return {
+                "name": self.name,
+                "rate": round(self.rate, 3),
+                "tokens": round(self.tokens, 3),
+                "queue_depth": self.waiting,
+                "acquired": self.acquired,
+                "throttled": self.throttled
+            }
+
+
+# 进程内共享的限流器，所有IflytekAPI实例共用同一预算
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name, **settings):
+    """Process-wide limiter for `name`, created with `settings` on first use"""
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = AdaptiveRateLimiter(name, **settings)
+            _limiters[name] = limiter
+        return limiter
+
+
+def rate_limiter_stats():
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.stats() for limiter in limiters}
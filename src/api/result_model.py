@@ -0,0 +1,300 @@
+import sys
+import threading
+from collections import Counter
+from types import MappingProxyType
+from utils.metrics import metrics
+
+_CATEGORY_CACHE_SIZE = 10000
+_CATEGORY_TUPLES = {}
+_PARSE_LOCK = threading.Lock()  # 首次访问时的解析只做一次
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _freeze(value):
+    """Read-only copy of nested dicts/lists (MappingProxyType and tuples)"""
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _plain(value):
+    """JSON-ready copy: records become dicts, tuples lists, read-only mappings dicts"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, (dict, MappingProxyType)):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+class Record:
+    """Immutable record with its fields in __slots__
+
+    Fields are read as attributes; get() and [] read them by name too, so
+    code written against the old nested dicts keeps working. Fields listed
+    in `_optional` are treated as absent while they are None. Use replace()
+    for a changed copy and to_dict() for JSON output.
+    """
+
+    __slots__ = ()
+    _fields = ()
+    _optional = ()
+
+    def __init__(self, **values):
+        for field in self._fields:
+            object.__setattr__(self, field, values.pop(field, None))
+        if values:
+            raise TypeError(f"Unknown {type(self).__name__} fields: {', '.join(values)}")
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable; use replace()")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def _items(self):
+        for field in self._fields:
+            value = getattr(self, field)
+            if value is not None or field not in self._optional:
+                yield field, value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            value = getattr(self, key)
+            if value is not None or key not in self._optional:
+                return value
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return self.get(key, self) is not self
+
+    def keys(self):
+        return [field for field, _ in self._items()]
+
+    def replace(self, **changes):
+        """Copy with some fields changed"""
+        values = dict(self._items())
+        values.update(changes)
+        return type(self)(**values)
+
+    def to_dict(self):
+        return {field: _plain(value) for field, value in self._items()}
+
+    def __eq__(self, other):
+        if not isinstance(other, Record):
+            return NotImplemented
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class Category(Record):
+    """One category entry; identical service categories share a single instance
+
+    `score` is only set on categories added by the local keyword pre-screen.
+    """
+
+    __slots__ = ('description', 'suggest', 'words', 'score')
+    _fields = __slots__
+    _optional = ('score',)
+    _shared = {}
+
+    def __init__(self, description=None, suggest=None, words=(), score=None):
+        super().__init__(description=description, suggest=suggest, words=tuple(words), score=score)
+
+    @classmethod
+    def shared(cls, key):
+        """Category for a (description, suggest, words tuple) key"""
+        category = cls._shared.get(key)
+        if category is None:
+            if len(cls._shared) >= _CATEGORY_CACHE_SIZE:
+                cls._shared.clear()
+            category = cls._shared[key] = cls(description=key[0], suggest=key[1], words=key[2])
+        return category
+
+
+def _shared_categories(category_list):
+    """Tuple of shared Category objects for a response category_list"""
+    keys = tuple(
+        (_intern(category.get('category_description')), _intern(category.get('suggest')),
+         tuple(_intern(word) for word in category.get('word_list', [])))
+        for category in category_list
+    )
+    categories = _CATEGORY_TUPLES.get(keys)
+    if categories is None:
+        if len(_CATEGORY_TUPLES) >= _CATEGORY_CACHE_SIZE:
+            _CATEGORY_TUPLES.clear()
+        categories = _CATEGORY_TUPLES[keys] = tuple(Category.shared(key) for key in keys)
+    return categories
+
+
+class Violation(Record):
+    """One flagged segment, with interned strings and shared categories"""
+
+    __slots__ = ('name', 'content', 'offset_time', 'duration', 'audio_url', 'suggest', 'categories')
+    _fields = __slots__
+
+    def __init__(self, name=None, content=None, offset_time=None, duration=None, audio_url=None, suggest=None,
+                 categories=()):
+        super().__init__(name=name, content=content, offset_time=offset_time, duration=duration,
+                         audio_url=audio_url, suggest=suggest,
+                         categories=tuple(category if isinstance(category, Category) else Category(**category)
+                                          for category in categories))
+
+    @classmethod
+    def from_audio(cls, name, audio):
+        """Build from one detail.audios entry of the query response"""
+        return cls(
+            name=_intern(name),
+            content=audio.get('content'),
+            offset_time=audio.get('offsetTime'),
+            duration=audio.get('duration'),
+            audio_url=_intern(audio.get('audio_url')),
+            suggest=_intern(audio.get('suggest')),
+            categories=_shared_categories(audio.get('category_list', []))
+        )
+
+    def with_local_categories(self, summary):
+        """Copy carrying one "<category> (local)" entry per category of a KeywordMatcher.scan() summary
+
+        Local categories from an earlier pass are replaced, not duplicated.
+        """
+        categories = tuple(category for category in self.categories if category.score is None)
+        categories += tuple(
+            Category(description=_intern(f"{category} (local)"), suggest="review",
+                     words=tuple(entry["words"]), score=entry["score"])
+            for category, entry in summary.items()
+        )
+        return self.replace(categories=categories)
+
+
+class AnalysisResult(Record):
+    """analysis_results for one file, parsed from result_list on first access
+
+    Only status is known up front. suggest, violations and local_bias are
+    built the first time any of them is read, under a lock, after which the
+    raw response entries are released; `on_parse(violations)` runs then and
+    returns (violations, local_bias), so keyword tagging is lazy too.
+    Results are immutable: replace() returns a changed copy.
+    """
+
+    __slots__ = ('status', 'message', '_suggest', '_violations', '_local_bias', '_result_list', '_on_parse')
+    _fields = ('status', 'suggest', 'message', 'violations', 'local_bias')
+    _optional = ('suggest', 'message', 'local_bias')
+
+    def __init__(self, status="success", suggest="pass", message=None, violations=(), local_bias=None):
+        set_field = object.__setattr__
+        set_field(self, 'status', status)
+        set_field(self, 'message', message)
+        set_field(self, '_suggest', _intern(suggest))
+        set_field(self, '_violations', tuple(violation if isinstance(violation, Violation) else Violation(**violation)
+                                             for violation in violations))
+        set_field(self, '_local_bias', _freeze(local_bias) if local_bias else None)
+        set_field(self, '_result_list', None)
+        set_field(self, '_on_parse', None)
+
+    @classmethod
+    def from_result_list(cls, result_list, on_parse=None):
+        if not result_list:
+            return cls(status="success", message="未发现违规内容", suggest="pass")
+        result = cls(status="success")
+        object.__setattr__(result, '_result_list', result_list)
+        object.__setattr__(result, '_on_parse', on_parse)
+        return result
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a result from to_dict() output"""
+        return cls(status=data.get("status", "success"), suggest=data.get("suggest", "pass"),
+                   message=data.get("message"), violations=data.get("violations") or (),
+                   local_bias=data.get("local_bias"))
+
+    def _parse(self):
+        with _PARSE_LOCK:
+            result_list = self._result_list
+            if result_list is None:
+                return  # 已被其他线程解析
+            with metrics.timer('result_parse_seconds'):
+                suggest = "pass"  # 默认通过
+                violations = []
+                for item in result_list:
+                    item_suggest = item.get('suggest')
+                    if item_suggest == "block":
+                        suggest = "block"
+                    elif item_suggest == "review" and suggest != "block":
+                        suggest = "review"
+                    # 只保留需要关注的内容
+                    name = item.get('name')
+                    violations.extend(Violation.from_audio(name, audio)
+                                      for audio in item.get('detail', {}).get('audios', [])
+                                      if audio.get('suggest') != "pass")
+                local_bias = None
+                if self._on_parse is not None:
+                    violations, local_bias = self._on_parse(violations)
+            set_field = object.__setattr__
+            set_field(self, '_suggest', _intern(suggest))
+            set_field(self, '_violations', tuple(violations))
+            set_field(self, '_local_bias', _freeze(local_bias) if local_bias else None)
+            set_field(self, '_on_parse', None)
+            set_field(self, '_result_list', None)
+
+    @property
+    def suggest(self):
+        if self._result_list is not None:
+            self._parse()
+        return self._suggest
+
+    @property
+    def violations(self):
+        """Tuple of Violation records, empty when nothing was flagged"""
+        if self._result_list is not None:
+            self._parse()
+        return self._violations
+
+    @property
+    def local_bias(self):
+        """Read-only local keyword summary, or None"""
+        if self._result_list is not None:
+            self._parse()
+        return self._local_bias
+
+    @property
+    def violation_count(self):
+        return len(self.violations)
+
+
+def as_dict(analysis_results):
+    """JSON-ready dict for an AnalysisResult; plain dicts (such as error entries) are returned as is"""
+    return analysis_results.to_dict() if isinstance(analysis_results, Record) else analysis_results
+
+
+def summarize(results):
+    """Counts of overall suggest and of violation categories across many results"""
+    suggests = Counter()
+    categories = Counter()
+    for result in results:
+        suggests[result.get("suggest", "pass")] += 1
+        for violation in result.get("violations", ()):
+            categories.update(category.get("description") for category in violation.get("categories", ()))
+    return {"suggest": dict(suggests), "categories": dict(categories)}
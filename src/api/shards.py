@@ -0,0 +1,166 @@
+import logging
+import threading
+import time
+from config import RATE_LIMITS, DEFAULT_API_BASE_URL
+from api.rate_limiter import get_rate_limiter
+from api.signer import Signer
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('least_loaded', 'weighted_round_robin')
+# 反映凭据或服务端状况的错误码：限流、签名/鉴权失败、配额用尽、服务端错误
+SHARD_ERROR_CODES = frozenset({"100002", "100003", "1002", "1003", "1004"})
+
+
+def is_shard_error(status=None, code=None):
+    """True for failures that say something about the shard rather than the request
+
+    That is HTTP 429 and 5xx responses and auth, quota or server error
+    codes. Bad file URLs, invalid parameters and other client errors do
+    not count. Transport errors are recorded by the caller directly.
+    """
+    if status is not None and (status == 429 or status >= 500):
+        return True
+    return code is not None and str(code) in SHARD_ERROR_CODES
+
+
+class Shard:
+    """One credential set (app) with its own endpoints, limiters and health"""
+
+    def __init__(self, name, app_id, api_key, api_secret, api_base_url=None, weight=1, rate_limits=None):
+        self.name = name
+        self.app_id = app_id
+        self.weight = max(1, int(weight))
+        self.signer = Signer(app_id, api_key, api_secret)
+        api_base_url = (api_base_url or DEFAULT_API_BASE_URL).rstrip('/')
+        self.post_audio_url = f"{api_base_url}/audit/v2/audio"
+        self.query_url = f"{api_base_url}/audit/v2/query"
+        # 每个分片独立限流：默认分片沿用进程级的submit/query限流器
+        suffix = "" if name == "default" else f":{name}"
+        limits = rate_limits or {}
+        self.submit_limiter = get_rate_limiter(f"submit{suffix}", **limits.get('submit', RATE_LIMITS['submit']))
+        self.query_limiter = get_rate_limiter(f"query{suffix}", **limits.get('query', RATE_LIMITS['query']))
+        self.in_flight = 0  # 已提交尚未完成的请求数
+        self.consecutive_errors = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.current_weight = 0  # 平滑加权轮询的当前权重
+        self.submitted = 0
+        self.errors = 0
+
+    @property
+    def healthy(self):
+        return time.monotonic() >= self.ejected_until
+
+
+class ShardPool:
+    """Spread new submissions across credential shards and track their health
+
+    `least_loaded` picks the healthy shard with the fewest in-flight requests
+    per unit of weight; `weighted_round_robin` uses smooth weighted
+    round-robin. A shard with `eject_after` consecutive errors is ejected for
+    `eject_seconds`, doubling on each repeated ejection up to `max_eject_seconds`;
+    one success resets it. Only failures that reflect on the shard count
+    (see is_shard_error), each once. When every shard is ejected, the one whose
+    ejection ends first is used rather than failing.
+    """
+
+    def __init__(self, shards, strategy='least_loaded', eject_after=5, eject_seconds=30.0, max_eject_seconds=600.0):
+        if not shards:
+            raise ValueError("At least one credential shard is required")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown shard strategy: {strategy}")
+        self.shards = list(shards)
+        self.by_name = {shard.name: shard for shard in self.shards}
+        self.strategy = strategy
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, api_config):
+        """Pool from api_config: a "credentials" list, or the top-level app_id/api_key/api_secret"""
+        entries = api_config.get('credentials')
+        if entries:
+            shards = [Shard(entry.get('name') or f"shard{index}", entry['app_id'], entry['api_key'],
+                            entry['api_secret'], entry.get('api_base_url') or api_config.get('api_base_url'),
+                            entry.get('weight', 1), entry.get('rate_limits'))
+                      for index, entry in enumerate(entries)]
+        else:
+            shards = [Shard("default", api_config['app_id'], api_config['api_key'], api_config['api_secret'],
+                            api_config.get('api_base_url'))]
+        sharding = api_config.get('sharding', {})
+        return cls(shards, sharding.get('strategy', 'least_loaded'), sharding.get('eject_after', 5),
+                   sharding.get('eject_seconds', 30.0), sharding.get('max_eject_seconds', 600.0))
+
+    def get(self, name):
+        return self.by_name.get(name)
+
+    def pick(self):
+        """Shard for a new submission"""
+        with self._lock:
+            candidates = [shard for shard in self.shards if shard.healthy]
+            if not candidates:
+                return min(self.shards, key=lambda shard: shard.ejected_until)
+            if len(candidates) == 1:
+                return candidates[0]
+            if self.strategy == 'least_loaded':
+                return min(candidates, key=lambda shard: (shard.in_flight / shard.weight, -shard.weight))
+            # 平滑加权轮询：每轮各分片加上自身权重，选最大者并减去总权重
+            total = 0
+            best = None
+            for shard in candidates:
+                shard.current_weight += shard.weight
+                total += shard.weight
+                if best is None or shard.current_weight > best.current_weight:
+                    best = shard
+            best.current_weight -= total
+            return best
+
+    def acquire(self, shard):
+        """Count a request accepted by shard as in flight"""
+        with self._lock:
+            shard.in_flight += 1
+            shard.submitted += 1
+
+    def release(self, shard):
+        with self._lock:
+            shard.in_flight = max(0, shard.in_flight - 1)
+
+    def record_success(self, shard):
+        if shard.consecutive_errors:
+            with self._lock:
+                shard.consecutive_errors = 0
+                shard.ejections = 0
+
+    def record_failure(self, shard):
+        """Count one transport error or is_shard_error() response; ejects the shard after eject_after in a row"""
+        with self._lock:
+            shard.errors += 1
+            shard.consecutive_errors += 1
+            if shard.consecutive_errors < self.eject_after or not shard.healthy:
+                return
+            duration = min(self.max_eject_seconds, self.eject_seconds * (2 ** shard.ejections))
+            shard.ejections += 1
+            shard.consecutive_errors = 0
+            shard.ejected_until = time.monotonic() + duration
+        metrics.inc('shard_ejections_total', shard=shard.name)
+        logger.warning(f"Credential shard {shard.name} ejected for {duration:.0f}s after repeated errors")
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                shard.name: {
+                    "app_id": shard.app_id,
+                    "weight": shard.weight,
+                    "in_flight": shard.in_flight,
+                    "submitted": shard.submitted,
+                    "errors": shard.errors,
+                    "healthy": shard.ejected_until <= now,
+                    "ejected_for": max(0.0, shard.ejected_until - now)
+                }
+                for shard in self.shards
+            }
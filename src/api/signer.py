@@ -0,0 +1,49 @@
+import base64
+import hashlib
+import hmac
+import secrets
+import time
+import urllib.parse
+
+UTC_FORMAT = '%Y-%m-%dT%H:%M:%S+0000'
+
+
+class Signer:
+    """Signed query parameters for the audit API, with the per-call work hoisted out
+
+    Produces exactly what the original generate_signature did: the sorted,
+    urlencoded accessKeyId/accessKeySecret/appId/utc/uuid string signed with
+    HMAC-SHA1 under api_secret. The keyed HMAC state and the static part of
+    the string are built once; each call copies the HMAC, appends utc and
+    uuid, and reuses the utc string for every call within the same second.
+    """
+
+    def __init__(self, app_id, api_key, api_secret):
+        # 参数按键名排序：accessKeyId < accessKeySecret < appId < utc < uuid
+        self._static = {"accessKeyId": api_key, "accessKeySecret": api_secret, "appId": app_id}
+        self._prefix = urllib.parse.urlencode(self._static) + "&utc="
+        self._hmac = hmac.new(api_secret.encode('utf-8'), digestmod=hashlib.sha1)
+        self._utc_cache = (None, None, None)  # (second, utc, 编码后的utc)，整体替换保证线程安全
+
+    def _utc_for(self, second):
+        cached_second, utc, utc_quoted = self._utc_cache
+        if second != cached_second:
+            utc = time.strftime(UTC_FORMAT, time.gmtime(second))
+            utc_quoted = urllib.parse.quote_plus(utc)
+            self._utc_cache = (second, utc, utc_quoted)
+        return utc, utc_quoted
+
+    def sign(self, utc=None, nonce=None):
+        """Sign one request (thread-safe); utc/nonce can be fixed for verification"""
+        if utc is None:
+            utc, utc_quoted = self._utc_for(int(time.time()))
+        else:
+            utc_quoted = urllib.parse.quote_plus(utc)
+        nonce = nonce or secrets.token_hex(16)
+        mac = self._hmac.copy()
+        mac.update(f"{self._prefix}{utc_quoted}&uuid={nonce}".encode('utf-8'))
+        params = dict(self._static)
+        params["utc"] = utc
+        params["uuid"] = nonce
+        params["signature"] = base64.b64encode(mac.digest()).decode('utf-8')
+        return params
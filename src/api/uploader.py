@@ -0,0 +1,166 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+
+class UploadExpired(Exception):
+    """The object store no longer knows the upload_id (expired or restarted)"""
+
+
+class ChunkedUploader:
+    """Upload local files to an object store in parallel fixed-size parts
+
+    Protocol (see tools/mock_object_store.py for a local implementation):
+      POST {base}/uploads                        -> {"upload_id"}
+      PUT  {base}/uploads/{upload_id}/parts/{n}  -> {"etag"}  (etag = md5 of the part)
+      POST {base}/uploads/{upload_id}/complete   -> {"url"}
+
+    Completed parts are recorded in a small state file so an interrupted
+    upload resumes where it stopped instead of starting over. If the store
+    has forgotten the recorded upload_id, the state is dropped and the file
+    is uploaded again from the start, once.
+    """
+
+    def __init__(self, base_url, part_size=8 * 1024 * 1024, workers=4, max_retries=3,
+                 retry_delay=2, state_dir=None, session=None):
+        self.base_url = base_url.rstrip('/')
+        self.part_size = part_size
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.state_dir = state_dir or os.path.join(DATA_DIR, 'uploads')
+        self.session = session or requests
+
+    def upload(self, file_path, on_progress=None):
+        """Upload file_path and return the URL the audit service can fetch it from
+
+        on_progress(bytes_done, total_bytes) is called after every finished part.
+        """
+        state_path = self._state_path(file_path)
+        for attempt in range(2):
+            try:
+                return self._upload(file_path, state_path, on_progress)
+            except UploadExpired as e:
+                # 断点记录已失效，删除后重新发起上传；再次失败则放弃
+                self._discard_state(state_path)
+                if attempt:
+                    raise
+                logger.warning(f"{str(e)}; restarting upload of {file_path}")
+
+    def _upload(self, file_path, state_path, on_progress):
+        total = os.path.getsize(file_path)
+        part_count = max(1, (total + self.part_size - 1) // self.part_size)
+        state = self._load_state(state_path)
+
+        if state is None:
+            response = self.session.post(
+                f"{self.base_url}/uploads",
+                json={"name": os.path.basename(file_path), "size": total, "part_size": self.part_size},
+                timeout=60
+            )
+            if response.status_code != 200:
+                raise Exception(f"Upload initiation failed with status code: {response.status_code}")
+            state = {"upload_id": response.json()["upload_id"], "parts": {}}
+            self._save_state(state_path, state)
+        else:
+            logger.info(f"Resuming upload {state['upload_id']}: {len(state['parts'])}/{part_count} parts done")
+
+        lock = threading.Lock()
+        done_bytes = [sum(self._part_length(total, int(n)) for n in state['parts'])]
+        if on_progress:
+            on_progress(done_bytes[0], total)
+
+        def upload_part(part_number):
+            etag = self._upload_part(file_path, state['upload_id'], part_number, total)
+            with lock:
+                state['parts'][str(part_number)] = etag
+                self._save_state(state_path, state)
+                done_bytes[0] += self._part_length(total, part_number)
+                if on_progress:
+                    on_progress(done_bytes[0], total)
+
+        missing = [n for n in range(1, part_count + 1) if str(n) not in state['parts']]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # list()使任何分片的异常在这里抛出
+            list(executor.map(upload_part, missing))
+
+        parts = [{"part_number": n, "etag": state['parts'][str(n)]} for n in range(1, part_count + 1)]
+        response = self.session.post(
+            f"{self.base_url}/uploads/{state['upload_id']}/complete",
+            json={"parts": parts},
+            timeout=60
+        )
+        if response.status_code == 404:
+            raise UploadExpired(f"Upload {state['upload_id']} is unknown to the object store")
+        if response.status_code != 200:
+            raise Exception(f"Upload completion failed with status code: {response.status_code}")
+
+        os.remove(state_path)
+        url = response.json()["url"]
+        logger.info(f"Uploaded {file_path} ({total} bytes, {part_count} parts) to {url}")
+        return url
+
+    def _part_length(self, total, part_number):
+        start = (part_number - 1) * self.part_size
+        return max(0, min(self.part_size, total - start))
+
+    def _upload_part(self, file_path, upload_id, part_number, total):
+        length = self._part_length(total, part_number)
+        with open(file_path, 'rb') as f:
+            f.seek((part_number - 1) * self.part_size)
+            body = f.read(length)
+        expected_etag = hashlib.md5(body).hexdigest()
+        url = f"{self.base_url}/uploads/{upload_id}/parts/{part_number}"
+
+        for attempt in range(self.max_retries):
+            try:
+                response = self.session.put(url, data=body, timeout=120)
+                if response.status_code == 404:
+                    raise UploadExpired(f"Upload {upload_id} is unknown to the object store")
+                if response.status_code != 200:
+                    raise Exception(f"status code {response.status_code}")
+                etag = response.json().get("etag")
+                if etag != expected_etag:
+                    raise Exception(f"checksum mismatch ({etag} != {expected_etag})")
+                return etag
+            except UploadExpired:
+                raise  # 重试同一个upload_id没有意义
+            except Exception as e:
+                logger.warning(f"Part {part_number} upload failed: {str(e)} (Attempt {attempt + 1}/{self.max_retries})")
+                if attempt < self.max_retries - 1:
+                    time.sleep(self.retry_delay * (attempt + 1))
+                    continue
+                raise Exception(f"Part {part_number} upload failed after {self.max_retries} attempts: {str(e)}")
+
+    def _state_path(self, file_path):
+        stat = os.stat(file_path)
+        key = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}|{self.part_size}|{self.base_url}"
+        return os.path.join(self.state_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def _load_state(self, state_path):
+        try:
+            with open(state_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _discard_state(self, state_path):
+        try:
+            os.remove(state_path)
+        except FileNotFoundError:
+            pass
+
+    def _save_state(self, state_path, state):
+        os.makedirs(self.state_dir, exist_ok=True)
+        temp_path = state_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_path, state_path)
@@ -0,0 +1,237 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from api.iflytek_api import IflytekAPI
+from api.poll_scheduler import PollScheduler
+from api.result_model import as_dict
+from config import load_api_config, setup_logging
+from utils.segmentation import analyze_long_audio
+from utils.metrics import metrics, TextFileExporter
+
+logger = logging.getLogger(__name__)
+
+
+def read_inputs(paths):
+    """Yield URLs/paths from the given files ('-' for stdin), skipping blanks and comments"""
+    for path in paths or ['-']:
+        stream = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+        try:
+            for line in stream:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield line
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+class ProgressReporter:
+    """Periodic progress and throughput line on stderr"""
+
+    def __init__(self, total, interval=5.0):
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.errors = 0
+        self.start_time = time.time()
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, ok):
+        with self._lock:
+            self.done += 1
+            if not ok:
+                self.errors += 1
+            now = time.time()
+            if now - self._last_report >= self.interval or self.done == self.total:
+                self._last_report = now
+                self.report()
+
+    def report(self):
+        elapsed = max(time.time() - self.start_time, 1e-6)
+        print(
+            f"[{self.done}/{self.total}] errors={self.errors} "
+            f"elapsed={elapsed:.0f}s rate={self.done / elapsed:.2f} files/s",
+            file=sys.stderr, flush=True
+        )
+
+
+def analyze_local_file(api, file_path, segment_seconds=None, vad=False):
+    """Analyze one local file, optionally dropping silence and/or splitting it into segments"""
+    if segment_seconds:
+        analyze = lambda path: analyze_long_audio(api, path, segment_seconds)
+    else:
+        analyze = api.analyze_audio
+    if vad:
+        # VAD依赖numpy，仅在启用时导入
+        from utils.vad import analyze_with_vad
+        return analyze_with_vad(api, file_path, analyze)
+    return analyze(file_path)
+
+
+def analyze_chunk(api, chunk, segment_seconds=None, vad=False):
+    """Analyze one chunk of URLs; returns a list of (url, result, elapsed)
+
+    Local files that need segmentation or VAD are analyzed one by one;
+    the rest of the chunk goes out as a single audio_list request.
+    """
+    start_time = time.time()
+    if segment_seconds or vad:
+        local = [audio_url for audio_url in chunk if os.path.isfile(audio_url)]
+    else:
+        local = []
+    remote = [audio_url for audio_url in chunk if audio_url not in local]
+
+    results = {}
+    for audio_url in local:
+        try:
+            results[audio_url] = analyze_local_file(api, audio_url, segment_seconds, vad)
+        except Exception as e:
+            results[audio_url] = {"status": "error", "message": str(e)}
+    if len(remote) == 1:
+        try:
+            results[remote[0]] = api.analyze_audio(remote[0])
+        except Exception as e:
+            results[remote[0]] = {"status": "error", "message": str(e)}
+    elif remote:
+        results.update(api.analyze_batch(remote, batch_size=len(remote)))
+    elapsed = time.time() - start_time
+    return [(audio_url, results[audio_url], elapsed) for audio_url in chunk]
+
+
+def run(api, audio_urls, output, workers=8, batch_size=1, progress_interval=5.0, segment_seconds=None,
+        vad=False, store=None, resumed=None):
+    """Run every URL through the pipeline and write one JSON line per completed file
+
+    `resumed` maps sources to Futures from api.resume_pending_jobs(); their
+    results are written as they arrive, marked "resumed".
+    """
+    resumed = resumed or {}
+    chunks = [audio_urls[i:i + batch_size] for i in range(0, len(audio_urls), batch_size)]
+    progress = ProgressReporter(len(audio_urls) + len(resumed), progress_interval)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(analyze_chunk, api, chunk, segment_seconds, vad): None for chunk in chunks}
+        futures.update({future: source for source, future in resumed.items()})
+        for future in as_completed(futures):
+            source = futures[future]
+            if source is None:
+                records = future.result()
+            elif future.cancelled():
+                continue
+            else:
+                records = [(source, future.result(), None)]
+            for audio_url, result, elapsed in records:
+                if elapsed is None:
+                    record = {"url": audio_url, "resumed": True, "result": as_dict(result)}
+                else:
+                    record = {"url": audio_url, "elapsed": round(elapsed, 3), "result": as_dict(result)}
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+                if store is not None:
+                    store.append(audio_url, result)
+                progress.update(result.get("status") == "success")
+    return progress
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Headless batch runner for UNICC Audio MCZ")
+    parser.add_argument('inputs', nargs='*', help="files with one URL or path per line ('-' or none for stdin)")
+    parser.add_argument('-o', '--output', help="JSONL output file (default: stdout)")
+    parser.add_argument('-w', '--workers', type=int, default=8, help="parallel workers (default: 8)")
+    parser.add_argument('-b', '--batch-size', type=int, default=1,
+                        help="files per audio_list request; >1 uses analyze_batch, except for local files "
+                             "that need --segment-seconds or --vad (default: 1)")
+    parser.add_argument('--segment-seconds', type=int,
+                        help="split local files longer than this into concurrently audited segments")
+    parser.add_argument('--vad', action='store_true',
+                        help="drop silence from local files before submission (offsets stay on the original timeline)")
+    parser.add_argument('--callback-port', type=int, metavar='PORT',
+                        help="receive notify_url pushes on PORT instead of polling (0 picks a free port)")
+    parser.add_argument('--callback-host', metavar='HOST',
+                        help="address the callback receiver listens on (default: 127.0.0.1)")
+    parser.add_argument('--callback-url', metavar='URL',
+                        help="public URL that reaches the callback receiver through a proxy or NAT")
+    parser.add_argument('--cache', action='store_true', help="use the persistent result cache")
+    parser.add_argument('--results-store', nargs='?', const='', metavar='DIR',
+                        help="also append results to the columnar results store (default dir under ~/.unicc_audio_mcz)")
+    parser.add_argument('--job-store', action='store_true',
+                        help="record jobs durably; results left undelivered by an interrupted run are written "
+                             "first, and files with an unfinished job are polled instead of resubmitted")
+    parser.add_argument('--metrics', metavar='FILE',
+                        help="write Prometheus-format metrics to FILE (refreshed every 15s) and print a latency summary")
+    parser.add_argument('--no-metrics', action='store_true', help="disable metrics collection")
+    parser.add_argument('--progress-interval', type=float, default=5.0, help="seconds between progress lines")
+    parser.add_argument('--log-level', default='WARNING', help="logging level (default: WARNING)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    setup_logging(args.log_level.upper())
+
+    audio_urls = list(dict.fromkeys(read_inputs(args.inputs)))
+    if not audio_urls and not args.job_store:
+        print("No inputs given", file=sys.stderr)
+        return 1
+
+    metrics.enabled = not args.no_metrics
+    exporter = None
+    if args.metrics and metrics.enabled:
+        exporter = TextFileExporter(args.metrics)
+        metrics.start_exporter(exporter)
+
+    # 命令行的回调参数覆盖api_config.json中的同名配置
+    api_config = dict(load_api_config())
+    for key in ('callback_port', 'callback_host', 'callback_url'):
+        if getattr(args, key) is not None:
+            api_config[key] = getattr(args, key)
+    api = IflytekAPI(api_config)
+    # 所有工作线程的任务共用一个轮询线程
+    api.poll_scheduler = PollScheduler(api)
+    if args.cache:
+        from utils.result_cache import ResultCache
+        api.result_cache = ResultCache(session=api.http)
+    resumed = {}
+    if args.job_store:
+        from api.job_store import JobStore
+        api.job_store = JobStore()
+        # 上次运行中断时尚未交付的结果随本次输出一起写出，对应文件不再重复分析
+        resumed = api.resume_pending_jobs()
+        audio_urls = [audio_url for audio_url in audio_urls if audio_url not in resumed]
+        if resumed:
+            print(f"Resuming {len(resumed)} files from the job store", file=sys.stderr)
+
+    store = None
+    if args.results_store is not None:
+        from utils.results_store import ResultsStore
+        store = ResultsStore(args.results_store or None)
+
+    output = open(args.output, 'a', encoding='utf-8') if args.output else sys.stdout
+    try:
+        progress = run(api, audio_urls, output, args.workers, max(1, args.batch_size),
+                       args.progress_interval, args.segment_seconds, args.vad, store, resumed)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if store is not None:
+            store.close()
+        api.poll_scheduler.stop()
+        api.close()
+
+    progress.report()
+    if api.result_cache is not None:
+        print(f"cache: {api.result_cache.stats()}", file=sys.stderr)
+    if exporter is not None:
+        exporter(metrics)
+        print(metrics.format_summary(), file=sys.stderr)
+    return 0 if progress.errors == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
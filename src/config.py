@@ -1,13 +1,22 @@
 import os
 import json
 import logging
+import threading
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Local data directory (result cache, job store, etc.)
+DATA_DIR = os.path.join(os.path.expanduser('~'), '.unicc_audio_mcz')
+
+# Client-side rate limits shared by all IflytekAPI instances (requests per second)
+RATE_LIMITS = {
+    'submit': {'rate': 1.5, 'burst': 5, 'min_rate': 0.1, 'max_rate': 5},
+    'query': {'rate': 5, 'burst': 10, 'min_rate': 0.5, 'max_rate': 20}
+}
+
+# Default iFlytek audit API host (overridable per config or credential with "api_base_url")
+DEFAULT_API_BASE_URL = "https://audit.iflyaisol.com"
 
 # Set local ffmpeg path
 FFMPEG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ffmpeg.exe')
@@ -19,20 +28,52 @@ ANALYSIS_TYPES = {
     'abuse': 'Abusive Content Detection'
 }
 
-def load_api_config():
-    """Load iFlytek API configuration from JSON file"""
+def setup_logging(level=logging.INFO):
+    """Configure root logging; called by the entry points, never at import time"""
+    logging.basicConfig(level=level, format=LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
+
+
+_api_config = None
+_api_config_lock = threading.Lock()
+
+
+def validate_api_config(config):
+    """Check the credentials: a non-empty "credentials" list, or the top-level triple"""
+    required_fields = ['app_id', 'api_key', 'api_secret']
+    credentials = config.get('credentials')
+    if credentials:
+        for index, entry in enumerate(credentials):
+            for field in required_fields:
+                if not entry.get(field):
+                    raise ValueError(f"Missing or empty required field: credentials[{index}].{field}")
+        return config
+    for field in required_fields:
+        if field not in config or not config[field]:
+            raise ValueError(f"Missing or empty required field: {field}")
+    return config
+
+
+def load_api_config(reload=False):
+    """Load iFlytek API configuration from JSON file
+    
+    The file is parsed once per process and the same dict is returned to
+    every caller (treat it as read-only); pass reload=True to re-read it.
+    """
+    global _api_config
+    with _api_config_lock:
+        if _api_config is not None and not reload:
+            return _api_config
     try:
         config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api_config.json')
         with open(config_path, 'r') as f:
             config = json.load(f)
             
         # Validate required fields
-        required_fields = ['app_id', 'api_key', 'api_secret']
-        for field in required_fields:
-            if field not in config or not config[field]:
-                raise ValueError(f"Missing or empty required field: {field}")
+        validate_api_config(config)
                 
         logging.info("API configuration loaded successfully")
+        with _api_config_lock:
+            _api_config = config
         return config
         
     except FileNotFoundError:
@@ -0,0 +1,79 @@
+import os
+import tkinter as tk
+from tkinter import ttk
+
+# 各阶段对应的进度百分比；审核阶段由audit_status决定
+STAGE_PROGRESS = {
+    "queued": 0, "processing": 5, "uploading": 10, "submitted": 25,
+    "pending": 40, "reviewing": 65, "done": 100, "cached": 100
+}
+AUDIT_STAGES = {0: "pending", 1: "reviewing", 2: "done", 4: "failed"}
+FINISHED_STAGES = ("done", "cached", "failed", "cancelled")
+COLUMNS = (
+    ('file', "File", 180),
+    ('status', "Status", 90),
+    ('progress', "Progress", 70),
+    ('suggest', "Suggestion", 80),
+    ('violations', "Violations", 70)
+)
+
+
+class AnalysisJob:
+    """One queued URL or local file and what is known about its audit so far"""
+
+    def __init__(self, job_id, source):
+        self.job_id = job_id
+        self.source = source
+        self.name = os.path.basename(source.split('?')[0]) or source
+        self.stage = "queued"
+        self.progress = 0
+        self.suggest = ""
+        self.message = ""
+        self.rows = []
+        self.cancelled = False
+
+    @property
+    def finished(self):
+        return self.stage in FINISHED_STAGES
+
+    def update(self, stage, audit_status=None, progress=None):
+        if stage == "polling":
+            stage = AUDIT_STAGES.get(audit_status, "reviewing")
+        self.stage = stage
+        if progress is not None:
+            self.progress = progress
+        elif stage in STAGE_PROGRESS:
+            # 进度只增不减(重复查询到相同状态时保持不变)
+            self.progress = max(self.progress, STAGE_PROGRESS[stage])
+
+
+class JobPanel(ttk.Frame):
+    """Treeview listing every job with its live status; Tk thread only"""
+
+    def __init__(self, master, on_select=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.tree = ttk.Treeview(self, columns=[name for name, _, _ in COLUMNS], show='headings', height=8)
+        for name, title, width in COLUMNS:
+            self.tree.heading(name, text=title)
+            self.tree.column(name, width=width, stretch=(name == 'file'))
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        if on_select is not None:
+            self.tree.bind('<<TreeviewSelect>>', lambda _event: on_select(self.selected_job_id()))
+
+    def _values(self, job):
+        status = job.stage if not job.message else f"{job.stage}: {job.message}"
+        return (job.name, status, f"{int(job.progress)}%", job.suggest, len(job.rows) if job.finished else "")
+
+    def add(self, job):
+        self.tree.insert('', tk.END, iid=str(job.job_id), values=self._values(job))
+
+    def refresh(self, job):
+        if self.tree.exists(str(job.job_id)):
+            self.tree.item(str(job.job_id), values=self._values(job))
+
+    def selected_job_id(self):
+        selection = self.tree.selection()
+        return int(selection[0]) if selection else None
@@ -1,18 +1,18 @@
 import tkinter as tk
-from tkinter import ttk, filedialog, scrolledtext, messagebox
+from tkinter import ttk, filedialog, messagebox
 import threading
+import queue
+from collections import Counter
 import time
 import os
 import traceback
 import logging
 import tempfile
-from config import ANALYSIS_TYPES
-from api.iflytek_api import IflytekAPI
+from config import ANALYSIS_TYPES, load_api_config
 from utils.audio_utils import process_mp3
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-import ttkthemes
+from gui.results_table import ResultsTable, violation_rows
+from gui.job_panel import AnalysisJob, JobPanel
+# matplotlib、ttkthemes以及API客户端(requests/numpy)较重，首次使用时才导入
 
 logger = logging.getLogger(__name__)
 
@@ -22,23 +22,115 @@ class MediaAnalyzerGUI:
         self.root.title("UNICC Audio MCZ")
         self.root.geometry("1200x900")
         
-        # 添加取消分析标志
-        self.cancel_analysis = False
+        # 任务队列：多个URL/文件由固定数量的后台线程并发分析
+        self.max_workers = 4
+        self.job_queue = queue.Queue()
+        self.jobs = {}  # job_id -> AnalysisJob，只在主线程中修改
+        self.next_job_id = 1
+        self.category_counts = Counter()  # 图表使用的累计统计
+        self.chart_dirty = False
+        self.fig = None  # 图表在首次有数据时才创建
+        self.canvas = None
+        self.iflytek_api = None  # 首次分析时由_ensure_backend创建
+        self.results_store = None  # 每次分析结果追加到列式结果库
+        self._backend_lock = threading.Lock()
+        # 工作线程不直接操作控件，而是把更新放入队列，由主线程通过after定时取出执行
+        self.ui_queue = queue.Queue()
+        
+        # 启动时只检查配置文件，客户端本身延迟创建
+        self.api_config = None
+        try:
+            self.api_config = load_api_config()
+        except Exception as e:
+            logger.error(f"Initialization failed: {str(e)}")
+            messagebox.showerror("Error", f"Initialization failed: {str(e)}")
         
+        self.setup_gui()
+        self.root.after(0, self._apply_theme)
+        self.root.after(50, self._drain_ui_queue)
+        self.root.after(1000, self._refresh_chart)
+        # 窗口显示后在后台预先加载API客户端，首个任务无需等待导入
+        self.root.after(1000, lambda: threading.Thread(target=self._warm_up, daemon=True).start())
+        
+        for index in range(self.max_workers):
+            worker = threading.Thread(target=self._job_worker, name=f"analysis-worker-{index}", daemon=True)
+            worker.start()
+        
+    def _apply_theme(self):
+        try:
+            import ttkthemes
+        except ImportError:
+            logger.warning("ttkthemes is not installed, using the default ttk theme")
+            return
         # 应用现代主题
         self.style = ttkthemes.ThemedStyle(self.root)
         self.style.set_theme("arc")  # 使用现代化的arc主题
         
-        try:
-            # Initialize iFlytek API
-            self.iflytek_api = IflytekAPI()
-            logger.info("API initialized successfully")
+    def _ensure_backend(self):
+        """Create the API client and results store on first use; any thread"""
+        with self._backend_lock:
+            if self.iflytek_api is None:
+                from api.iflytek_api import IflytekAPI
+                from api.job_store import JobStore
+                from api.poll_scheduler import PollScheduler
+                from utils.results_store import ResultsStore
+                api = IflytekAPI(self.api_config)
+                # 所有分析任务共用一个轮询线程
+                api.poll_scheduler = PollScheduler(api)
+                # 提交的任务持久化，窗口关闭或崩溃后下次启动继续等待结果
+                api.job_store = JobStore()
+                logger.info("API initialized successfully")
+                # GUI分析量小，逐条落盘以免退出时丢失
+                self.results_store = ResultsStore(batch_size=1)
+                self.iflytek_api = api
+                self._resume_stored_jobs(api)
+        return self.iflytek_api
+        
+    def _resume_stored_jobs(self, api):
+        """Show files whose results a previous session never received; any thread"""
+        resumed = api.resume_pending_jobs()
+        if resumed:
+            logger.info(f"Resuming {len(resumed)} jobs from the job store")
+        for source, future in resumed.items():
+            self.post(self._add_resumed_job, source, future)
             
+    def _add_resumed_job(self, source, future):
+        job = self.add_job(source)
+        job.update("submitted")
+        self.job_panel.refresh(job)
+        future.add_done_callback(lambda done: self._finish_resumed_job(job, done))
+        
+    def _finish_resumed_job(self, job, future):
+        # 在轮询线程中调用
+        if not future.cancelled():
+            self.deliver_results(job, future.result())
+        
+    def _warm_up(self):
+        try:
+            self._ensure_backend()
         except Exception as e:
-            logger.error(f"Initialization failed: {str(e)}")
-            messagebox.showerror("Error", f"Initialization failed: {str(e)}")
-        
-        self.setup_gui()
+            logger.warning(f"API warm-up failed: {str(e)}")
+            
+    def post(self, func, *args):
+        """Run func(*args) on the Tk thread; safe to call from worker threads"""
+        if threading.current_thread() is threading.main_thread():
+            func(*args)
+        else:
+            self.ui_queue.put((func, args))
+            
+    def _drain_ui_queue(self):
+        # 每次最多处理约30ms，剩余的留到下一轮，避免界面卡顿
+        deadline = time.monotonic() + 0.03
+        try:
+            while time.monotonic() < deadline:
+                func, args = self.ui_queue.get_nowait()
+                try:
+                    func(*args)
+                except Exception as e:
+                    logger.error(f"UI update failed: {str(e)}")
+        except queue.Empty:
+            pass
+        self.root.after(50, self._drain_ui_queue)
         
     def setup_gui(self):
         # 创建主框架
@@ -83,19 +175,26 @@ class MediaAnalyzerGUI:
         self.url_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         self.url_entry.insert(0, "https://drive.google.com/file/d/1EJgCY7GXiVnTMfFAfKU7bQZfAJakTmkc/view?usp=drive_link")
         
-        # 分析按钮和取消按钮
+        # 本地文件信息
+        self.file_info = ttk.Label(control_frame, text="No local file selected")
+        self.file_info.pack(fill=tk.X, pady=5)
+        
+        # 加入队列按钮和取消按钮(输入框中可用空格分隔多个URL)
         button_frame = ttk.Frame(control_frame)
         button_frame.pack(fill=tk.X, pady=5)
         
-        self.analyze_btn = ttk.Button(button_frame, text="Start Analysis", 
+        self.analyze_btn = ttk.Button(button_frame, text="Add to Queue", 
                                     command=self.analyze_from_url)
         self.analyze_btn.pack(side=tk.LEFT, padx=5)
         
-        self.cancel_btn = ttk.Button(button_frame, text="Cancel Analysis",
-                                   command=self.cancel_analysis_process,
-                                   state='disabled')
+        self.cancel_btn = ttk.Button(button_frame, text="Cancel Pending",
+                                   command=self.cancel_analysis_process)
         self.cancel_btn.pack(side=tk.LEFT, padx=5)
         
+        self.select_btn = ttk.Button(button_frame, text="Add Local Files",
+                                   command=self.select_media_file)
+        self.select_btn.pack(side=tk.LEFT, padx=5)
+        
         # 进度条
         progress_frame = ttk.Frame(control_frame)
         progress_frame.pack(fill=tk.X, pady=5)
@@ -117,20 +216,26 @@ class MediaAnalyzerGUI:
         result_frame = ttk.Frame(self.main_frame)
         result_frame.grid(row=1, column=1, sticky=(tk.W, tk.E, tk.N, tk.S), padx=5)
         
-        # 文本显示区域
-        text_frame = ttk.LabelFrame(result_frame, text="Analysis Results", padding="5")
-        text_frame.pack(fill=tk.BOTH, expand=True)
+        # 任务列表：选中某个任务只显示它的结果，不选则显示全部
+        jobs_frame = ttk.LabelFrame(result_frame, text="Jobs", padding="5")
+        jobs_frame.pack(fill=tk.BOTH, expand=False)
         
-        self.text_area = scrolledtext.ScrolledText(text_frame, 
-                                                 width=60, 
-                                                 height=20,
-                                                 font=('Consolas', 10))
-        self.text_area.pack(fill=tk.BOTH, expand=True, pady=5)
+        self.job_panel = JobPanel(jobs_frame, on_select=self.show_job)
+        self.job_panel.pack(fill=tk.BOTH, expand=True)
         
-        # 图表显示区域
-        self.fig = Figure(figsize=(6, 4))
-        self.canvas = FigureCanvasTkAgg(self.fig, master=result_frame)
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        # 结果表格：分页显示违规片段，支持按列排序和按分类/建议筛选
+        table_frame = ttk.LabelFrame(result_frame, text="Analysis Results", padding="5")
+        table_frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.summary_label = ttk.Label(table_frame, text="No results yet", font=('Helvetica', 11, 'bold'))
+        self.summary_label.pack(anchor=tk.W, pady=(0, 5))
+        
+        self.results_table = ResultsTable(table_frame)
+        self.results_table.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        # 图表显示区域(画布在首次绘图时创建)
+        self.chart_frame = ttk.Frame(result_frame)
+        self.chart_frame.pack(fill=tk.BOTH, expand=True)
         
         # 配置网格权重
         self.main_frame.columnconfigure(1, weight=1)
@@ -141,199 +246,223 @@ class MediaAnalyzerGUI:
         
     def select_media_file(self):
         try:
-            file_path = filedialog.askopenfilename(
+            file_paths = filedialog.askopenfilenames(
                 filetypes=[("MP3 Files", "*.mp3")]
             )
-            if file_path:
-                logger.info(f"Selected MP3 file: {file_path}")
+            if file_paths:
+                logger.info(f"Selected {len(file_paths)} MP3 files")
                 # 更新文件信息显示
-                file_size = os.path.getsize(file_path) / (1024 * 1024)  # 转换为MB
+                total_size = sum(os.path.getsize(path) for path in file_paths) / (1024 * 1024)  # 转换为MB
                 self.file_info.configure(
-                    text=f"File: {os.path.basename(file_path)}\nSize: {file_size:.2f} MB"
+                    text=f"Files: {len(file_paths)}\nSize: {total_size:.2f} MB"
                 )
-                self.process_media_file(file_path)
+                for file_path in file_paths:
+                    self.enqueue(file_path)
         except Exception as e:
             logger.error(f"File selection failed: {str(e)}")
             messagebox.showerror("Error", f"File selection failed: {str(e)}")
             
-    def process_media_file(self, file_path):
+    def analyze_from_url(self):
+        urls = self.url_entry.get().split()
+        if not urls:
+            messagebox.showerror("Error", "Please enter audio file URL")
+            return
+        for url in urls:
+            logger.info(f"Queued audio from URL: {url}")
+            self.enqueue(url)
+            
+    def add_job(self, source):
+        """Add a job for a URL or local file to the job list (Tk thread)"""
+        job = AnalysisJob(self.next_job_id, source)
+        self.next_job_id += 1
+        self.jobs[job.job_id] = job
+        self.job_panel.add(job)
+        self.update_overview()
+        return job
+        
+    def enqueue(self, source):
+        """Add a URL or local file to the job queue (Tk thread)"""
+        self.job_queue.put(self.add_job(source))
+        
+    def cancel_analysis_process(self):
+        # 排队中的任务直接取消；已在运行的任务结果将被丢弃
+        cancelled = 0
+        for job in self.jobs.values():
+            if not job.finished:
+                job.cancelled = True
+                job.update("cancelled")
+                self.job_panel.refresh(job)
+                cancelled += 1
+        self.update_overview()
+        self.update_status(f"Cancelled {cancelled} jobs")
+        
+    def _job_worker(self):
+        while True:
+            job = self.job_queue.get()
+            if not job.cancelled:
+                self.process_media_file(job)
+                
+    def process_media_file(self, job):
+        """Worker thread: validate and upload local files, then audit the job"""
         temp_file = None
         try:
-            logger.info(f"Processing MP3 file: {file_path}")
-            self.progress_var.set(10)
-            self.update_status("Processing audio file...")
-            
-            # Process MP3 file
-            temp_file = process_mp3(file_path)
-            logger.info(f"MP3 file processed: {temp_file}")
-            self.progress_var.set(30)
-            
-            # Analyze content using iFlytek API
-            self.analyze_content(temp_file)
+            audio_file = job.source
+            api = self._ensure_backend()
+            if os.path.isfile(audio_file):
+                logger.info(f"Processing MP3 file: {audio_file}")
+                self.report(job, "processing")
+                
+                # Process MP3 file
+                temp_file = process_mp3(audio_file)
+                
+                # 分片上传本地文件，得到审核服务可访问的URL
+                if api.uploader is None:
+                    raise Exception("Local files require \"upload_url\" in api_config.json")
+                self.report(job, "uploading")
+                audio_file = api.upload_if_local(
+                    temp_file,
+                    on_progress=lambda done, total: self.report(job, "uploading", progress=10 + 15 * done / max(total, 1))
+                )
                 
+            self.analyze_content(audio_file, job)
+            
         except Exception as e:
-            logger.error(f"File processing error: {str(e)}")
+            logger.error(f"Job {job.name} failed: {str(e)}")
             logger.error(traceback.format_exc())
-            error_msg = f"File processing error: {str(e)}\n\n"
-            error_msg += "Please ensure:\n"
-            error_msg += "1. File format is MP3\n"
-            error_msg += "2. File is not corrupted"
-            self.update_status(error_msg)
-            messagebox.showerror("Error", error_msg)
+            self.report(job, "failed", message=str(e))
         finally:
             # Clean up temporary file
-            if temp_file and temp_file != file_path and os.path.exists(temp_file):
+            if temp_file and temp_file != job.source and os.path.exists(temp_file):
                 try:
                     os.remove(temp_file)
                     logger.debug(f"Temporary file deleted: {temp_file}")
                 except:
                     logger.warning(f"Failed to delete temporary file: {temp_file}")
+                    
+    def analyze_content(self, audio_file, job):
+        """Worker thread: run the audit, reporting each audit_status change to the job list"""
+        logger.debug(f"Analyzing content: {audio_file}")
+        analysis_results = self._ensure_backend().analyze_audio(
+            audio_file,
+            on_status=lambda stage, audit_status=None: self.report(job, stage, audit_status)
+        )
+        self.deliver_results(job, analysis_results)
+        
+    def deliver_results(self, job, analysis_results):
+        """Worker thread: store a finished job's results and hand them to the Tk thread"""
+        if self.results_store is not None:
+            self.results_store.append(job.source, analysis_results)
             
-    def cancel_analysis_process(self):
-        self.cancel_analysis = True
-        self.update_status("Analyzing cancelled...")
-        self.cancel_btn.configure(state='disabled')
-        
-    def analyze_from_url(self):
-        try:
-            url = self.url_entry.get().strip()
-            if not url:
-                messagebox.showerror("Error", "Please enter audio file URL")
-                return
-                
-            logger.info(f"Analyzing audio from URL: {url}")
-            self.update_status("Analyzing audio file...")
-            self.update_progress(10)
-            
-            # 重置取消标志
-            self.cancel_analysis = False
-            
-            # 禁用分析按钮，启用取消按钮
-            self.analyze_btn.configure(state='disabled')
-            self.cancel_btn.configure(state='normal')
+        # 表格行在工作线程中生成，主线程只负责显示
+        rows = violation_rows(job.name, analysis_results)
+        self.post(self.finish_job, job, analysis_results, rows)
+        
+    def report(self, job, stage, audit_status=None, progress=None, message=""):
+        """Record a job stage; callable from worker threads"""
+        self.post(self._apply_report, job, stage, audit_status, progress, message)
+        
+    def _apply_report(self, job, stage, audit_status, progress, message):
+        if job.cancelled:
+            return
+        job.update(stage, audit_status, progress)
+        if message:
+            job.message = message
+        self.job_panel.refresh(job)
+        self.update_overview()
+        
+    def finish_job(self, job, analysis_results, rows):
+        if job.cancelled:
+            return
+        job.rows = rows
+        if analysis_results.get("status") == "success":
+            job.suggest = analysis_results.get("suggest", "pass")
+            job.update("cached" if job.stage == "cached" else "done")
+            if rows:
+                self.category_counts.update(category for row in rows
+                                            for category in row[4].split(", ") if category)
+            else:
+                self.category_counts["No violations"] += 1
+            self.chart_dirty = True
+        else:
+            job.message = analysis_results.get('message', 'Unknown error')
+            job.update("failed")
+        self.job_panel.refresh(job)
+        self.update_overview()
+        
+        # 未选中任务时表格显示所有结果，新结果增量追加
+        selected = self.job_panel.selected_job_id()
+        if selected is None:
+            self.results_table.append_rows(rows)
+        elif selected == job.job_id:
+            self.show_job(job.job_id)
             
-            # 在新线程中执行分析
-            analysis_thread = threading.Thread(target=self.analyze_content, args=(url,))
-            analysis_thread.daemon = True
-            analysis_thread.start()
-                
-        except Exception as e:
-            logger.error(f"URL analysis error: {str(e)}")
-            logger.error(traceback.format_exc())
-            error_msg = f"URL analysis error: {str(e)}\n\n"
-            error_msg += "Please check:\n"
-            error_msg += "1. URL is correct\n"
-            error_msg += "2. Network connection is stable\n"
-            error_msg += "3. Audio file is accessible"
-            self.update_status(error_msg)
-            messagebox.showerror("Error", error_msg)
+    def show_job(self, job_id):
+        """Show one job's violations, or every finished job's when job_id is None"""
+        job = self.jobs.get(job_id) if job_id is not None else None
+        if job is None:
+            rows = [row for job in self.jobs.values() for row in job.rows]
+            self.results_table.set_rows(rows)
+            self.update_overview()
+            return
+        if job.stage == "failed":
+            summary = f"Analysis failed: {job.message or 'Unknown error'}"
+        elif not job.finished:
+            summary = f"{job.name}: {job.stage} ({int(job.progress)}%)"
+        elif job.suggest == "pass":
+            summary = "✅ Pass: No violations found"
+        elif job.suggest == "review":
+            summary = "⚠️ Review required: Potential violations found"
+        else:  # block
+            summary = "❌ Block: Violations found"
+        if job.finished and job.stage != "failed":
+            summary = f"{job.name}: {summary} ({len(job.rows)} flagged segments)"
+        self.summary_label.configure(text=summary)
+        self.results_table.set_rows(job.rows)
+        
+    def update_overview(self):
+        """Overall progress bar, status line and summary across all jobs (Tk thread)"""
+        jobs = [job for job in self.jobs.values() if job.stage != "cancelled"]
+        if not jobs:
             self.progress_var.set(0)
-            self.enable_analyze_button()
-            
-    def disable_analyze_button(self):
-        for widget in self.root.winfo_children():
-            if isinstance(widget, ttk.Button) and widget.cget('text') == "Start Analysis":
-                widget.configure(state='disabled')
-                
-    def enable_analyze_button(self):
-        self.analyze_btn.configure(state='normal')
-        self.cancel_btn.configure(state='disabled')
-        
-    def update_progress(self, value):
-        """Update progress bar and status"""
-        self.progress_var.set(value)
-        self.root.update_idletasks()
-        
-        # Update status text
-        if value == 0:
             self.status_label.configure(text="Ready")
-        elif value < 20:
-            self.status_label.configure(text="Submitting analysis request...")
-        elif value < 80:
-            self.status_label.configure(text="Analyzing audio content...")
-        elif value < 100:
-            self.status_label.configure(text="Processing analysis results...")
-        else:
-            self.status_label.configure(text="Analysis completed")
-        
-    def analyze_content(self, audio_file):
-        try:
-            logger.debug(f"Analyzing content: {audio_file}")
-            timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-            self.text_area.insert(tk.END, f"\n[{timestamp}] Starting audio analysis...\n")
-            self.update_status("Analyzing audio file...")
-            self.update_progress(10)
-            
-            # Analyze content using iFlytek API
-            analysis_results = self.iflytek_api.analyze_audio(audio_file)
-            
-            if self.cancel_analysis:
-                self.update_status("Analysis cancelled")
-                self.update_progress(0)
-                self.enable_analyze_button()
-                return
-                
-            self.update_progress(80)
-            
-            # Clear previous results
-            self.text_area.delete(1.0, tk.END)
-            
-            # Display analysis results
-            if analysis_results.get("status") == "success":
-                suggest = analysis_results.get("suggest", "pass")
-                violations = analysis_results.get("violations", [])
-                
-                # Display overall suggestion
-                if suggest == "pass":
-                    self.text_area.insert(tk.END, "✅ Pass: No violations found\n\n")
-                elif suggest == "review":
-                    self.text_area.insert(tk.END, "⚠️ Review required: Potential violations found\n\n")
-                else:  # block
-                    self.text_area.insert(tk.END, "❌ Block: Violations found\n\n")
-                
-                # Display violation details
-                if violations:
-                    self.text_area.insert(tk.END, "Violation Details:\n")
-                    for violation in violations:
-                        self.text_area.insert(tk.END, f"\nTime: {violation['offset_time']}s")
-                        self.text_area.insert(tk.END, f"\nDuration: {violation['duration']}s")
-                        self.text_area.insert(tk.END, f"\nContent: {violation['content']}")
-                        self.text_area.insert(tk.END, f"\nSuggestion: {'Pass' if violation['suggest'] == 'pass' else 'Review' if violation['suggest'] == 'review' else 'Block'}")
-                        
-                        # Display category information
-                        if violation['categories']:
-                            self.text_area.insert(tk.END, "\nCategories:")
-                            for category in violation['categories']:
-                                self.text_area.insert(tk.END, f"\n  - {category['description']}")
-                                if category['words']:
-                                    self.text_area.insert(tk.END, f"\n    Keywords: {', '.join(category['words'])}")
-                        self.text_area.insert(tk.END, "\n" + "-"*50 + "\n")
-                else:
-                    self.text_area.insert(tk.END, "No violations found\n")
-            else:
-                self.text_area.insert(tk.END, f"Analysis failed: {analysis_results.get('message', 'Unknown error')}\n")
-            
-            self.text_area.see(tk.END)
-            self.update_progress(100)
-            self.update_status("Analysis completed")
-            self.enable_analyze_button()
+            return
+        finished = sum(1 for job in jobs if job.finished)
+        queued = sum(1 for job in jobs if job.stage == "queued")
+        running = len(jobs) - finished - queued
+        self.progress_var.set(sum(job.progress for job in jobs) / len(jobs))
+        self.status_label.configure(text=f"{running} running, {queued} queued, {finished}/{len(jobs)} finished")
+        if self.job_panel.selected_job_id() is None:
+            verdicts = Counter(job.suggest for job in jobs if job.suggest)
+            failed = sum(1 for job in jobs if job.stage == "failed")
+            self.summary_label.configure(
+                text=f"All jobs: {verdicts['block']} block, {verdicts['review']} review, "
+                     f"{verdicts['pass']} pass, {failed} failed"
+            )
             
-        except Exception as e:
-            if not self.cancel_analysis:
-                logger.error(f"Content analysis error: {str(e)}")
-                logger.error(traceback.format_exc())
-                error_msg = f"Analysis failed:\n{str(e)}\n\n"
-                error_msg += "Please check:\n"
-                error_msg += "1. API credentials are correct\n"
-                error_msg += "2. Network connection is stable\n"
-                error_msg += "3. Audio file format is supported\n"
-                error_msg += "4. Audio file size is within limit (10MB)"
-                self.update_status(error_msg)
-                messagebox.showerror("Error", error_msg)
-                self.progress_var.set(0)
-            self.enable_analyze_button()
-    
+    def _refresh_chart(self):
+        # 图表最多每秒重绘一次
+        if self.chart_dirty:
+            self.chart_dirty = False
+            self.update_chart(dict(self.category_counts.most_common(12)))
+        self.root.after(1000, self._refresh_chart)
+        
+    def _ensure_chart(self):
+        """Create the matplotlib figure on first use; False if matplotlib is unavailable"""
+        if self.canvas is None:
+            try:
+                from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+                from matplotlib.figure import Figure
+            except ImportError:
+                logger.warning("matplotlib is not installed, chart disabled")
+                return False
+            self.fig = Figure(figsize=(6, 4))
+            self.canvas = FigureCanvasTkAgg(self.fig, master=self.chart_frame)
+            self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        return True
+        
     def update_chart(self, results_count):
+        if not results_count or not self._ensure_chart():
+            return
         # 清除之前的图表
         self.fig.clear()
         ax = self.fig.add_subplot(111)
@@ -347,7 +476,8 @@ class MediaAnalyzerGUI:
         # 自定义图表
         ax.set_title('Analysis Results Summary')
         ax.set_ylabel('Number of Items')
-        plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+        for label in ax.get_xticklabels():
+            label.set(rotation=45, ha='right')
         
         # 添加数值标签
         for bar in bars:
@@ -361,4 +491,4 @@ class MediaAnalyzerGUI:
         
     def update_status(self, message):
         logger.debug(f"Status update: {message}")
-        self.status_label.configure(text=message) 
\ No newline at end of file
+        self.post(self.status_label.configure, {"text": message}) 
\ No newline at end of file
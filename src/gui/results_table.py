@@ -0,0 +1,206 @@
+import tkinter as tk
+from tkinter import ttk
+from utils.metrics import metrics
+
+ALL = "All"
+# (列标识, 标题, 宽度)
+COLUMNS = (
+    ('file', "File", 140),
+    ('time', "Time (s)", 70),
+    ('duration', "Duration (s)", 80),
+    ('suggest', "Suggestion", 80),
+    ('categories', "Categories", 160),
+    ('keywords', "Keywords", 160),
+    ('content', "Content", 320)
+)
+COLUMN_INDEX = {name: index for index, (name, _, _) in enumerate(COLUMNS)}
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def violation_rows(source, analysis_results):
+    """Flatten analysis_results into table rows (one per violation)"""
+    rows = []
+    for violation in analysis_results.get("violations") or ():
+        categories = violation.get("categories") or ()
+        words = []
+        for category in categories:
+            words.extend(category.get("words") or ())
+        rows.append((
+            source,
+            _number(violation.get("offset_time")),
+            _number(violation.get("duration")),
+            violation.get("suggest") or "",
+            ", ".join(str(category.get("description")) for category in categories),
+            ", ".join(dict.fromkeys(str(word) for word in words)),
+            (violation.get("content") or "").replace("\n", " ")
+        ))
+    return rows
+
+
+class ResultsModel:
+    """Rows plus the current filter, sort order and page; no Tk calls
+
+    Filtering and sorting work on a list of row indices, so the widget only
+    ever receives one page of rows however many violations there are.
+    """
+
+    def __init__(self, page_size=200):
+        self.page_size = page_size
+        self.rows = []
+        self.categories = set()
+        self.view = []
+        self.page = 0
+        self.sort_column = None
+        self.sort_descending = False
+        self.category_filter = ALL
+        self.suggest_filter = ALL
+
+    def clear(self):
+        self.rows = []
+        self.categories = set()
+        self.view = []
+        self.page = 0
+
+    def extend(self, rows):
+        start = len(self.rows)
+        self.rows.extend(rows)
+        for row in rows:
+            self.categories.update(part for part in row[COLUMN_INDEX['categories']].split(", ") if part)
+        if self.sort_column is None:
+            # 未排序时只需把新行中符合条件的追加到视图末尾
+            self.view.extend(index for index in range(start, len(self.rows)) if self._matches(self.rows[index]))
+        else:
+            self.refresh()
+
+    def _matches(self, row):
+        if self.suggest_filter != ALL and row[COLUMN_INDEX['suggest']] != self.suggest_filter:
+            return False
+        if self.category_filter != ALL and self.category_filter not in row[COLUMN_INDEX['categories']].split(", "):
+            return False
+        return True
+
+    def refresh(self):
+        self.view = [index for index, row in enumerate(self.rows) if self._matches(row)]
+        if self.sort_column is not None:
+            column = COLUMN_INDEX[self.sort_column]
+            rows = self.rows
+            # None排在最后，数值列按数值排序
+            self.view.sort(key=lambda index: (rows[index][column] is None, rows[index][column] or 0)
+                           if self.sort_column in ('time', 'duration')
+                           else str(rows[index][column]).lower(),
+                           reverse=self.sort_descending)
+        self.page = min(self.page, self.page_count - 1)
+
+    def set_filters(self, category=ALL, suggest=ALL):
+        self.category_filter = category
+        self.suggest_filter = suggest
+        self.page = 0
+        self.refresh()
+
+    def sort_by(self, column):
+        if self.sort_column == column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column = column
+            self.sort_descending = False
+        self.refresh()
+
+    @property
+    def page_count(self):
+        return max(1, (len(self.view) + self.page_size - 1) // self.page_size)
+
+    def page_rows(self):
+        start = self.page * self.page_size
+        return [self.rows[index] for index in self.view[start:start + self.page_size]]
+
+
+class ResultsTable(ttk.Frame):
+    """Paged ttk.Treeview over a ResultsModel with sort-by-heading and filters
+
+    Must only be touched from the Tk thread.
+    """
+
+    def __init__(self, master, page_size=200, **kwargs):
+        super().__init__(master, **kwargs)
+        self.model = ResultsModel(page_size)
+
+        filter_frame = ttk.Frame(self)
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(filter_frame, text="Category:").pack(side=tk.LEFT)
+        self.category_var = tk.StringVar(value=ALL)
+        self.category_box = ttk.Combobox(filter_frame, textvariable=self.category_var,
+                                         values=[ALL], state='readonly', width=20)
+        self.category_box.pack(side=tk.LEFT, padx=5)
+        ttk.Label(filter_frame, text="Suggestion:").pack(side=tk.LEFT)
+        self.suggest_var = tk.StringVar(value=ALL)
+        suggest_box = ttk.Combobox(filter_frame, textvariable=self.suggest_var,
+                                   values=[ALL, "block", "review", "pass"], state='readonly', width=10)
+        suggest_box.pack(side=tk.LEFT, padx=5)
+        self.category_box.bind('<<ComboboxSelected>>', self._on_filter)
+        suggest_box.bind('<<ComboboxSelected>>', self._on_filter)
+
+        tree_frame = ttk.Frame(self)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=[name for name, _, _ in COLUMNS], show='headings')
+        for name, title, width in COLUMNS:
+            self.tree.heading(name, text=title, command=lambda column=name: self._on_sort(column))
+            self.tree.column(name, width=width, stretch=(name == 'content'))
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        pager = ttk.Frame(self)
+        pager.pack(fill=tk.X, pady=(5, 0))
+        ttk.Button(pager, text="< Prev", command=lambda: self._go_to_page(self.model.page - 1)).pack(side=tk.LEFT)
+        ttk.Button(pager, text="Next >", command=lambda: self._go_to_page(self.model.page + 1)).pack(side=tk.LEFT, padx=5)
+        self.page_label = ttk.Label(pager, text="")
+        self.page_label.pack(side=tk.LEFT, padx=5)
+        self._render()
+
+    def set_rows(self, rows):
+        self.model.clear()
+        self.append_rows(rows)
+
+    def append_rows(self, rows):
+        self.model.extend(rows)
+        self.category_box.configure(values=[ALL] + sorted(self.model.categories))
+        self._render()
+
+    def clear(self):
+        self.set_rows([])
+
+    def _on_filter(self, _event=None):
+        self.model.set_filters(self.category_var.get(), self.suggest_var.get())
+        self._render()
+
+    def _on_sort(self, column):
+        self.model.sort_by(column)
+        for name, title, _ in COLUMNS:
+            arrow = (" ▼" if self.model.sort_descending else " ▲") if name == column else ""
+            self.tree.heading(name, text=title + arrow)
+        self._render()
+
+    def _go_to_page(self, page):
+        self.model.page = min(max(page, 0), self.model.page_count - 1)
+        self._render()
+
+    @metrics.timed('gui_render_seconds')
+    def _render(self):
+        # 只渲染当前页，代价与总行数无关
+        self.tree.delete(*self.tree.get_children())
+        for row in self.model.page_rows():
+            values = ["" if value is None else value for value in row]
+            self.tree.insert('', tk.END, values=values)
+        total = len(self.model.view)
+        start = self.model.page * self.model.page_size
+        self.page_label.configure(
+            text=f"Rows {min(start + 1, total)}-{min(start + self.model.page_size, total)} of {total} "
+                 f"(page {self.model.page + 1}/{self.model.page_count})"
+        )
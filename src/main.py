@@ -1,10 +1,57 @@
-import tkinter as tk
+import argparse
 import logging
+import os
+import sys
+import time
 import traceback
-from gui.media_analyzer_gui import MediaAnalyzerGUI
+from config import setup_logging
+
+STARTUP_BUDGET = 0.5  # 启动目标：导入GUI模块不超过0.5秒
+
+
+def profile_startup(budget=STARTUP_BUDGET, top=15):
+    """Print the import-time breakdown and time-to-window; non-zero exit when over budget"""
+    from utils.startup_profile import format_breakdown, import_breakdown
+
+    total, rows = import_breakdown('gui.media_analyzer_gui')
+    print(format_breakdown('gui.media_analyzer_gui', total, rows, top))
+
+    # 在本进程中测量从创建Tk到窗口完成首次布局的时间(无显示环境时跳过)
+    start = time.perf_counter()
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"window: skipped ({str(e)})")
+    else:
+        from gui.media_analyzer_gui import MediaAnalyzerGUI
+        MediaAnalyzerGUI(root)
+        root.update()
+        print(f"window: ready in {(time.perf_counter() - start) * 1000:.1f} ms")
+        root.destroy()
+
+    within = total <= budget
+    print(f"budget: {budget * 1000:.0f} ms for imports -> {'OK' if within else 'OVER BUDGET'}")
+    return 0 if within else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="UNICC Audio MCZ")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="print an import-time breakdown and time-to-window, then exit")
+    parser.add_argument('--budget', type=float, default=STARTUP_BUDGET,
+                        help=f"startup import budget in seconds for --profile-startup (default: {STARTUP_BUDGET})")
+    parser.add_argument('--log-level', default=os.environ.get('UNICC_LOG_LEVEL', 'INFO'),
+                        help="logging level (default: INFO, or $UNICC_LOG_LEVEL)")
+    args = parser.parse_args(argv)
+    setup_logging(args.log_level.upper())
+
+    if args.profile_startup:
+        return profile_startup(args.budget)
 
-def main():
     try:
+        import tkinter as tk
+        from gui.media_analyzer_gui import MediaAnalyzerGUI
         root = tk.Tk()
         app = MediaAnalyzerGUI(root)
         root.title("UNICC Audio MCZ")
@@ -13,6 +60,7 @@ def main():
         logging.critical(f"Program startup failed: {str(e)}")
         logging.critical(traceback.format_exc())
         print(f"Program startup failed: {str(e)}")
+    return 0
 
 if __name__ == "__main__":
-    main()   
\ No newline at end of file
+    sys.exit(main())
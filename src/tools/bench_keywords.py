@@ -0,0 +1,67 @@
+"""Throughput benchmark for the local keyword pre-screen
+
+Run with `python src/tools/bench_keywords.py --lines 200000`. Scans
+synthetic transcript lines with KeywordMatcher and, for comparison, a naive
+substring search over the same keyword list.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.iflytek_api import IMMIGRATION_BIAS_KEYWORDS  # noqa: E402
+from utils.keyword_matcher import KeywordMatcher, normalize_text  # noqa: E402
+
+FILLER = ("the a we they people said today city council meeting about new housing "
+          "program school budget local families work community support plan road "
+          "weather report news update morning evening").split()
+
+
+def make_lines(count, hit_rate, seed=0):
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        words = rng.choices(FILLER, k=rng.randint(8, 20))
+        if rng.random() < hit_rate:
+            words.insert(rng.randrange(len(words)), rng.choice(IMMIGRATION_BIAS_KEYWORDS))
+        lines.append(' '.join(words).capitalize() + '.')
+    return lines
+
+
+def bench(label, scan, lines):
+    start = time.perf_counter()
+    hits = sum(1 for line in lines if scan(line))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {len(lines) / elapsed * 60:>14,.0f} lines/min  hits={hits}  ({elapsed:.2f}s)")
+    return hits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the keyword pre-screen")
+    parser.add_argument('--lines', type=int, default=200000)
+    parser.add_argument('--hit-rate', type=float, default=0.05, help="fraction of lines containing a keyword")
+    args = parser.parse_args(argv)
+
+    lines = make_lines(args.lines, args.hit_rate)
+    keywords = [normalize_text(keyword) for keyword in IMMIGRATION_BIAS_KEYWORDS]
+
+    start = time.perf_counter()
+    matcher = KeywordMatcher(IMMIGRATION_BIAS_KEYWORDS)
+    print(f"compiled {len(matcher.keywords)} keywords into {matcher.state_count} states "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def substring_scan(line):
+        text = normalize_text(line)
+        return any(keyword in text for keyword in keywords)
+
+    bench("substring (naive)", substring_scan, lines)
+    bench("aho-corasick exact", KeywordMatcher(IMMIGRATION_BIAS_KEYWORDS, fuzzy=False).matches, lines)
+    bench("aho-corasick fuzzy", matcher.matches, lines)
+    bench("aho-corasick scan", matcher.scan, lines)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""End-to-end throughput benchmark against the local mock audit API
+
+Run with `python src/tools/bench_pipeline.py --jobs 200 --mode all`. Starts
+tools/mock_iflytek.py in-process, points IflytekAPI at it and drives the
+sync (one analyze_audio per worker), batch (analyze_batch with the poll
+scheduler) and async (AsyncIflytekAPI) paths. Reports jobs/sec, end-to-end
+latency percentiles, requests per job and memory; with --baseline the run
+fails if throughput drops or latency grows beyond --tolerance, so it can
+guard CI without network access.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.iflytek_api import IflytekAPI  # noqa: E402
+from api.poll_policy import AdaptivePollPolicy  # noqa: E402
+from api.poll_scheduler import PollScheduler  # noqa: E402
+from api.rate_limiter import AdaptiveRateLimiter  # noqa: E402
+from config import setup_logging  # noqa: E402
+from tools.mock_iflytek import MockIflytekServer, parse_errors  # noqa: E402
+from utils.metrics import metrics  # noqa: E402
+
+MODES = ("sync", "batch", "async")
+BENCH_SECRET = "bench-secret"
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, where the platform reports it"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux以KB为单位，macOS以字节为单位
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def make_api(mock, args):
+    """IflytekAPI pointed at the mock with timings scaled down for a benchmark"""
+    api_config = {
+        "app_id": "bench", "api_key": "bench-key", "api_secret": BENCH_SECRET,
+        "api_base_url": mock.base_url
+    }
+    if args.shards > 1:
+        # mock只校验api_secret，各分片使用不同的app_id/api_key
+        api_config["credentials"] = [
+            {"name": f"bench{index}", "app_id": f"bench{index}", "api_key": f"bench-key-{index}",
+             "api_secret": BENCH_SECRET}
+            for index in range(args.shards)
+        ]
+    api = IflytekAPI(api_config)
+    api.retry_delay = 0.05
+    api.http.pool_size = max(api.http.pool_size, args.workers * 4)
+    api.max_wait_time = 600
+    api.poll_policy = AdaptivePollPolicy(initial_interval=args.poll_interval, min_interval=args.poll_interval / 4,
+                                         max_interval=args.poll_interval * 8)
+    # 每个分片使用独立的限流器，避免进程内共享的预算影响测量
+    for shard in api.shards.shards:
+        shard.submit_limiter = AdaptiveRateLimiter(f'bench_submit:{shard.name}', rate=args.rate, burst=args.rate)
+        shard.query_limiter = AdaptiveRateLimiter(f'bench_query:{shard.name}', rate=args.rate, burst=args.rate)
+    api.submit_limiter = api.shards.shards[0].submit_limiter
+    api.query_limiter = api.shards.shards[0].query_limiter
+    if not args.prescreen:
+        api.keyword_matcher = None
+    if args.callbacks:
+        from api.callback_server import CallbackReceiver
+        # mock在任务完成时推送到notify_url，轮询只作为兜底
+        api.callback_receiver = CallbackReceiver().start()
+        api.callback_poll_interval = args.poll_interval * 50
+    return api
+
+
+def run_sync(api, urls, args):
+    latencies = []
+
+    def analyze(url):
+        start = time.perf_counter()
+        result = api.analyze_audio(url)
+        result.get("violations")
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        results = list(executor.map(analyze, urls))
+    return results, latencies
+
+
+def run_batch(api, urls, args):
+    api.poll_scheduler = PollScheduler(api)
+    try:
+        results = api.analyze_batch(urls, batch_size=args.batch_size)
+        for result in results.values():
+            result.get("violations")
+    finally:
+        api.poll_scheduler.stop()
+        api.poll_scheduler = None
+    # analyze_batch只在全部完成后返回，单个文件的延迟改用mock记录的交付时间
+    return list(results.values()), None
+
+
+def run_async(api, urls, args):
+    from api.async_iflytek_api import AsyncIflytekAPI
+    latencies = []
+
+    async def main():
+        async with AsyncIflytekAPI(api, max_concurrency=args.workers * 4) as client:
+            async def analyze(url):
+                start = time.perf_counter()
+                result = await client.analyze_audio(url)
+                result.get("violations")
+                latencies.append(time.perf_counter() - start)
+                return result
+            return await asyncio.gather(*(analyze(url) for url in urls), return_exceptions=True)
+
+    return asyncio.run(main()), latencies
+
+
+RUNNERS = {"sync": run_sync, "batch": run_batch, "async": run_async}
+
+
+def bench_mode(mode, args):
+    mock = MockIflytekServer(
+        latency=args.latency, latency_jitter=args.latency / 2, pending_seconds=args.pending_seconds,
+        review_seconds=args.review_seconds, errors=parse_errors(args.error), violations=args.violations,
+        content_chars=args.content_chars, secret=BENCH_SECRET, seed=0
+    ).start()
+    api = make_api(mock, args)
+    metrics.reset()
+    urls = [f"https://media.invalid/bench/{mode}-{index:06d}.mp3" for index in range(args.jobs)]
+    gc.collect()
+    if args.tracemalloc:
+        tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        results, latencies = RUNNERS[mode](api, urls, args)
+        elapsed = time.perf_counter() - start
+        heap_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024) if args.tracemalloc else None
+    finally:
+        if args.tracemalloc:
+            tracemalloc.stop()
+        if api.callback_receiver is not None:
+            api.callback_receiver.stop()
+        api.close()
+        mock.stop()
+
+    stats = mock.stats()
+    if not latencies:
+        latencies = stats["delivered"]
+    errors = sum(1 for result in results if isinstance(result, Exception) or result.get("status") != "success")
+    http_seconds = metrics.snapshot()["histograms"].get("http_request_seconds", {})
+    return {
+        "mode": mode,
+        "jobs": args.jobs,
+        "errors": errors,
+        "seconds": elapsed,
+        "jobs_per_sec": args.jobs / elapsed,
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p95": percentile(latencies, 0.95),
+        "latency_p99": percentile(latencies, 0.99),
+        "submit_requests": stats["submit_requests"],
+        "query_requests": stats["query_requests"],
+        "requests_per_job": (stats["submit_requests"] + stats["query_requests"]) / args.jobs,
+        "http_p95": max((summary["p95"] for summary in http_seconds.values()), default=0.0),
+        "peak_rss_mb": peak_rss_mb(),
+        "heap_peak_mb": heap_peak
+    }
+
+
+def print_report(report):
+    memory = f"rss={report['peak_rss_mb']:.0f}MB" if report['peak_rss_mb'] is not None else ""
+    if report['heap_peak_mb'] is not None:
+        memory += f" heap={report['heap_peak_mb']:.1f}MB"
+    print(f"{report['mode']:<6} {report['jobs_per_sec']:>8.1f} jobs/s  "
+          f"latency p50={report['latency_p50']:.2f}s p95={report['latency_p95']:.2f}s p99={report['latency_p99']:.2f}s  "
+          f"requests/job={report['requests_per_job']:.2f}  errors={report['errors']}  {memory}")
+
+
+def check_baseline(reports, baseline_path, tolerance):
+    """Regression messages for reports that are worse than the baseline by more than tolerance"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {report['mode']: report for report in json.load(f)}
+    failures = []
+    for report in reports:
+        base = baseline.get(report['mode'])
+        if base is None:
+            continue
+        if report['jobs_per_sec'] < base['jobs_per_sec'] * (1 - tolerance):
+            failures.append(f"{report['mode']}: jobs/sec {report['jobs_per_sec']:.1f} < baseline {base['jobs_per_sec']:.1f}")
+        if report['latency_p95'] > base['latency_p95'] * (1 + tolerance):
+            failures.append(f"{report['mode']}: p95 latency {report['latency_p95']:.2f}s > baseline {base['latency_p95']:.2f}s")
+        if report['requests_per_job'] > base['requests_per_job'] * (1 + tolerance):
+            failures.append(f"{report['mode']}: requests/job {report['requests_per_job']:.2f} > "
+                            f"baseline {base['requests_per_job']:.2f}")
+        if report['errors'] > base['errors']:
+            failures.append(f"{report['mode']}: {report['errors']} errors > baseline {base['errors']}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark IflytekAPI against a local mock audit API")
+    parser.add_argument('--mode', choices=MODES + ("all",), default="all")
+    parser.add_argument('--jobs', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=16, help="threads for sync mode; async uses 4x as concurrency")
+    parser.add_argument('--batch-size', type=int, default=10, help="files per audio_list in batch mode")
+    parser.add_argument('--latency', type=float, default=0.005, help="mock response latency in seconds")
+    parser.add_argument('--pending-seconds', type=float, default=0.2)
+    parser.add_argument('--review-seconds', type=float, default=0.5)
+    parser.add_argument('--poll-interval', type=float, default=0.1, help="client poll interval before it has history")
+    parser.add_argument('--rate', type=float, default=1000.0, help="client-side requests/sec per endpoint and shard")
+    parser.add_argument('--callbacks', action='store_true', help="complete jobs from mock notify_url pushes")
+    parser.add_argument('--shards', type=int, default=1, help="credential shards to spread submissions over")
+    parser.add_argument('--error', action='append', metavar='CODE:RATE', help="inject mock error codes, e.g. 100002:0.05")
+    parser.add_argument('--violations', type=int, default=2, help="flagged segments per file")
+    parser.add_argument('--content-chars', type=int, default=120)
+    parser.add_argument('--prescreen', action='store_true', help="keep the local keyword pre-screen enabled")
+    parser.add_argument('--tracemalloc', action='store_true', help="also report peak Python heap (slower)")
+    parser.add_argument('--json', metavar='FILE', help="write the reports as JSON (usable as --baseline)")
+    parser.add_argument('--baseline', metavar='FILE', help="fail if worse than this JSON report")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed regression vs baseline (default: 0.2)")
+    parser.add_argument('--log-level', default='ERROR', help="logging level (default: ERROR)")
+    args = parser.parse_args(argv)
+    setup_logging(args.log_level.upper())
+
+    modes = MODES if args.mode == "all" else (args.mode,)
+    reports = []
+    for mode in modes:
+        if mode == "async":
+            try:
+                import aiohttp  # noqa: F401
+            except ImportError:
+                print("async  skipped (aiohttp not installed)")
+                continue
+        report = bench_mode(mode, args)
+        print_report(report)
+        reports.append(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+    if args.baseline:
+        failures = check_baseline(reports, args.baseline, args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Micro-benchmark for request signing
+
+Run with `python src/tools/bench_signature.py --count 100000`. Compares the
+original per-call generate_signature with Signer.sign() used by
+IflytekAPI, after checking that both produce the same signature for the
+same utc and uuid.
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import os
+import random
+import string
+import sys
+import time
+import urllib.parse
+from datetime import datetime, timezone, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.signer import Signer  # noqa: E402
+
+CONFIG = {"app_id": "bench-app", "api_key": "bench-key", "api_secret": "bench-secret"}
+
+
+def legacy_signature(api_config, utc=None, nonce=None):
+    """generate_signature as it was before Signer, for comparison"""
+    tz = timezone(timedelta())
+    fmt = '%Y-%m-%dT%H:%M:%S%z'
+    zoned_time = datetime.today().astimezone(tz)
+    zoned_time = str(zoned_time.strftime(fmt))
+    data_dict = {
+        "appId": api_config['app_id'],
+        "accessKeyId": api_config['api_key'],
+        "accessKeySecret": api_config['api_secret'],
+        "utc": utc or zoned_time,
+        "uuid": nonce or ''.join(random.sample(string.ascii_letters + string.digits, 32))
+    }
+    params_list = sorted(data_dict.items(), key=lambda e: e[0], reverse=False)
+    params_str_dict = dict(params_list)
+    params_str_urlencode = urllib.parse.urlencode(params_str_dict)
+    base_string = hmac.new(
+        api_config['api_secret'].encode('utf-8'),
+        params_str_urlencode.encode('utf-8'),
+        hashlib.sha1
+    ).digest()
+    params_str_dict["signature"] = base64.b64encode(base_string).decode('utf-8')
+    return params_str_dict
+
+
+def check_equivalence(signer):
+    utc = datetime.today().astimezone(timezone(timedelta())).strftime('%Y-%m-%dT%H:%M:%S%z')
+    for nonce in ("a" * 32, ''.join(random.sample(string.ascii_letters + string.digits, 32))):
+        expected = legacy_signature(CONFIG, utc, nonce)
+        actual = signer.sign(utc, nonce)
+        if list(actual.items()) != list(expected.items()):
+            raise SystemExit(f"Signature mismatch:\n  legacy {expected}\n  signer {actual}")
+    # 自动生成的utc格式也必须与原实现一致
+    if signer.sign()["utc"][:16] != legacy_signature(CONFIG)["utc"][:16]:
+        raise SystemExit("utc format differs from the original implementation")
+    print("signatures identical to the original implementation")
+
+
+def bench(label, func, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed
+    print(f"{label:<24} {rate:>12,.0f} signatures/sec  ({elapsed * 1e6 / count:.2f} us each)")
+    return rate
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark request signing")
+    parser.add_argument('--count', type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    signer = Signer(CONFIG['app_id'], CONFIG['api_key'], CONFIG['api_secret'])
+    check_equivalence(signer)
+    before = bench("original", lambda: legacy_signature(CONFIG), args.count)
+    after = bench("Signer.sign", signer.sign, args.count)
+    print(f"speed-up: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
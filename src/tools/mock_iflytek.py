@@ -0,0 +1,336 @@
+"""Local stand-in for the iFlytek audit and query endpoints
+
+Run with `python src/tools/mock_iflytek.py --port 9100` and set
+"api_base_url": "http://127.0.0.1:9100" in api_config.json, or start it
+in-process with MockIflytekServer(...).start(). Jobs move through
+audit_status 0 -> 1 -> 2 on a timer (or a fixed per-query sequence), and
+throttling codes such as 100002 can be injected at a given rate. When a
+submission carries a notify_url, the finished status is POSTed there, so
+callback mode can be exercised offline.
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import random
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+SUBMIT_PATH = '/audit/v2/audio'
+QUERY_PATH = '/audit/v2/query'
+CATEGORIES = ("political", "abuse", "sensitive", "immigration_bias")
+FILLER = ("they said people should go back to your country and stop taking our jobs "
+          "the council meeting discussed housing budget and local families").split()
+
+
+class MockJob:
+    """One submitted audio_list and the timeline of its audit"""
+
+    def __init__(self, request_id, audio_list, pending_seconds, review_seconds, failed):
+        self.request_id = request_id
+        self.names = [item.get('name') for item in audio_list]
+        self.created = time.monotonic()
+        self.pending_seconds = pending_seconds
+        self.review_seconds = review_seconds
+        self.failed = failed
+        self.queries = 0
+        self.delivered = None  # 首次返回最终状态时距提交的秒数
+        self.result_list = None
+
+
+class MockIflytekHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server.mock
+        url = urllib.parse.urlsplit(self.path)
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        params = dict(urllib.parse.parse_qsl(url.query))
+        server.simulate_latency()
+
+        if url.path not in (SUBMIT_PATH, QUERY_PATH):
+            self._send_json(404, {"code": "404", "desc": "not found"})
+            return
+        status, payload = server.handle(url.path, params, json.loads(body or b'{}'))
+        self._send_json(status, payload)
+
+    def log_message(self, format, *args):
+        logger.debug(f"Mock iFlytek: {format % args}")
+
+
+class MockIflytekServer:
+    """Threaded HTTP server imitating /audit/v2/audio and /audit/v2/query
+
+    pending_seconds/review_seconds set how long a job stays in audit_status
+    0 and 1 (each scaled by a random factor within `jitter`); `sequence`
+    instead returns the given statuses on successive queries. `errors` maps
+    a response code (e.g. "100002") to the probability of returning it on
+    any request, `http_429_rate` does the same for HTTP 429. `violations`,
+    `content_chars` and `words` control the size of each result_list entry.
+    When `secret` is set, request signatures are verified. With `notify`,
+    jobs submitted with a notify_url get a push of {request_id, audit_status}
+    (no results, like a bare completion notice) once they finish on the timer.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, latency_jitter=0.0,
+                 pending_seconds=0.5, review_seconds=1.0, jitter=0.2, sequence=None,
+                 errors=None, http_429_rate=0.0, fail_rate=0.0, violations=2,
+                 content_chars=120, words=3, secret=None, seed=None, notify=True):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.pending_seconds = pending_seconds
+        self.review_seconds = review_seconds
+        self.jitter = jitter
+        self.sequence = list(sequence) if sequence else None
+        self.errors = dict(errors or {})
+        self.http_429_rate = http_429_rate
+        self.fail_rate = fail_rate  # 以audit_status=4结束的任务比例
+        self.violations = violations
+        self.content_chars = content_chars
+        self.words = words
+        self.secret = secret
+        self.notify = notify
+        self.random = random.Random(seed)
+        self.jobs = {}  # request_id -> MockJob
+        self.requests = Counter()  # (path, code) -> 次数
+        self.callbacks = Counter()  # 回调推送结果(sent/failed) -> 次数
+        self._timers = set()
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), MockIflytekHandler)
+        self.server.daemon_threads = True
+        self.server.mock = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._lock:
+            timers = list(self._timers)
+            self._timers.clear()
+        for timer in timers:
+            timer.cancel()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def simulate_latency(self):
+        delay = self.latency + (self.random.uniform(0, self.latency_jitter) if self.latency_jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def handle(self, path, params, request):
+        """(HTTP status, JSON body) for one request"""
+        code, payload = self._respond(path, params, request)
+        with self._lock:
+            self.requests[(path, code)] += 1
+        if code == "429":
+            return 429, {"code": "429", "desc": "too many requests"}
+        return 200, payload
+
+    def _respond(self, path, params, request):
+        sid = uuid.uuid4().hex
+        with self._lock:
+            roll = self.random.random()
+        if roll < self.http_429_rate:
+            return "429", None
+        threshold = self.http_429_rate
+        for code, rate in self.errors.items():
+            threshold += rate
+            if roll < threshold:
+                return code, {"code": code, "desc": "injected error", "sid": sid}
+        if self.secret is not None and not self.verify_signature(params):
+            return "100003", {"code": "100003", "desc": "signature verification failed", "sid": sid}
+
+        if path == SUBMIT_PATH:
+            audio_list = request.get('audio_list') or []
+            if not audio_list:
+                return "100001", {"code": "100001", "desc": "audio_list is empty", "sid": sid}
+            request_id = self.submit(audio_list, request.get('notify_url'))
+            return "000000", {"code": "000000", "desc": "success", "sid": sid, "data": {"request_id": request_id}}
+
+        with self._lock:
+            job = self.jobs.get(request.get('request_id'))
+        if job is None:
+            return "100001", {"code": "100001", "desc": "unknown request_id", "sid": sid}
+        return "000000", {"code": "000000", "desc": "success", "sid": sid, "data": self.query(job)}
+
+    def verify_signature(self, params):
+        signature = params.pop('signature', None)
+        if not signature:
+            return False
+        base_string = urllib.parse.urlencode(dict(sorted(params.items())))
+        expected = base64.b64encode(
+            hmac.new(self.secret.encode('utf-8'), base_string.encode('utf-8'), hashlib.sha1).digest()
+        ).decode('utf-8')
+        return hmac.compare_digest(signature, expected)
+
+    def submit(self, audio_list, notify_url=None):
+        request_id = uuid.uuid4().hex
+        with self._lock:
+            scale = self.random.uniform(1 - self.jitter, 1 + self.jitter)
+            failed = self.random.random() < self.fail_rate
+            job = MockJob(request_id, audio_list, self.pending_seconds * scale, self.review_seconds * scale, failed)
+            self.jobs[request_id] = job
+            # 按查询次数推进状态的sequence模式没有完成时刻，不推送
+            if self.notify and notify_url and not self.sequence:
+                timer = threading.Timer(job.pending_seconds + job.review_seconds, self._push_callback,
+                                        (job, notify_url))
+                timer.daemon = True
+                self._timers.add(timer)
+                timer.start()
+        return request_id
+
+    def _push_callback(self, job, notify_url):
+        with self._lock:
+            self._timers.discard(threading.current_thread())
+        payload = json.dumps({"request_id": job.request_id, "audit_status": self.audit_status(job)}).encode('utf-8')
+        request = urllib.request.Request(notify_url, data=payload, method='POST',
+                                         headers={'Content-Type': 'application/json;charset=UTF-8'})
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                response.read()
+            outcome = "sent"
+        except OSError as e:
+            logger.warning(f"Mock callback to {notify_url} failed: {str(e)}")
+            outcome = "failed"
+        with self._lock:
+            self.callbacks[outcome] += 1
+
+    def audit_status(self, job):
+        if self.sequence:
+            status = self.sequence[min(job.queries, len(self.sequence)) - 1]
+        else:
+            elapsed = time.monotonic() - job.created
+            if elapsed < job.pending_seconds:
+                status = 0
+            elif elapsed < job.pending_seconds + job.review_seconds:
+                status = 1
+            else:
+                status = 2
+        if status == 2 and job.failed:
+            status = 4
+        return status
+
+    def query(self, job):
+        with self._lock:
+            job.queries += 1
+        status = self.audit_status(job)
+        data = {"request_id": job.request_id, "audit_status": status}
+        if status == 4:
+            data["message"] = "injected audit failure"
+        if status in (2, 4):
+            with self._lock:
+                if job.delivered is None:
+                    job.delivered = time.monotonic() - job.created
+        if status == 2:
+            if job.result_list is None:
+                job.result_list = [self.build_result(name) for name in job.names]
+            data["result_list"] = job.result_list
+        return data
+
+    def build_result(self, name):
+        """One result_list entry with `violations` flagged segments"""
+        rng = random.Random(f"{name}:{self.violations}")
+        audios = []
+        for index in range(self.violations):
+            content = ' '.join(rng.choice(FILLER) for _ in range(max(1, self.content_chars // 6)))[:self.content_chars]
+            suggest = rng.choice(("block", "review"))
+            audios.append({
+                "content": content,
+                "offsetTime": index * 30.0,
+                "duration": 5.0,
+                "audio_url": f"https://mock.invalid/{name}/{index}.mp3",
+                "suggest": suggest,
+                "category_list": [{
+                    "category_description": rng.choice(CATEGORIES),
+                    "suggest": suggest,
+                    "word_list": [rng.choice(FILLER) for _ in range(self.words)]
+                }]
+            })
+        suggest = "block" if any(audio["suggest"] == "block" for audio in audios) else (
+            "review" if audios else "pass")
+        return {"name": name, "suggest": suggest, "detail": {"audios": audios}}
+
+    def stats(self):
+        """Request counts per endpoint and code, queries per job and delivery latency"""
+        with self._lock:
+            jobs = list(self.jobs.values())
+            requests = dict(self.requests)
+        by_endpoint = Counter()
+        for (path, _), count in requests.items():
+            by_endpoint[path] += count
+        return {
+            "requests": {f"{path} {code}": count for (path, code), count in sorted(requests.items())},
+            "submit_requests": by_endpoint[SUBMIT_PATH],
+            "query_requests": by_endpoint[QUERY_PATH],
+            "jobs": len(jobs),
+            "files": sum(len(job.names) for job in jobs),
+            "callbacks": dict(self.callbacks),
+            "delivered": sorted(job.delivered for job in jobs if job.delivered is not None)
+        }
+
+
+def parse_errors(values):
+    """["100002:0.05", ...] -> {"100002": 0.05}"""
+    errors = {}
+    for value in values or ():
+        code, _, rate = value.partition(':')
+        errors[code] = float(rate or 0.05)
+    return errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the iFlytek audit API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument('--pending-seconds', type=float, default=0.5, help="time spent in audit_status 0")
+    parser.add_argument('--review-seconds', type=float, default=1.0, help="time spent in audit_status 1")
+    parser.add_argument('--sequence', help="comma-separated audit_status per query instead of timers, e.g. 0,1,1,2")
+    parser.add_argument('--error', action='append', metavar='CODE:RATE',
+                        help="inject a response code at the given rate, e.g. 100002:0.05 (repeatable)")
+    parser.add_argument('--http-429-rate', type=float, default=0.0)
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="fraction of jobs ending in audit_status 4")
+    parser.add_argument('--violations', type=int, default=2, help="flagged segments per file")
+    parser.add_argument('--content-chars', type=int, default=120, help="characters of content per segment")
+    parser.add_argument('--secret', help="verify request signatures with this api_secret")
+    parser.add_argument('--no-notify', action='store_true', help="do not POST completions to notify_url")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    mock = MockIflytekServer(
+        args.host, args.port, args.latency, args.latency_jitter, args.pending_seconds, args.review_seconds,
+        sequence=[int(status) for status in args.sequence.split(',')] if args.sequence else None,
+        errors=parse_errors(args.error), http_429_rate=args.http_429_rate, fail_rate=args.fail_rate,
+        violations=args.violations, content_chars=args.content_chars, secret=args.secret,
+        notify=not args.no_notify
+    )
+    print(f"Mock iFlytek API listening on {mock.base_url}")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        mock.stop()
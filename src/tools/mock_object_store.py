@@ -0,0 +1,178 @@
+"""Local stand-in for the multipart object store used by ChunkedUploader
+
+Run with `python src/tools/mock_object_store.py --port 9000` and set
+"upload_url": "http://127.0.0.1:9000" in api_config.json, or start it
+in-process with MockObjectStore(...).start().
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import shutil
+import tempfile
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+class ObjectStoreHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def do_POST(self):
+        store = self.server.store
+        parts = self.path.strip('/').split('/')
+        body = self._read_body()
+        if parts == ['uploads']:
+            request = json.loads(body or b'{}')
+            self._send_json(200, {"upload_id": store.initiate(request.get('name', 'audio'))})
+        elif len(parts) == 3 and parts[0] == 'uploads' and parts[2] == 'complete':
+            try:
+                url = store.complete(parts[1], json.loads(body)['parts'], self.server.base_url)
+            except KeyError:
+                self._send_json(404, {"error": "unknown upload"})
+                return
+            self._send_json(200, {"url": url})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_PUT(self):
+        store = self.server.store
+        parts = self.path.strip('/').split('/')
+        body = self._read_body()
+        if len(parts) != 4 or parts[0] != 'uploads' or parts[2] != 'parts':
+            self._send_json(404, {"error": "not found"})
+            return
+        if random.random() < store.fail_rate:
+            self._send_json(503, {"error": "injected failure"})
+            return
+        try:
+            etag = store.put_part(parts[1], int(parts[3]), body)
+        except KeyError:
+            self._send_json(404, {"error": "unknown upload"})
+            return
+        self._send_json(200, {"etag": etag})
+
+    def do_HEAD(self):
+        self._serve_file(head=True)
+
+    def do_GET(self):
+        self._serve_file(head=False)
+
+    def _serve_file(self, head):
+        path = self.server.store.file_path(self.path)
+        if path is None:
+            self._send_json(404, {"error": "not found"})
+            return
+        size = os.path.getsize(path)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(size))
+        self.send_header('ETag', f'"{self.server.store.etags[path]}"')
+        self.end_headers()
+        if not head:
+            with open(path, 'rb') as f:
+                shutil.copyfileobj(f, self.wfile)
+
+    def log_message(self, format, *args):
+        logger.debug(f"Object store: {format % args}")
+
+
+class MockObjectStore:
+    """Multipart upload server that keeps parts and assembled files in a directory"""
+
+    def __init__(self, host='127.0.0.1', port=0, root=None, fail_rate=0.0):
+        self.root = root or tempfile.mkdtemp(prefix='mock_object_store_')
+        self.fail_rate = fail_rate  # 随机让分片上传失败的比例，用于测试重试
+        self.uploads = {}  # upload_id -> {"name", "parts": {n: path}}
+        self.etags = {}    # 已合并文件路径 -> md5
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), ObjectStoreHandler)
+        self.server.daemon_threads = True
+        self.server.store = self
+        self.server.base_url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return self.server.base_url
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def initiate(self, name):
+        upload_id = uuid.uuid4().hex
+        os.makedirs(os.path.join(self.root, upload_id))
+        with self._lock:
+            self.uploads[upload_id] = {"name": os.path.basename(name), "parts": {}}
+        return upload_id
+
+    def put_part(self, upload_id, part_number, body):
+        with self._lock:
+            upload = self.uploads[upload_id]
+        path = os.path.join(self.root, upload_id, f"part_{part_number:06d}")
+        with open(path, 'wb') as f:
+            f.write(body)
+        with self._lock:
+            upload['parts'][part_number] = path
+        return hashlib.md5(body).hexdigest()
+
+    def complete(self, upload_id, parts, base_url):
+        with self._lock:
+            upload = self.uploads.pop(upload_id)
+        target = os.path.join(self.root, upload_id, upload['name'])
+        digest = hashlib.md5()
+        with open(target, 'wb') as out:
+            for part in sorted(parts, key=lambda p: p['part_number']):
+                with open(upload['parts'][part['part_number']], 'rb') as f:
+                    data = f.read()
+                digest.update(data)
+                out.write(data)
+                os.remove(upload['parts'][part['part_number']])
+        with self._lock:
+            self.etags[target] = digest.hexdigest()
+        return f"{base_url}/files/{upload_id}/{upload['name']}"
+
+    def file_path(self, request_path):
+        parts = request_path.split('?')[0].strip('/').split('/')
+        if len(parts) != 3 or parts[0] != 'files':
+            return None
+        path = os.path.join(self.root, parts[1], os.path.basename(parts[2]))
+        return path if path in self.etags else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in object store for chunked uploads")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--root', help="storage directory (default: a temp dir)")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="fraction of part uploads to fail")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    store = MockObjectStore(args.host, args.port, args.root, args.fail_rate)
+    print(f"Mock object store listening on {store.base_url}")
+    try:
+        store.server.serve_forever()
+    except KeyboardInterrupt:
+        store.stop()
@@ -1,31 +1,135 @@
 import os
 import logging
-import tempfile
-import shutil
-import time
+import mmap
 
 logger = logging.getLogger(__name__)
 
+CHUNK_SIZE = 1024 * 1024  # 流式读取的块大小
+SNIFF_SIZE = 64 * 1024  # 格式检测时映射的最大字节数
+
+# MPEG Layer III 码率表(kbps)，索引为帧头中的bitrate字段
+MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0],
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0]
+}
+MP3_SAMPLE_RATES = {
+    1: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    2.5: [11025, 12000, 8000]
+}
+
+
+def parse_mp3_frame_header(header):
+    """Parse a 4-byte MPEG Layer III frame header
+
+    Returns (frame_length, samples_per_frame, sample_rate), or None if the
+    bytes are not a valid frame header.
+    """
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+    version_bits = (header[1] >> 3) & 0x03
+    layer_bits = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+    if version_bits == 1 or layer_bits != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    version = {0: 2.5, 2: 2, 3: 1}[version_bits]
+    bitrate = MP3_BITRATES[1 if version == 1 else 2][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][sample_rate_index]
+    if version == 1:
+        return 144 * bitrate // sample_rate + padding, 1152, sample_rate
+    return 72 * bitrate // sample_rate + padding, 576, sample_rate
+
+
+def id3v2_size(data):
+    """Total size of a leading ID3v2 tag, or 0 if there is none"""
+    if len(data) < 10 or data[:3] != b'ID3':
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def find_mp3_frame(data, start=0):
+    """Offset of the first MP3 frame at or after start that is followed by another valid frame"""
+    offset = data.find(b'\xff', start)
+    while 0 <= offset <= len(data) - 4:
+        parsed = parse_mp3_frame_header(data[offset:offset + 4])
+        if parsed:
+            next_offset = offset + parsed[0]
+            # 连续两帧有效才认为找到了真正的帧同步
+            if next_offset + 4 > len(data) or parse_mp3_frame_header(data[next_offset:next_offset + 4]):
+                return offset
+        offset = data.find(b'\xff', offset + 1)
+    return -1
+
+
+def sniff_audio_format(file_path):
+    """Detect mp3/wav/aac from the file header without reading the whole file
+
+    The first SNIFF_SIZE bytes are memory-mapped in place; returns None for
+    unrecognized content.
+    """
+    size = os.path.getsize(file_path)
+    if size == 0:
+        return None
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            head = mapped[:SNIFF_SIZE]
+            if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+                return 'wav'
+            tag_size = id3v2_size(head)
+            if tag_size:
+                # ID3标签可能很大，直接在映射中跳过
+                head = mapped[tag_size:tag_size + SNIFF_SIZE]
+            if len(head) >= 2 and head[0] == 0xFF and (head[1] & 0xF6) == 0xF0:
+                return 'aac'  # ADTS
+            if find_mp3_frame(head) >= 0:
+                return 'mp3'
+    return None
+
+
+def iter_file_chunks(file_path, chunk_size=CHUNK_SIZE, offset=0, length=None):
+    """Yield a file (or a byte range of it) in chunks without loading it into memory"""
+    remaining = length
+    with open(file_path, 'rb') as f:
+        f.seek(offset)
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            chunk = f.read(size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
 def process_mp3(input_file):
-    """Process MP3 file"""
+    """Process MP3 file
+
+    The file is validated in place and its own path is returned; no copy is
+    made, so callers must not delete the returned path when it equals the
+    input.
+    """
     try:
         # Validate file format
         if not input_file.lower().endswith('.mp3'):
             raise Exception("Only MP3 format is supported")
-            
-        # Create temporary file
-        temp_dir = tempfile.gettempdir()
-        temp_file = os.path.join(temp_dir, f"temp_audio_{int(time.time())}.mp3")
-        
-        # Copy file to temporary directory
-        shutil.copy2(input_file, temp_file)
-        
+
         # Validate file
-        if os.path.exists(temp_file) and os.path.getsize(temp_file) > 0:
-            return temp_file
-        else:
+        if not os.path.exists(input_file) or os.path.getsize(input_file) == 0:
             raise Exception("File processing failed")
-            
+
+        # 通过帧头检测确认内容确实是MP3
+        if sniff_audio_format(input_file) != 'mp3':
+            raise Exception("File content is not valid MP3 audio")
+
+        return input_file
+
     except Exception as e:
         logger.error(f"MP3 file processing failed: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
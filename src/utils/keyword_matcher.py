@@ -0,0 +1,223 @@
+import logging
+import re
+import unicodedata
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORY = "immigration_bias"
+DEFAULT_WEIGHT = 0.5
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+(?:'[^\W_]+)*")
+# 常见的弯引号、破折号统一成ASCII，保证"don’t"与"don't"一致
+PUNCTUATION_MAP = str.maketrans({'’': "'", '‘': "'", 'ʼ': "'", '`': "'",
+                                 '‐': '-', '‑': '-', '–': '-', '—': '-'})
+
+
+def normalize_text(text):
+    """Case-fold, unify quotes/dashes and strip accents"""
+    text = text.translate(PUNCTUATION_MAP).casefold()
+    if not text.isascii():
+        text = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return text
+
+
+def tokenize(text, normalize=True):
+    return TOKEN_PATTERN.findall(normalize_text(text) if normalize else text)
+
+
+def token_variants(token):
+    """Surface forms treated as the same token when fuzzy matching is on"""
+    variants = {token}
+    if "'" in token:
+        variants.add(token.replace("'", ""))
+    for form in list(variants):
+        if form.endswith('y') and len(form) > 2:
+            variants.add(form[:-1] + 'ies')
+        if form.endswith(('s', 'x', 'z', 'ch', 'sh')):
+            variants.add(form + 'es')
+        else:
+            variants.add(form + 's')
+        if form.endswith('ies') and len(form) > 4:
+            variants.add(form[:-3] + 'y')
+        elif form.endswith('s') and not form.endswith('ss') and len(form) > 3:
+            variants.add(form[:-1])
+    return variants
+
+
+class KeywordMatcher:
+    """Token-level Aho-Corasick automaton over a set of keyword phrases
+
+    The automaton is compiled into a full transition table (failure links
+    folded in), so scanning costs one dict lookup per token regardless of
+    how many phrases are loaded. With fuzzy=True every keyword token also
+    matches its simple plural/singular and apostrophe-less forms.
+
+    `terms` holds plain strings or (phrase, category, weight) tuples.
+    """
+
+    def __init__(self, terms, fuzzy=True, normalize=True):
+        self.fuzzy = fuzzy
+        self.normalize = normalize
+        self.keywords = []  # index -> (phrase, category, weight)
+        seen = set()
+        for term in terms:
+            phrase, category, weight = (term, DEFAULT_CATEGORY, DEFAULT_WEIGHT) if isinstance(term, str) else term
+            tokens = tuple(tokenize(phrase))
+            if tokens and (tokens, category) not in seen:
+                seen.add((tokens, category))
+                self.keywords.append((phrase, category, weight))
+        self._compile()
+
+    def _compile(self):
+        goto = [{}]
+        outputs = [[]]
+        for index, (phrase, _, _) in enumerate(self.keywords):
+            tokens = tokenize(phrase)
+            state = 0
+            for token in tokens:
+                next_state = goto[state].get(token)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][token] = next_state
+                state = next_state
+            outputs[state].append((index, len(tokens)))
+
+        # 按广度优先计算失败指针，并把失败转移折叠进转移表
+        delta = [dict(goto[0])]
+        delta.extend({} for _ in range(len(goto) - 1))
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = dict(delta[fail[state]])
+            for token, next_state in goto[state].items():
+                fail[next_state] = delta[fail[state]].get(token, 0) if state else 0
+                outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+                delta[state][token] = next_state
+                queue.append(next_state)
+
+        if self.fuzzy:
+            # 变体直接作为转移表的键，扫描时无需逐词做词形还原
+            for table in delta:
+                for token, next_state in list(table.items()):
+                    for variant in token_variants(token):
+                        table.setdefault(variant, next_state)
+
+        self._delta = delta
+        self._outputs = outputs
+        self.state_count = len(goto)
+        logger.debug(f"Compiled {len(self.keywords)} keywords into {self.state_count} states")
+
+    def to_state(self):
+        """Compiled tables as plain JSON-compatible data, for from_state()"""
+        return {"fuzzy": self.fuzzy, "normalize": self.normalize, "keywords": self.keywords,
+                "delta": self._delta, "outputs": self._outputs}
+
+    @classmethod
+    def from_state(cls, state):
+        """Matcher from to_state() data without recompiling; ValueError if the tables are malformed"""
+        matcher = cls.__new__(cls)
+        matcher.fuzzy = bool(state["fuzzy"])
+        matcher.normalize = bool(state["normalize"])
+        matcher.keywords = [(str(phrase), str(category), float(weight))
+                            for phrase, category, weight in state["keywords"]]
+        delta = state["delta"]
+        outputs = state["outputs"]
+        # 校验所有状态和关键词下标都在范围内，避免扫描时越界
+        state_count = len(delta)
+        if state_count == 0 or len(outputs) != state_count:
+            raise ValueError("Malformed matcher tables")
+        for table in delta:
+            if not isinstance(table, dict) or not all(
+                    isinstance(token, str) and type(next_state) is int and 0 <= next_state < state_count
+                    for token, next_state in table.items()):
+                raise ValueError("Malformed matcher transition table")
+        matcher._outputs = [[(int(index), int(length)) for index, length in entries] for entries in outputs]
+        if any(not 0 <= index < len(matcher.keywords) for entries in matcher._outputs for index, _ in entries):
+            raise ValueError("Malformed matcher outputs")
+        matcher._delta = delta
+        matcher.state_count = state_count
+        return matcher
+
+    def find(self, text):
+        """Yield (phrase, category, weight, start_token, end_token) for each match"""
+        tokens = tokenize(text, self.normalize)
+        delta = self._delta
+        outputs = self._outputs
+        state = 0
+        for position, token in enumerate(tokens):
+            state = delta[state].get(token, 0)
+            if outputs[state]:
+                for index, length in outputs[state]:
+                    phrase, category, weight = self.keywords[index]
+                    yield phrase, category, weight, position - length + 1, position + 1
+
+    def matches(self, text):
+        """True if text contains any keyword"""
+        return next(self.find(text), None) is not None
+
+    def scan(self, text):
+        """Summary of one text: {category: {"words": {phrase: count}, "score": float}}"""
+        found = {}
+        for phrase, category, weight, _, _ in self.find(text):
+            entry = found.setdefault(category, {"words": {}, "weights": {}})
+            entry["words"][phrase] = entry["words"].get(phrase, 0) + 1
+            entry["weights"][phrase] = weight
+        return {category: {"words": entry["words"], "score": combine_scores(entry["weights"].values())}
+                for category, entry in found.items()}
+
+    def scan_lines(self, lines):
+        """Scan many transcript lines, yielding (line_number, summary) for lines with matches"""
+        for number, line in enumerate(lines):
+            summary = self.scan(line)
+            if summary:
+                yield number, summary
+
+
+def combine_scores(weights):
+    """Each distinct keyword raises the score towards 1.0: 1 - Π(1 - w)"""
+    remaining = 1.0
+    for weight in weights:
+        remaining *= 1.0 - min(max(weight, 0.0), 1.0)
+    return round(1.0 - remaining, 4)
+
+
+def _merge_summary(total, summary):
+    for category, entry in summary.items():
+        merged = total.setdefault(category, {"words": {}, "score": 0.0})
+        for phrase, count in entry["words"].items():
+            merged["words"][phrase] = merged["words"].get(phrase, 0) + count
+        merged["score"] = max(merged["score"], entry["score"])
+
+
+def tag_violations(violations, matcher, transcripts=None):
+    """Run the matcher over violation content; returns (violations, local_bias)
+
+    Each violation whose content matches is replaced by a copy carrying one
+    extra category per matched keyword category (see
+    Violation.with_local_categories). Extra transcript lines can be passed
+    in `transcripts`. local_bias is the merged summary, or None without
+    matches.
+    """
+    total = {}
+    tagged = []
+    for violation in violations:
+        summary = matcher.scan(violation.content or "")
+        if summary:
+            violation = violation.with_local_categories(summary)
+        tagged.append(violation)
+        _merge_summary(total, summary)
+
+    for _, summary in matcher.scan_lines(transcripts or []):
+        _merge_summary(total, summary)
+
+    local_bias = None
+    if total:
+        local_bias = {
+            "score": max(entry["score"] for entry in total.values()),
+            "categories": total
+        }
+    return tagged, local_bias
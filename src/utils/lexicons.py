@@ -0,0 +1,204 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from config import DATA_DIR
+from utils.keyword_matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+LEXICON_EXTENSIONS = ('.txt', '.json')
+SEVERITY_WEIGHTS = {'low': 0.25, 'medium': 0.5, 'high': 0.8, 'critical': 1.0}
+INDEX_VERSION = 2  # 匹配器结构变化时递增，使旧的编译缓存失效
+
+
+class Lexicon:
+    """One term list plus its metadata (category, locale, project, severity)"""
+
+    def __init__(self, name, terms, category=None, locale='en', project='default', severity='medium', source=None):
+        self.name = name
+        self.terms = terms
+        self.category = category or name
+        self.locale = locale
+        self.project = project
+        self.severity = severity
+        self.source = source
+
+    @property
+    def weight(self):
+        return SEVERITY_WEIGHTS.get(self.severity, SEVERITY_WEIGHTS['medium'])
+
+    def entries(self):
+        return [(term, self.category, self.weight) for term in self.terms]
+
+
+def parse_lexicon(path, text, project='default'):
+    """Parse a lexicon file
+
+    .txt files hold one term per line; "# key: value" lines set category,
+    locale, project or severity, other "#" lines are comments. .json files
+    hold {"terms": [...], "category": ..., "locale": ..., ...}.
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    if path.endswith('.json'):
+        data = json.loads(text)
+        meta = {key: data[key] for key in ('category', 'locale', 'project', 'severity') if key in data}
+        terms = [term for term in data.get('terms', []) if isinstance(term, str) and term.strip()]
+    else:
+        meta = {}
+        terms = []
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('#'):
+                key, sep, value = line[1:].partition(':')
+                if sep and key.strip() in ('category', 'locale', 'project', 'severity'):
+                    meta[key.strip()] = value.strip()
+                continue
+            terms.append(line)
+    meta.setdefault('project', project)
+    return Lexicon(name, terms, source=path, **meta)
+
+
+class LexiconRegistry:
+    """Loads lexicon files into one shared KeywordMatcher and hot-swaps it on change
+
+    Every *.txt / *.json file under `directory` (subdirectory names become the
+    default project) is compiled together with the optional `builtin`
+    lexicons. The compiled tables are cached as JSON under
+    DATA_DIR/lexicon_index, keyed by a hash of the lexicon contents, so
+    restarts skip compilation; a cache file that does not parse, carries a
+    different key or has malformed tables is ignored and rebuilt.
+    start() launches a watcher that rebuilds in the background and swaps the
+    `matcher` reference; scans already holding the old matcher finish on it.
+    """
+
+    def __init__(self, directory, builtin=(), locales=None, projects=None, fuzzy=True,
+                 cache_dir=None, check_interval=5.0):
+        self.directory = directory
+        self.builtin = list(builtin)
+        self.locales = set(locales) if locales else None
+        self.projects = set(projects) if projects else None
+        self.fuzzy = fuzzy
+        self.cache_dir = cache_dir or os.path.join(DATA_DIR, 'lexicon_index')
+        self.check_interval = check_interval
+        self.lexicons = []
+        self.index_key = None
+        self._signature = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.matcher = None
+        self.reload()
+
+    def _files(self):
+        files = []
+        if not os.path.isdir(self.directory):
+            return files
+        for root, _, names in os.walk(self.directory):
+            for name in sorted(names):
+                if name.endswith(LEXICON_EXTENSIONS):
+                    files.append(os.path.join(root, name))
+        return sorted(files)
+
+    def _signature_of(self, files):
+        signature = []
+        for path in files:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _load(self, files):
+        lexicons = list(self.builtin)
+        for path in files:
+            relative = os.path.relpath(os.path.dirname(path), self.directory)
+            project = 'default' if relative == '.' else relative.replace(os.sep, '/')
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    lexicons.append(parse_lexicon(path, f.read(), project))
+            except (OSError, ValueError) as e:
+                logger.error(f"Skipping lexicon {path}: {e}")
+        return [lexicon for lexicon in lexicons
+                if (self.locales is None or lexicon.locale in self.locales)
+                and (self.projects is None or lexicon.project in self.projects)]
+
+    def _index_key(self, lexicons):
+        digest = hashlib.sha256(f"v{INDEX_VERSION}:fuzzy={self.fuzzy}".encode('utf-8'))
+        for lexicon in lexicons:
+            for term, category, weight in lexicon.entries():
+                digest.update(f"\0{term}\0{category}\0{weight}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _compile(self, lexicons, index_key):
+        cache_path = os.path.join(self.cache_dir, f"{index_key}.json")
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            # 缓存文件只含数据(不会执行代码)，且必须与当前内容哈希一致
+            if cached.get('index_key') != index_key or cached.get('fuzzy') != self.fuzzy:
+                raise ValueError("index key mismatch")
+            matcher = KeywordMatcher.from_state(cached)
+            logger.debug(f"Loaded compiled lexicon index {index_key[:12]}")
+            return matcher
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unusable lexicon index cache {cache_path}: {e}")
+
+        terms = [entry for lexicon in lexicons for entry in lexicon.entries()]
+        matcher = KeywordMatcher(terms, fuzzy=self.fuzzy)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(dict(matcher.to_state(), index_key=index_key), f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"Could not cache lexicon index: {e}")
+        return matcher
+
+    def reload(self, force=False):
+        """Rebuild the matcher if any lexicon file changed; returns True if it was swapped"""
+        with self._reload_lock:
+            files = self._files()
+            signature = self._signature_of(files)
+            if not force and signature == self._signature:
+                return False
+            lexicons = self._load(files)
+            index_key = self._index_key(lexicons)
+            self._signature = signature
+            if index_key == self.index_key and not force:
+                return False  # 文件被改动但内容未变
+            matcher = self._compile(lexicons, index_key)
+            # 只替换引用，正在扫描的线程继续使用旧的匹配器
+            self.lexicons = lexicons
+            self.index_key = index_key
+            self.matcher = matcher
+        logger.info(f"Lexicon index {index_key[:12]}: {len(lexicons)} lexicons, {len(matcher.keywords)} terms")
+        return True
+
+    def start(self):
+        """Watch the lexicon directory and reload in the background"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="lexicon-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.check_interval + 1)
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error(f"Lexicon reload failed: {e}")
@@ -0,0 +1,280 @@
+import bisect
+import functools
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 指数分桶：1us ~ 约1.2小时，足以覆盖签名耗时到审核排队时间
+DEFAULT_BUCKETS = tuple(0.000001 * 2 ** i for i in range(33))
+COUNT_BUCKETS = tuple(float(2 ** i) for i in range(16))  # 轮询次数等计数型分布
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items())) if labels else ()
+
+
+def _format_labels(key, extra=None):
+    items = list(key) + (list(extra.items()) if extra else [])
+    if not items:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in items)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(items, escaped)) + "}"
+
+
+class Histogram:
+    """Cumulative bucketed histogram with interpolated quantiles"""
+
+    __slots__ = ('bounds', 'counts', 'count', 'total', 'maximum', '_lock')
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.maximum:
+                self.maximum = value
+
+    def quantile(self, q):
+        with self._lock:
+            counts = list(self.counts)
+            count = self.count
+            maximum = self.maximum
+        if count == 0:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else maximum
+                # 桶内线性插值，且不超过实际观测到的最大值
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, maximum)
+            seen += bucket_count
+        return maximum
+
+    def summary(self):
+        result = {"count": self.count, "sum": self.total, "max": self.maximum}
+        for q in QUANTILES:
+            result[f"p{int(q * 100)}"] = self.quantile(q)
+        return result
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """Process-wide counters and histograms for the moderation pipeline
+
+    Metrics are keyed by name plus labels. When disabled every call returns
+    after a single attribute check, so instrumentation can stay in hot paths.
+    Exporters are callables taking the registry; start_exporter() runs one
+    periodically, render_prometheus() gives the text exposition format.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._counters = {}    # (name, label_key) -> value
+        self._histograms = {}  # (name, label_key) -> Histogram
+        self._help = {}
+        self._lock = threading.Lock()
+        self._exporters = []
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def histogram(self, name, buckets=DEFAULT_BUCKETS, **labels):
+        key = (name, _label_key(labels))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(buckets))
+        return histogram
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        if not self.enabled:
+            return
+        self.histogram(name, buckets, **labels).observe(value)
+
+    def timer(self, name, **labels):
+        """Context manager recording elapsed seconds into histogram `name`"""
+        if not self.enabled:
+            return NULL_TIMER
+        return _Timer(self.histogram(name, **labels))
+
+    def timed(self, name, **labels):
+        """Decorator form of timer()"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.histogram(name, **labels).observe(time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """{"counters": {name: {labels: value}}, "histograms": {name: {labels: summary}}}"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = dict(self._histograms)
+        snapshot = {"counters": {}, "histograms": {}}
+        for (name, key), value in sorted(counters.items()):
+            snapshot["counters"].setdefault(name, {})[_format_labels(key)] = value
+        for (name, key), histogram in sorted(histograms.items(), key=lambda item: item[0]):
+            snapshot["histograms"].setdefault(name, {})[_format_labels(key)] = histogram.summary()
+        return snapshot
+
+    def render_prometheus(self):
+        """Prometheus text exposition: counters, histogram buckets and quantile gauges"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+        lines = []
+        typed = set()
+        for (name, key), value in counters:
+            if name not in typed:
+                typed.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_format_labels(key)} {value}")
+        for (name, key), histogram in histograms:
+            if name not in typed:
+                typed.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.bounds, histogram.counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(key, {'le': f'{bound:g}'})} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(key, {'le': '+Inf'})} {histogram.count}")
+            lines.append(f"{name}_sum{_format_labels(key)} {histogram.total}")
+            lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+            for q in QUANTILES:
+                lines.append(f"{name}_p{int(q * 100)}{_format_labels(key)} {histogram.quantile(q)}")
+        return "\n".join(lines) + "\n"
+
+    def format_summary(self):
+        """Short human-readable table of every histogram and counter"""
+        snapshot = self.snapshot()
+        lines = []
+        for name, series in snapshot["histograms"].items():
+            for labels, summary in series.items():
+                lines.append(f"{name}{labels}: n={summary['count']} p50={summary['p50']:.4g} "
+                             f"p95={summary['p95']:.4g} p99={summary['p99']:.4g} max={summary['max']:.4g}")
+        for name, series in snapshot["counters"].items():
+            for labels, value in series.items():
+                lines.append(f"{name}{labels}: {value}")
+        return "\n".join(lines)
+
+    def export(self):
+        for exporter in list(self._exporters):
+            try:
+                exporter(self)
+            except Exception as e:
+                logger.error(f"Metrics export failed: {str(e)}")
+
+    def start_exporter(self, exporter, interval=15.0):
+        """Call exporter(registry) every `interval` seconds on a daemon thread"""
+        self._exporters.append(exporter)
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    exporter(self)
+                except Exception as e:
+                    logger.error(f"Metrics export failed: {str(e)}")
+
+        threading.Thread(target=loop, name="metrics-exporter", daemon=True).start()
+
+
+class TextFileExporter:
+    """Writes the Prometheus text format to a file (e.g. for a node_exporter textfile collector)"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self, registry):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(registry.render_prometheus())
+        os.replace(temp_path, self.path)
+
+
+class LogExporter:
+    """Logs the summary table at INFO level"""
+
+    def __call__(self, registry):
+        logger.info("Metrics:\n" + registry.format_summary())
+
+
+# 全局实例；设置环境变量 UNICC_METRICS=0 可关闭
+metrics = MetricsRegistry(enabled=os.environ.get('UNICC_METRICS', '1') != '0')
+metrics.describe('iflytek_signature_seconds', "Time to build signed request parameters")
+metrics.describe('http_request_seconds', "HTTP round-trip time per endpoint and method")
+metrics.describe('http_requests_total', "HTTP requests per endpoint, method and status code")
+metrics.describe('audit_status_total', "audit_status values seen by queries")
+metrics.describe('audit_transitions_total', "audit_status changes between consecutive queries of one job")
+metrics.describe('audit_queue_seconds', "Time from submission until the vendor starts reviewing")
+metrics.describe('audit_wait_seconds', "Time from submission until the audit is finished")
+metrics.describe('audit_polls_per_job', "Queries issued per finished audit")
+metrics.describe('rate_limit_wait_seconds', "Time callers waited for a rate limiter token")
+metrics.describe('rate_limit_throttled_total', "Throttling responses (HTTP 429 or code 100002) per limiter")
+metrics.describe('result_parse_seconds', "Time to turn a result_list into violations")
+metrics.describe('gui_render_seconds', "Time to render one page of the results table")
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+import requests
+from config import DATA_DIR
+from api.result_model import AnalysisResult, as_dict
+from utils.audio_utils import iter_file_chunks
+
+logger = logging.getLogger(__name__)
+
+
+def hash_file(file_path):
+    """SHA-256 of a file, streamed in chunks so large recordings never sit in memory"""
+    digest = hashlib.sha256()
+    for chunk in iter_file_chunks(file_path):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def normalize_url(url):
+    """Canonical form of a URL: lower-case host, no default port, no fragment, sorted query"""
+    parts = urllib.parse.urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.hostname or ''
+    if parts.port and not ((scheme == 'http' and parts.port == 80) or (scheme == 'https' and parts.port == 443)):
+        netloc = f"{netloc}:{parts.port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+    query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True)))
+    return urllib.parse.urlunsplit((scheme, netloc, parts.path or '/', query, ''))
+
+
+class ResultCache:
+    """SQLite-backed cache of analysis_results, keyed by audio content
+
+    Local files are keyed by their SHA-256; remote files by normalized URL
+    plus ETag (or Content-Length when no ETag is sent). Entries expire after
+    `ttl` seconds and the least recently used ones are evicted beyond
+    `max_entries`.
+    """
+
+    def __init__(self, db_path=None, ttl=7 * 24 * 3600, max_entries=100000, session=None):
+        self.db_path = db_path or os.path.join(DATA_DIR, 'result_cache.sqlite3')
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.session = session or requests
+        self.hits = 0
+        self.misses = 0
+        self.evict_every = 100  # 每写入若干条检查一次容量
+        self._puts = 0
+        self._lock = threading.Lock()
+
+        if self.db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " cache_key TEXT PRIMARY KEY,"
+            " source TEXT,"
+            " result TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_accessed ON results (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_source ON results (source)")
+        self._conn.commit()
+
+    def key_for(self, audio_url):
+        """Cache key for a local path or remote URL, or None if it cannot be identified"""
+        if os.path.isfile(audio_url):
+            return f"sha256:{hash_file(audio_url)}"
+
+        try:
+            response = self.session.head(audio_url, allow_redirects=True, timeout=10)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Cache key lookup failed for {audio_url}: {str(e)}")
+            return None
+        if response.status_code != 200:
+            return None
+
+        validator = response.headers.get('ETag')
+        if validator:
+            validator = f"etag={validator}"
+        elif response.headers.get('Content-Length'):
+            validator = f"length={response.headers['Content-Length']}"
+        else:
+            # 无法确认内容是否变化，不缓存
+            return None
+        return f"url:{normalize_url(audio_url)}|{validator}"
+
+    def get(self, cache_key):
+        """Return the cached analysis_results for cache_key, or None"""
+        if cache_key is None:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created_at FROM results WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE results SET accessed_at = ? WHERE cache_key = ?", (now, cache_key))
+            self._conn.commit()
+            self.hits += 1
+        logger.info(f"Result cache hit: {cache_key}")
+        return AnalysisResult.from_dict(json.loads(row[0]))
+
+    def put(self, cache_key, analysis_results, source=None):
+        """Store analysis_results; only successful analyses are cached"""
+        if cache_key is None or analysis_results.get("status") != "success":
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (cache_key, source, result, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (cache_key, source, json.dumps(as_dict(analysis_results), ensure_ascii=False), now, now)
+            )
+            self._puts += 1
+            if self._puts % self.evict_every == 0:
+                self._evict()
+            self._conn.commit()
+
+    def invalidate(self, cache_key=None, source=None):
+        """Drop one entry by key, or every entry recorded for a source URL/path"""
+        with self._lock:
+            if cache_key is not None:
+                self._conn.execute("DELETE FROM results WHERE cache_key = ?", (cache_key,))
+            if source is not None:
+                self._conn.execute("DELETE FROM results WHERE source = ?", (source,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+
+    def purge_expired(self):
+        """Delete expired entries and return how many were removed"""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM results WHERE created_at < ?", (time.time() - self.ttl,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self):
+        # 超过容量时删除最久未访问的记录
+        self._conn.execute("DELETE FROM results WHERE created_at < ?", (time.time() - self.ttl,))
+        count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM results WHERE cache_key IN ("
+                " SELECT cache_key FROM results ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
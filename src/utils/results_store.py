@@ -0,0 +1,232 @@
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+import numpy as np
+from config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# 每批写出四张表，字符串列以批内字典编码为整数
+FILE_DTYPE = np.dtype([
+    ('timestamp', '<f8'), ('source', '<i4'), ('status', '<i4'), ('suggest', '<i4'),
+    ('violation_start', '<i4'), ('violation_count', '<i4'), ('local_bias', '<f4')
+])
+VIOLATION_DTYPE = np.dtype([
+    ('file', '<i4'), ('offset_time', '<f8'), ('duration', '<f8'), ('suggest', '<i4'),
+    ('category_start', '<i4'), ('category_count', '<i4')
+])
+CATEGORY_DTYPE = np.dtype([
+    ('violation', '<i4'), ('category', '<i4'), ('suggest', '<i4'),
+    ('keyword_start', '<i4'), ('keyword_count', '<i4')
+])
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class _BatchBuilder:
+    """Accumulates rows for one partition until they are flushed"""
+
+    def __init__(self):
+        self.strings = {}
+        self.files = []
+        self.violations = []
+        self.categories = []
+        self.keywords = []
+
+    def code(self, value):
+        if value is None:
+            return -1
+        value = str(value)
+        code = self.strings.get(value)
+        if code is None:
+            code = self.strings[value] = len(self.strings)
+        return code
+
+    def add(self, timestamp, source, analysis_results):
+        file_index = len(self.files)
+        violations = analysis_results.get("violations") or ()
+        local_bias = (analysis_results.get("local_bias") or {}).get("score", np.nan)
+        self.files.append((timestamp, self.code(source), self.code(analysis_results.get("status")),
+                           self.code(analysis_results.get("suggest")), len(self.violations),
+                           len(violations), local_bias))
+        for violation in violations:
+            categories = violation.get("categories") or ()
+            self.violations.append((file_index, _to_float(violation.get("offset_time")),
+                                    _to_float(violation.get("duration")), self.code(violation.get("suggest")),
+                                    len(self.categories), len(categories)))
+            for category in categories:
+                words = category.get("words") or ()
+                self.categories.append((len(self.violations) - 1, self.code(category.get("description")),
+                                        self.code(category.get("suggest")), len(self.keywords), len(words)))
+                self.keywords.extend(self.code(word) for word in words)
+
+    def arrays(self):
+        return {
+            'files': np.array(self.files, dtype=FILE_DTYPE),
+            'violations': np.array(self.violations, dtype=VIOLATION_DTYPE),
+            'categories': np.array(self.categories, dtype=CATEGORY_DTYPE),
+            'keywords': np.array(self.keywords, dtype='<i4')
+        }
+
+
+class ResultBatch:
+    """One flushed batch: memory-mapped tables plus its string dictionary"""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.files = np.load(f"{prefix}.files.npy", mmap_mode='r')
+        self.violations = np.load(f"{prefix}.violations.npy", mmap_mode='r')
+        self.categories = np.load(f"{prefix}.categories.npy", mmap_mode='r')
+        self.keywords = np.load(f"{prefix}.keywords.npy", mmap_mode='r')
+        with open(f"{prefix}.strings.json", 'r', encoding='utf-8') as f:
+            self.strings = json.load(f)
+
+    def decode_counts(self, codes):
+        """Counter of strings for an array of dictionary codes"""
+        codes = np.asarray(codes)
+        codes = codes[codes >= 0]
+        if codes.size == 0:
+            return Counter()
+        counts = np.bincount(codes, minlength=len(self.strings))
+        return Counter({self.strings[code]: int(count) for code, count in enumerate(counts) if count})
+
+
+class ResultsStore:
+    """Append-only columnar store of analysis results, partitioned by day
+
+    Rows are buffered and written in batches (every `batch_size` results or
+    `flush_interval` seconds) as .npy tables under root/day=YYYY-MM-DD/.
+    Strings are dictionary-encoded per batch, so batches from several
+    processes never conflict. Queries memory-map the tables and aggregate
+    with NumPy, without touching any JSON results.
+    """
+
+    def __init__(self, root=None, batch_size=1000, flush_interval=30.0):
+        self.root = root or os.path.join(DATA_DIR, 'results')
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = {}  # day -> _BatchBuilder
+        self._pending_rows = 0
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def append(self, source, analysis_results, timestamp=None):
+        """Buffer one completed analysis; flushes when the batch is full or old enough"""
+        timestamp = time.time() if timestamp is None else timestamp
+        day = datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d')
+        with self._lock:
+            self._pending.setdefault(day, _BatchBuilder()).add(timestamp, source, analysis_results)
+            self._pending_rows += 1
+            due = (self._pending_rows >= self.batch_size
+                   or time.time() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write every buffered row to disk"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._pending_rows = 0
+            self._last_flush = time.time()
+        for day, builder in pending.items():
+            self._write_batch(day, builder)
+
+    def _write_batch(self, day, builder):
+        directory = os.path.join(self.root, f"day={day}")
+        os.makedirs(directory, exist_ok=True)
+        prefix = os.path.join(directory, f"batch-{time.time_ns()}-{os.getpid()}-{threading.get_ident()}")
+        strings = [None] * len(builder.strings)
+        for value, code in builder.strings.items():
+            strings[code] = value
+
+        # files表最后落盘：读取方只认有files表的批次，避免读到写了一半的数据
+        arrays = builder.arrays()
+        with open(f"{prefix}.strings.json", 'w', encoding='utf-8') as f:
+            json.dump(strings, f, ensure_ascii=False)
+        for table in ('violations', 'categories', 'keywords', 'files'):
+            temp_path = f"{prefix}.{table}.tmp.npy"
+            np.save(temp_path, arrays[table])
+            os.replace(temp_path, f"{prefix}.{table}.npy")
+        logger.debug(f"Wrote {len(arrays['files'])} results to {prefix}")
+
+    def close(self):
+        self.flush()
+
+    def days(self):
+        return sorted(os.path.basename(path)[4:] for path in glob.glob(os.path.join(self.root, 'day=*')))
+
+    def batches(self, start_day=None, end_day=None):
+        """Yield ResultBatch objects for days in [start_day, end_day] (YYYY-MM-DD strings)"""
+        for day in self.days():
+            if (start_day and day < start_day) or (end_day and day > end_day):
+                continue
+            for path in sorted(glob.glob(os.path.join(self.root, f"day={day}", 'batch-*.files.npy'))):
+                yield ResultBatch(path[:-len('.files.npy')])
+
+    def count(self, start_day=None, end_day=None):
+        return sum(len(batch.files) for batch in self.batches(start_day, end_day))
+
+    def suggest_counts(self, start_day=None, end_day=None):
+        """Overall verdicts per file: {"pass": n, "review": n, "block": n, ...}"""
+        total = Counter()
+        for batch in self.batches(start_day, end_day):
+            total.update(batch.decode_counts(batch.files['suggest']))
+        return dict(total)
+
+    def category_counts(self, start_day=None, end_day=None):
+        """Number of flagged segments per category description"""
+        total = Counter()
+        for batch in self.batches(start_day, end_day):
+            total.update(batch.decode_counts(batch.categories['category']))
+        return dict(total)
+
+    def keyword_counts(self, start_day=None, end_day=None, top=None):
+        total = Counter()
+        for batch in self.batches(start_day, end_day):
+            total.update(batch.decode_counts(batch.keywords))
+        return dict(total.most_common(top))
+
+    def to_arrow(self, start_day=None, end_day=None):
+        """Violations joined with their file and categories as a pyarrow Table (needs pyarrow)"""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise Exception("pyarrow is required for Arrow/Parquet export")
+
+        columns = {name: [] for name in ('timestamp', 'source', 'file_suggest', 'offset_time', 'duration',
+                                         'suggest', 'category', 'keywords')}
+        for batch in self.batches(start_day, end_day):
+            strings = batch.strings
+
+            def text(code):
+                return strings[code] if code >= 0 else None
+
+            for category in batch.categories:
+                violation = batch.violations[category['violation']]
+                file_row = batch.files[violation['file']]
+                start = category['keyword_start']
+                columns['timestamp'].append(float(file_row['timestamp']))
+                columns['source'].append(text(file_row['source']))
+                columns['file_suggest'].append(text(file_row['suggest']))
+                columns['offset_time'].append(float(violation['offset_time']))
+                columns['duration'].append(float(violation['duration']))
+                columns['suggest'].append(text(violation['suggest']))
+                columns['category'].append(text(category['category']))
+                columns['keywords'].append([text(code) for code in batch.keywords[start:start + category['keyword_count']]])
+        return pa.table(columns)
+
+    def export_parquet(self, path, start_day=None, end_day=None):
+        table = self.to_arrow(start_day, end_day)
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
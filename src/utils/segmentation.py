@@ -0,0 +1,280 @@
+import bisect
+import logging
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from api.result_model import AnalysisResult
+from utils.audio_utils import (
+    CHUNK_SIZE, id3v2_size, find_mp3_frame, parse_mp3_frame_header, iter_file_chunks
+)
+
+logger = logging.getLogger(__name__)
+
+# 无文件头的原始格式按服务端默认参数处理：(采样率, 每个采样的字节数)
+RAW_FORMATS = {
+    'pcm': (16000, 2),
+    'alaw': (8000, 1),
+    'ulaw': (8000, 1)
+}
+ADTS_SAMPLE_RATES = [96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050,
+                     16000, 12000, 11025, 8000, 7350]
+
+
+class Segment:
+    """One window of a long recording: a byte range plus its place on the original timeline"""
+
+    def __init__(self, index, start_time, end_time, byte_start, byte_end):
+        self.index = index
+        self.start_time = start_time
+        self.end_time = end_time
+        self.byte_start = byte_start
+        self.byte_end = byte_end
+
+    def __repr__(self):
+        return (f"Segment({self.index}, {self.start_time:.2f}-{self.end_time:.2f}s, "
+                f"bytes {self.byte_start}-{self.byte_end})")
+
+
+def mp3_frame_index(file_path):
+    """List of (byte_offset, start_time) for every MP3 frame, plus the total duration"""
+    frames = []
+    if os.path.getsize(file_path) == 0:
+        return frames, 0.0  # 空文件无法mmap
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        offset = find_mp3_frame(data, id3v2_size(data[:10]))
+        current_time = 0.0
+        size = len(data)
+        while 0 <= offset <= size - 4:
+            parsed = parse_mp3_frame_header(data[offset:offset + 4])
+            if parsed is None:
+                # 跳过损坏的数据，重新寻找帧同步
+                offset = find_mp3_frame(data, offset + 1)
+                continue
+            frame_length, samples, sample_rate = parsed
+            frames.append((offset, current_time))
+            current_time += samples / sample_rate
+            offset += frame_length
+    return frames, current_time
+
+
+def adts_frame_index(file_path):
+    """List of (byte_offset, start_time) for every ADTS AAC frame, plus the total duration"""
+    frames = []
+    if os.path.getsize(file_path) == 0:
+        return frames, 0.0  # 空文件无法mmap
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        offset = id3v2_size(data[:10])
+        current_time = 0.0
+        size = len(data)
+        while offset <= size - 7:
+            if data[offset] != 0xFF or (data[offset + 1] & 0xF6) != 0xF0:
+                offset = data.find(b'\xff', offset + 1)
+                if offset < 0:
+                    break
+                continue
+            sample_rate_index = (data[offset + 2] >> 2) & 0x0F
+            frame_length = ((data[offset + 3] & 0x03) << 11) | (data[offset + 4] << 3) | (data[offset + 5] >> 5)
+            if sample_rate_index >= len(ADTS_SAMPLE_RATES) or frame_length < 7:
+                offset += 1
+                continue
+            blocks = (data[offset + 6] & 0x03) + 1
+            frames.append((offset, current_time))
+            current_time += blocks * 1024 / ADTS_SAMPLE_RATES[sample_rate_index]
+            offset += frame_length
+    return frames, current_time
+
+
+def wav_layout(file_path):
+    """(fmt chunk bytes, data offset, data size, bytes per second, block align) of a WAV file"""
+    with open(file_path, 'rb') as f:
+        header = f.read(12)
+        if header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            raise Exception("Invalid WAV file")
+        fmt = None
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                raise Exception("WAV file has no data chunk")
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+            if chunk_id == b'fmt ':
+                fmt = f.read(chunk_size)
+                if chunk_size % 2:
+                    f.read(1)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    raise Exception("WAV data chunk before fmt chunk")
+                data_offset = f.tell()
+                data_size = min(chunk_size, os.path.getsize(file_path) - data_offset)
+                _, _, _, byte_rate, block_align = struct.unpack('<HHIIH', fmt[:14])
+                return fmt, data_offset, data_size, byte_rate, block_align
+            else:
+                f.seek(chunk_size + (chunk_size % 2), os.SEEK_CUR)
+
+
+def _frame_segments(frames, duration, file_size, segment_seconds, overlap_seconds):
+    """Cut a frame index into overlapping windows that start and end on frame boundaries"""
+    if not frames:
+        return []
+    times = [frame_time for _, frame_time in frames]
+    segments = []
+    start = 0
+    step = max(segment_seconds - overlap_seconds, 1)
+    while True:
+        start_time = times[start]
+        end = bisect.bisect_left(times, start_time + segment_seconds)
+        byte_end = frames[end][0] if end < len(frames) else file_size
+        end_time = times[end] if end < len(frames) else duration
+        segments.append(Segment(len(segments), start_time, end_time, frames[start][0], byte_end))
+        if end >= len(frames):
+            return segments
+        start = max(start + 1, bisect.bisect_left(times, start_time + step))
+
+
+def _sample_segments(data_offset, data_size, byte_rate, block_align, segment_seconds, overlap_seconds):
+    """Cut PCM-style data into overlapping windows aligned to whole samples"""
+    duration = data_size / byte_rate
+    step = max(segment_seconds - overlap_seconds, 1)
+    segments = []
+    start_time = 0.0
+    while True:
+        end_time = min(start_time + segment_seconds, duration)
+        byte_start = data_offset + int(start_time * byte_rate) // block_align * block_align
+        byte_end = data_offset + int(end_time * byte_rate) // block_align * block_align
+        if end_time >= duration:
+            byte_end = data_offset + data_size
+        segments.append(Segment(len(segments), start_time, end_time, byte_start, byte_end))
+        if end_time >= duration:
+            return segments
+        start_time += step
+
+
+def plan_segments(file_path, audio_format, segment_seconds=300, overlap_seconds=10):
+    """Split a local recording into overlapping windows at frame/sample boundaries"""
+    if audio_format == 'mp3':
+        frames, duration = mp3_frame_index(file_path)
+        return _frame_segments(frames, duration, os.path.getsize(file_path), segment_seconds, overlap_seconds)
+    if audio_format == 'aac':
+        frames, duration = adts_frame_index(file_path)
+        return _frame_segments(frames, duration, os.path.getsize(file_path), segment_seconds, overlap_seconds)
+    if audio_format == 'wav':
+        _, data_offset, data_size, byte_rate, block_align = wav_layout(file_path)
+        return _sample_segments(data_offset, data_size, byte_rate, block_align, segment_seconds, overlap_seconds)
+    if audio_format in RAW_FORMATS:
+        sample_rate, sample_width = RAW_FORMATS[audio_format]
+        return _sample_segments(0, os.path.getsize(file_path), sample_rate * sample_width, sample_width,
+                                segment_seconds, overlap_seconds)
+    raise Exception(f"Unsupported audio format for segmentation: {audio_format}")
+
+
+def write_segment(file_path, audio_format, segment, out_dir):
+    """Stream one segment into its own file; WAV segments get a fresh header"""
+    name, ext = os.path.splitext(os.path.basename(file_path))
+    segment_path = os.path.join(out_dir, f"{name}_part{segment.index:04d}{ext}")
+    length = segment.byte_end - segment.byte_start
+    with open(segment_path, 'wb') as out:
+        if audio_format == 'wav':
+            fmt = wav_layout(file_path)[0]
+            out.write(struct.pack('<4sI4s', b'RIFF', 4 + 8 + len(fmt) + 8 + length, b'WAVE'))
+            out.write(struct.pack('<4sI', b'fmt ', len(fmt)) + fmt)
+            out.write(struct.pack('<4sI', b'data', length))
+        for chunk in iter_file_chunks(file_path, CHUNK_SIZE, segment.byte_start, length):
+            out.write(chunk)
+    return segment_path
+
+
+def _to_seconds(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def merge_segment_results(segments, segment_results, tolerance=1.0):
+    """Merge per-segment analysis_results onto the original timeline
+
+    offset_time (seconds) is shifted by each segment's start; the same
+    violation reported by two overlapping windows is kept once. Local
+    keyword summaries ("local_bias") are combined per category. Returns an
+    AnalysisResult.
+    """
+    merged_suggest = "pass"
+    violations = []
+    local_bias = {}  # category -> {"words": {phrase: count}, "score": float}
+    seen = {}  # (content, suggest) -> [offset_time, ...]
+    errors = []
+
+    for segment, result in zip(segments, segment_results):
+        if result.get("status") != "success":
+            errors.append(f"segment {segment.index}: {result.get('message', 'Unknown error')}")
+            continue
+        suggest = result.get("suggest", "pass")
+        if suggest == "block" or (suggest == "review" and merged_suggest == "pass"):
+            merged_suggest = suggest
+
+        for violation in result.get("violations", ()):
+            offset_time = _to_seconds(violation.get("offset_time"))
+            if offset_time is not None:
+                offset_time += segment.start_time
+                violation = violation.replace(offset_time=round(offset_time, 3))
+
+            key = (violation.get("content"), violation.get("suggest"))
+            previous = seen.setdefault(key, [])
+            if offset_time is not None and any(abs(offset_time - other) <= tolerance for other in previous):
+                continue  # 重叠区域内的重复结果
+            if offset_time is not None:
+                previous.append(offset_time)
+            violations.append(violation)
+
+        for category, entry in (result.get("local_bias") or {}).get("categories", {}).items():
+            total = local_bias.setdefault(category, {"words": {}, "score": 0.0})
+            for phrase, count in entry.get("words", {}).items():
+                total["words"][phrase] = total["words"].get(phrase, 0) + count
+            total["score"] = max(total["score"], entry.get("score", 0.0))
+
+    violations.sort(key=lambda v: _to_seconds(v.get("offset_time")) or 0.0)
+    message = None
+    if errors:
+        message = "; ".join(errors)
+    elif not violations and merged_suggest == "pass":
+        message = "未发现违规内容"
+    if local_bias:
+        local_bias = {"score": max(entry["score"] for entry in local_bias.values()), "categories": local_bias}
+    return AnalysisResult(status="error" if errors else "success", suggest=merged_suggest, message=message,
+                          violations=violations, local_bias=local_bias or None)
+
+
+def analyze_long_audio(api, file_path, segment_seconds=300, overlap_seconds=10, upload_workers=4):
+    """Audit a long local recording as concurrent overlapping segments
+
+    Segments are uploaded in parallel, submitted together through
+    api.analyze_batch and merged back onto the original timeline. Recordings
+    shorter than one segment go through api.analyze_audio unchanged.
+    """
+    audio_format = api.get_audio_format(file_path)
+    segments = plan_segments(file_path, audio_format, segment_seconds, overlap_seconds)
+    if len(segments) <= 1:
+        return api.analyze_audio(file_path)
+    if api.uploader is None:
+        raise Exception("Segmented analysis requires \"upload_url\" in api_config.json")
+
+    logger.info(f"Splitting {file_path} into {len(segments)} segments of {segment_seconds}s")
+    out_dir = tempfile.mkdtemp(prefix="audio_segments_")
+
+    def upload_segment(segment):
+        # 每个分段写出后立即上传并删除，磁盘占用只与并发数有关
+        segment_path = write_segment(file_path, audio_format, segment, out_dir)
+        try:
+            return api.upload_if_local(segment_path)
+        finally:
+            os.remove(segment_path)
+
+    try:
+        with ThreadPoolExecutor(max_workers=upload_workers) as executor:
+            segment_urls = list(executor.map(upload_segment, segments))
+        results = api.analyze_batch(segment_urls, batch_size=max(api.batch_size, 1))
+        return merge_segment_results(segments, [results[url] for url in segment_urls])
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
@@ -0,0 +1,44 @@
+import os
+import re
+import subprocess
+import sys
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_breakdown(module, python=None):
+    """Import `module` in a fresh interpreter with -X importtime
+
+    Returns (total_seconds, rows) where rows are (cumulative_s, self_s,
+    depth, name) for every module imported, in import order.
+    """
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [src_dir, os.environ.get('PYTHONPATH')])))
+    completed = subprocess.run(
+        [python or sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        capture_output=True, text=True, env=env, cwd=src_dir
+    )
+    if completed.returncode != 0:
+        raise Exception(f"Importing {module} failed: {completed.stderr.strip().splitlines()[-1]}")
+
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(cumulative_us) / 1e6, int(self_us) / 1e6, len(indent) // 2, name))
+    # 顶层(缩进为0)模块的累计耗时之和即总导入时间
+    total = sum(cumulative for cumulative, _, depth, _ in rows if depth == 0)
+    return total, rows
+
+
+def format_breakdown(module, total, rows, top=15):
+    """Table of the slowest first-party and top-level imports"""
+    first_party = ('api', 'gui', 'utils', 'config', 'tools')
+    interesting = [row for row in rows
+                   if row[2] <= 1 or row[3].split('.')[0] in first_party]
+    interesting.sort(key=lambda row: row[0], reverse=True)
+    lines = [f"import {module}: {total * 1000:.1f} ms total", f"{'cumulative':>12} {'self':>9}  module"]
+    for cumulative, self_time, depth, name in interesting[:top]:
+        lines.append(f"{cumulative * 1000:>9.1f} ms {self_time * 1000:>6.1f} ms  {'  ' * depth}{name}")
+    return "\n".join(lines)
@@ -0,0 +1,236 @@
+import bisect
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import wave
+import numpy as np
+from config import FFMPEG_PATH
+from utils.segmentation import RAW_FORMATS, wav_layout
+
+logger = logging.getLogger(__name__)
+
+DECODE_SAMPLE_RATE = 16000  # 需要解码的格式统一转为16kHz单声道
+
+
+def _g711_tables():
+    codes = np.arange(256, dtype=np.int32)
+
+    # μ-law
+    u = ~codes & 0xFF
+    exponent = (u >> 4) & 0x07
+    mantissa = u & 0x0F
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    ulaw = np.where(u & 0x80, -magnitude, magnitude).astype(np.int16)
+
+    # A-law
+    a = codes ^ 0x55
+    exponent = (a >> 4) & 0x07
+    mantissa = a & 0x0F
+    magnitude = np.where(exponent == 0, (mantissa << 4) + 8,
+                         ((mantissa << 4) + 0x108) << np.maximum(exponent - 1, 0))
+    alaw = np.where(a & 0x80, magnitude, -magnitude).astype(np.int16)
+    return {'ulaw': ulaw, 'alaw': alaw}
+
+
+G711_TABLES = _g711_tables()
+
+
+def _ffmpeg_binary():
+    if os.path.exists(FFMPEG_PATH):
+        return FFMPEG_PATH
+    found = shutil.which('ffmpeg')
+    if found is None:
+        raise Exception("ffmpeg is required to decode compressed audio")
+    return found
+
+
+def decode_pcm(file_path, audio_format):
+    """Decode audio to mono int16 samples; returns (samples, sample_rate)
+
+    WAV and raw PCM are memory-mapped rather than read; G.711 is expanded
+    through a lookup table; compressed formats are decoded by ffmpeg.
+    """
+    if audio_format == 'wav':
+        fmt, data_offset, data_size, _, block_align = wav_layout(file_path)
+        format_tag, channels, sample_rate = int.from_bytes(fmt[0:2], 'little'), int.from_bytes(fmt[2:4], 'little'), int.from_bytes(fmt[4:8], 'little')
+        bits = int.from_bytes(fmt[14:16], 'little')
+        if format_tag == 1 and bits == 16:
+            frames = data_size // block_align
+            samples = np.memmap(file_path, dtype='<i2', mode='r', offset=data_offset, shape=(frames * channels,))
+            if channels > 1:
+                samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+            return samples, sample_rate
+    elif audio_format == 'pcm':
+        sample_rate, _ = RAW_FORMATS['pcm']
+        # 末尾不足一个采样的字节忽略；空文件无法映射
+        count = os.path.getsize(file_path) // 2
+        if count == 0:
+            return np.zeros(0, dtype='<i2'), sample_rate
+        return np.memmap(file_path, dtype='<i2', mode='r', shape=(count,)), sample_rate
+    elif audio_format in G711_TABLES:
+        sample_rate, _ = RAW_FORMATS[audio_format]
+        codes = np.memmap(file_path, dtype=np.uint8, mode='r')
+        return G711_TABLES[audio_format][codes], sample_rate
+
+    # 其他格式(mp3/aac/非16位wav)交给ffmpeg解码
+    result = subprocess.run(
+        [_ffmpeg_binary(), '-v', 'error', '-i', file_path, '-f', 's16le', '-ac', '1',
+         '-ar', str(DECODE_SAMPLE_RATE), '-'],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
+    )
+    if result.returncode != 0:
+        raise Exception(f"ffmpeg decode failed: {result.stderr.decode('utf-8', 'replace')[:200]}")
+    return np.frombuffer(result.stdout, dtype='<i2'), DECODE_SAMPLE_RATE
+
+
+def frame_features(samples, sample_rate, frame_ms=30, block_frames=4096):
+    """Per-frame energy (dBFS) and zero-crossing rate, computed block by block"""
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = len(samples) // frame_len
+    energy_db = np.empty(n_frames, dtype=np.float32)
+    zcr = np.empty(n_frames, dtype=np.float32)
+
+    # 分块计算，避免一次性把整段录音转换为浮点数组
+    for start in range(0, n_frames, block_frames):
+        stop = min(n_frames, start + block_frames)
+        block = np.asarray(samples[start * frame_len:stop * frame_len], dtype=np.float32)
+        block = block.reshape(stop - start, frame_len) / 32768.0
+        energy_db[start:stop] = 10 * np.log10(np.mean(block * block, axis=1) + 1e-10)
+        signs = np.signbit(block)
+        zcr[start:stop] = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame_len
+    return energy_db, zcr, frame_len
+
+
+def detect_speech(samples, sample_rate, frame_ms=30, margin_db=12.0, min_energy_db=-55.0, min_range_db=18.0,
+                  zcr_threshold=0.25, min_speech_ms=200, padding_ms=300, merge_gap_ms=500):
+    """Return speech regions as a list of (start_seconds, end_seconds)
+
+    A frame is speech when its energy exceeds the estimated noise floor by
+    margin_db, or is within 6 dB of that threshold with a high zero-crossing
+    rate (unvoiced consonants). When the loudest frames are less than
+    min_range_db above the floor there is no silence to tell apart, and every
+    frame above the absolute min_energy_db gate counts. Regions are padded,
+    close regions merged and very short bursts dropped.
+    """
+    energy_db, zcr, frame_len = frame_features(samples, sample_rate, frame_ms)
+    if len(energy_db) == 0:
+        return []
+
+    noise_floor = float(np.percentile(energy_db, 10))
+    peak = float(np.percentile(energy_db, 99))
+    if peak - noise_floor < min_range_db:
+        # 连续的语音或音乐没有停顿，相对门限会落在信号本身上，只用绝对门限
+        threshold = min_energy_db
+    else:
+        threshold = max(noise_floor + margin_db, min_energy_db)
+    speech = (energy_db > threshold) | ((energy_db > threshold - 6) & (zcr > zcr_threshold))
+
+    # 找出连续语音帧的起止位置
+    edges = np.diff(np.concatenate(([0], speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    frame_seconds = frame_len / sample_rate
+    total = len(samples) / sample_rate
+    padding = padding_ms / 1000
+    regions = []
+    for start, end in zip(starts, ends):
+        begin = max(0.0, float(start) * frame_seconds - padding)
+        finish = min(total, float(end) * frame_seconds + padding)
+        if regions and begin - regions[-1][1] <= merge_gap_ms / 1000:
+            regions[-1] = (regions[-1][0], finish)
+        else:
+            regions.append((begin, finish))
+    return [(begin, finish) for begin, finish in regions if finish - begin >= min_speech_ms / 1000]
+
+
+class TimeMap:
+    """Maps times in the condensed audio back to the original recording"""
+
+    def __init__(self, regions):
+        self.condensed_starts = []
+        self.original_starts = []
+        self.lengths = []
+        position = 0.0
+        for begin, finish in regions:
+            self.condensed_starts.append(position)
+            self.original_starts.append(begin)
+            self.lengths.append(finish - begin)
+            position += finish - begin
+        self.condensed_duration = position
+
+    def to_original(self, condensed_time):
+        if not self.condensed_starts:
+            return condensed_time
+        index = max(0, bisect.bisect_right(self.condensed_starts, condensed_time) - 1)
+        within = min(max(condensed_time - self.condensed_starts[index], 0.0), self.lengths[index])
+        return self.original_starts[index] + within
+
+
+def condense_audio(file_path, audio_format, out_path=None, **vad_options):
+    """Write only the speech regions to a 16-bit mono WAV
+
+    Returns (wav_path, time_map, speech_ratio); wav_path is None when no
+    speech was found.
+    """
+    samples, sample_rate = decode_pcm(file_path, audio_format)
+    total = len(samples) / sample_rate if sample_rate else 0
+    regions = detect_speech(samples, sample_rate, **vad_options)
+    speech_seconds = sum(finish - begin for begin, finish in regions)
+    speech_ratio = speech_seconds / total if total else 0.0
+    if not regions:
+        return None, TimeMap([]), 0.0
+
+    if out_path is None:
+        fd, out_path = tempfile.mkstemp(prefix="temp_audio_vad_", suffix=".wav")
+        os.close(fd)
+    with wave.open(out_path, 'wb') as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        for begin, finish in regions:
+            chunk = np.asarray(samples[int(begin * sample_rate):int(finish * sample_rate)], dtype='<i2')
+            out.writeframes(chunk.tobytes())
+
+    logger.info(f"VAD kept {speech_seconds:.1f}s of {total:.1f}s ({speech_ratio:.0%}) in {len(regions)} regions")
+    return out_path, TimeMap(regions), speech_ratio
+
+
+def remap_violations(analysis_results, time_map):
+    """Copy of analysis_results with offset_time values shifted back onto the original timeline"""
+    if not analysis_results.get("violations"):
+        return analysis_results
+    violations = []
+    for violation in analysis_results.violations:
+        try:
+            offset_time = float(violation.get("offset_time"))
+        except (TypeError, ValueError):
+            violations.append(violation)
+            continue
+        violations.append(violation.replace(offset_time=round(time_map.to_original(offset_time), 3)))
+    return analysis_results.replace(violations=violations)
+
+
+def analyze_with_vad(api, file_path, analyze=None, min_saving=0.1, **vad_options):
+    """Drop silence before auditing a local file, then map results back
+
+    `analyze` is called with the path to audit (default api.analyze_audio).
+    Files where VAD finds no speech, or would save less than min_saving of
+    the duration, are audited unchanged: VAD never produces a verdict itself.
+    """
+    if api.uploader is None:
+        raise Exception("VAD pre-filtering requires \"upload_url\" in api_config.json")
+    analyze = analyze or api.analyze_audio
+    audio_format = api.get_audio_format(file_path)
+    condensed_path, time_map, speech_ratio = condense_audio(file_path, audio_format, **vad_options)
+    if condensed_path is None:
+        logger.info(f"VAD found no speech regions in {file_path}, auditing the whole file")
+        return analyze(file_path)
+    try:
+        if speech_ratio > 1 - min_saving:
+            return analyze(file_path)
+        return remap_violations(analyze(condensed_path), time_map)
+    finally:
+        os.remove(condensed_path)
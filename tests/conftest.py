@@ -0,0 +1,67 @@
+import os
+import sys
+
+import pytest
+
+# 测试直接导入src下的模块，与src/tools中的脚本相同
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+MOCK_SECRET = "test-secret"
+
+
+@pytest.fixture
+def object_store():
+    from tools.mock_object_store import MockObjectStore
+    store = MockObjectStore().start()
+    yield store
+    store.stop()
+
+
+@pytest.fixture
+def iflytek_mock():
+    """Factory starting MockIflytekServer instances, stopped after the test"""
+    from tools.mock_iflytek import MockIflytekServer
+    servers = []
+
+    def start(**kwargs):
+        kwargs.setdefault('secret', MOCK_SECRET)
+        kwargs.setdefault('seed', 0)
+        server = MockIflytekServer(**kwargs).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def make_api():
+    """Factory for an IflytekAPI pointed at a mock, with timings scaled down; closed after the test"""
+    from api.iflytek_api import IflytekAPI
+    from api.poll_policy import AdaptivePollPolicy
+    from api.rate_limiter import AdaptiveRateLimiter
+    apis = []
+
+    def make(mock, **config):
+        api_config = {"app_id": "test", "api_key": "test-key", "api_secret": MOCK_SECRET,
+                      "api_base_url": mock.base_url}
+        api_config.update(config)
+        api = IflytekAPI(api_config)
+        api.retry_delay = 0.05
+        api.max_wait_time = 30
+        api.poll_policy = AdaptivePollPolicy(initial_interval=0.1, min_interval=0.05, max_interval=0.2)
+        # 每个测试使用独立的限流器，不受进程内共享预算影响
+        for shard in api.shards.shards:
+            shard.submit_limiter = AdaptiveRateLimiter(f'test_submit:{shard.name}', rate=100, burst=100)
+            shard.query_limiter = AdaptiveRateLimiter(f'test_query:{shard.name}', rate=100, burst=100)
+        api.submit_limiter = api.shards.shards[0].submit_limiter
+        api.query_limiter = api.shards.shards[0].query_limiter
+        apis.append(api)
+        return api
+
+    yield make
+    for api in apis:
+        if api.poll_scheduler is not None:
+            api.poll_scheduler.stop()
+        api.close()
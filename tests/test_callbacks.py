@@ -0,0 +1,89 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from api.callback_server import CallbackReceiver
+
+AUDIO_URL = "https://example.com/audio/meeting.mp3"
+
+
+def post(url, **kwargs):
+    return requests.post(url, timeout=5, **kwargs)
+
+
+def test_push_wakes_waiter_before_safety_net_query(iflytek_mock, make_api):
+    mock = iflytek_mock(pending_seconds=0.2, review_seconds=0.3, violations=1)
+    api = make_api(mock, callback_port=0)
+    api.callback_poll_interval = 60  # 兜底查询不会在测试时间内触发
+
+    start = time.monotonic()
+    result = api.analyze_audio(AUDIO_URL)
+
+    assert time.monotonic() - start < 10
+    assert result.status == "success"
+    assert result.violation_count == 1
+    stats = mock.stats()
+    assert stats["callbacks"] == {"sent": 1}
+    # 推送之后只查询一次即取得结果
+    assert stats["query_requests"] == 1
+
+
+def test_forged_push_cannot_supply_verdict(iflytek_mock, make_api):
+    mock = iflytek_mock(pending_seconds=0.5, review_seconds=0.5, violations=0)
+    api = make_api(mock, callback_port=0)
+    api.callback_poll_interval = 60
+    request_id = api.submit_audio_list([api.build_audio_item(AUDIO_URL, "meeting.mp3")])
+    outcome = {}
+    waiter = threading.Thread(target=lambda: outcome.update(data=api.wait_for_result(request_id)))
+    waiter.start()
+    time.sleep(0.1)
+
+    forged = {"request_id": request_id, "audit_status": 2,
+              "result_list": [{"name": "meeting.mp3", "suggest": "block", "detail": {"audios": []}}]}
+    assert post(api.callback_receiver.url, json=forged).status_code == 200
+    waiter.join(timeout=10)
+
+    assert not waiter.is_alive()
+    # 伪造推送只触发一次查询，结果来自服务端而非推送内容
+    assert mock.stats()["query_requests"] >= 2
+    assert api.parse_result_list(outcome["data"].get("result_list", [])).suggest == "pass"
+
+
+def test_unknown_path_is_rejected():
+    receiver = CallbackReceiver().start()
+    try:
+        base = receiver.url.rsplit('/', 1)[0]
+        payload = {"request_id": "abc", "audit_status": 2}
+        assert post(base, json=payload).status_code == 404
+        assert post(f"{base}/wrong-token", json=payload).status_code == 404
+        assert post(receiver.url, json=payload).status_code == 200
+    finally:
+        receiver.stop()
+
+
+@pytest.mark.parametrize("body", [b"[1, 2]", b"not json", b'"text"'])
+def test_malformed_body_is_rejected(body):
+    receiver = CallbackReceiver().start()
+    try:
+        assert post(receiver.url, data=body).status_code == 400
+    finally:
+        receiver.stop()
+
+
+def test_early_push_is_kept_until_registered():
+    receiver = CallbackReceiver()
+    assert not receiver.handle_payload({"request_id": "early", "audit_status": 2})
+    future = receiver.register("early")
+    assert future.done()
+    assert future.result()["request_id"] == "early"
+
+
+def test_in_progress_push_is_ignored():
+    receiver = CallbackReceiver()
+    future = receiver.register("job")
+    assert not receiver.handle_payload({"data": {"request_id": "job", "audit_status": 1}})
+    assert not future.done()
+    assert receiver.handle_payload({"data": {"request_id": "job", "audit_status": 2}})
+    assert future.done()
@@ -0,0 +1,131 @@
+import sqlite3
+
+import pytest
+
+from api.job_store import JobStore, STATE_DONE, STATE_SUBMITTED
+
+URLS = ["https://example.com/audio/a.mp3", "https://example.com/audio/b.mp3"]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.sqlite3")
+
+
+@pytest.fixture
+def store(db_path):
+    store = JobStore(db_path)
+    yield store
+    store.close()
+
+
+def audio_list(*names):
+    return [{"name": name, "file_url": f"https://store.example.com/{name}"} for name in names]
+
+
+def test_old_database_is_migrated(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(
+        "CREATE TABLE jobs (request_id TEXT PRIMARY KEY, state TEXT NOT NULL, audit_status INTEGER,"
+        " submitted_at REAL NOT NULL, updated_at REAL NOT NULL, next_poll REAL NOT NULL,"
+        " polls INTEGER NOT NULL DEFAULT 0, data TEXT, error TEXT);"
+        "CREATE TABLE job_files (request_id TEXT NOT NULL, name TEXT NOT NULL, file_url TEXT NOT NULL,"
+        " PRIMARY KEY (request_id, name));"
+        "INSERT INTO jobs (request_id, state, submitted_at, updated_at, next_poll) VALUES ('old', 'polling', 1, 1, 1);"
+        "INSERT INTO job_files VALUES ('old', 'a.mp3', 'https://store.example.com/a.mp3');"
+    )
+    conn.commit()
+    conn.close()
+
+    store = JobStore(db_path)
+    try:
+        job = store.find_by_url("https://store.example.com/a.mp3")
+        assert job["request_id"] == "old"
+        assert job["name"] == "a.mp3"
+        assert store.shard_for("old") is None
+        assert store.undelivered_jobs()[0]["files"] == {"a.mp3": "https://store.example.com/a.mp3"}
+    finally:
+        store.close()
+
+
+def test_find_by_url_matches_source_or_file_url(store):
+    store.record_submission("r1", audio_list("a.mp3"), shard="s1", sources={"a.mp3": "/data/a.mp3"})
+
+    assert store.find_by_url("/data/a.mp3")["request_id"] == "r1"
+    job = store.find_by_url("https://store.example.com/a.mp3")
+    assert job["state"] == STATE_SUBMITTED
+    assert job["name"] == "a.mp3"
+    assert store.shard_for("r1") == "s1"
+    assert store.find_by_url("/data/other.mp3") is None
+
+
+def test_done_job_is_found_until_delivered(store):
+    store.record_submission("r1", audio_list("a.mp3", "b.mp3"))
+    store.mark_done("r1", {"audit_status": 2, "result_list": []})
+    store.mark_delivered("r1", ["a.mp3"])
+
+    assert store.find_by_url("https://store.example.com/a.mp3") is None
+    job = store.find_by_url("https://store.example.com/b.mp3")
+    assert job["state"] == STATE_DONE
+    assert job["data"] == {"audit_status": 2, "result_list": []}
+    assert [job["files"] for job in store.undelivered_jobs()] == [{"b.mp3": "https://store.example.com/b.mp3"}]
+    assert store.pending_jobs() == []
+
+
+def test_failed_job_is_not_resumed(store):
+    store.record_submission("r1", audio_list("a.mp3"))
+    store.mark_failed("r1", "boom")
+
+    assert store.find_by_url("https://store.example.com/a.mp3") is None
+    assert store.undelivered_jobs() == []
+    assert store.get("r1")["error"] == "boom"
+
+
+def test_purge_removes_old_finished_jobs(store):
+    store.record_submission("r1", audio_list("a.mp3"))
+    store.record_submission("r2", audio_list("b.mp3"))
+    store.mark_done("r1", {"audit_status": 2})
+
+    assert store.purge(older_than=-1) == 1
+    assert store.get("r1") is None
+    assert store.get("r2") is not None
+
+
+def test_resume_delivers_each_file_once(iflytek_mock, make_api, db_path):
+    mock = iflytek_mock(pending_seconds=0.1, review_seconds=0.2)
+    # 第一次运行提交后即中断
+    first = make_api(mock)
+    first.job_store = JobStore(db_path)
+    first.submit_audio_list([first.build_audio_item(url, url.rsplit('/', 1)[1]) for url in URLS])
+    first.job_store.close()
+
+    second = make_api(mock)
+    second.job_store = JobStore(db_path)
+    resumed = second.resume_pending_jobs()
+
+    assert sorted(resumed) == URLS
+    results = {url: future.result(timeout=10) for url, future in resumed.items()}
+    assert all(result.status == "success" for result in results.values())
+    assert mock.stats()["submit_requests"] == 1
+    assert second.resume_pending_jobs() == {}
+    assert second.job_store.undelivered_jobs() == []
+    second.job_store.close()
+
+
+def test_batch_sibling_result_is_kept(iflytek_mock, make_api, db_path):
+    mock = iflytek_mock(pending_seconds=0.1, review_seconds=0.2)
+    api = make_api(mock)
+    api.job_store = JobStore(db_path)
+    api.submit_audio_list([api.build_audio_item(url, url.rsplit('/', 1)[1]) for url in URLS])
+
+    first = api.analyze_audio(URLS[0])
+    queries = mock.stats()["query_requests"]
+    second = api.analyze_audio(URLS[1])
+
+    assert first.status == second.status == "success"
+    # 同批次的第二个文件直接使用保存的数据，不再提交或查询
+    stats = mock.stats()
+    assert stats["submit_requests"] == 1
+    assert stats["query_requests"] == queries
+    assert api.job_store.undelivered_jobs() == []
+    api.job_store.close()
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from api.iflytek_api import IMMIGRATION_BIAS_KEYWORDS
+from api.result_model import Category, Violation
+from utils.keyword_matcher import KeywordMatcher, combine_scores, tag_violations
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return KeywordMatcher(IMMIGRATION_BIAS_KEYWORDS)
+
+
+def phrases(matcher, text):
+    return [phrase for phrase, _, _, _, _ in matcher.find(text)]
+
+
+def test_finds_phrases_with_token_positions(matcher):
+    matches = list(matcher.find("They said: GO BACK to your country, and stop the invasion!"))
+    assert [(phrase, start, end) for phrase, _, _, start, end in matches] == [
+        ("go back to your country", 2, 7), ("invasion", 10, 11)]
+
+
+def test_matches_whole_tokens_only(matcher):
+    assert not matcher.matches("an invasionary force")
+    assert not matcher.matches("deportationsx")
+    assert not matcher.matches("illegal and alien")
+    assert not matcher.matches("the council discussed the housing budget")
+
+
+def test_normalizes_quotes_and_accents(matcher):
+    assert phrases(matcher, "They don’t belong here") == ["they don't belong here"]
+    assert phrases(matcher, "Déportation now") == ["deportation"]
+
+
+def test_fuzzy_plurals_and_apostrophes(matcher):
+    assert phrases(matcher, "illegal aliens everywhere") == ["illegal alien"]
+    assert phrases(matcher, "they dont belong here") == ["they don't belong here"]
+    assert phrases(matcher, "more deportations") == ["deportation"]
+    strict = KeywordMatcher(IMMIGRATION_BIAS_KEYWORDS, fuzzy=False)
+    assert not strict.matches("illegal aliens everywhere")
+
+
+def test_overlapping_phrases_all_reported():
+    matcher = KeywordMatcher(["border", "open border", "open border disaster"])
+    assert sorted(phrases(matcher, "an open border disaster")) == ["border", "open border", "open border disaster"]
+
+
+def test_scan_counts_and_scores():
+    matcher = KeywordMatcher([("invasion", "bias", 0.5), ("build the wall", "bias", 0.5),
+                              ("deportation", "policy", 0.2)])
+    summary = matcher.scan("invasion, invasion, build the wall and deportation")
+    assert summary["bias"] == {"words": {"invasion": 2, "build the wall": 1}, "score": 0.75}
+    assert summary["policy"]["score"] == 0.2
+    assert matcher.scan("nothing here") == {}
+    assert combine_scores([1.5, -1]) == 1.0
+
+
+def test_scan_lines_yields_matching_lines_only(matcher):
+    lines = ["hello", "build the wall", "", "anchor babies"]
+    assert [number for number, _ in matcher.scan_lines(lines)] == [1, 3]
+
+
+def test_state_round_trip_through_json(matcher):
+    restored = KeywordMatcher.from_state(json.loads(json.dumps(matcher.to_state())))
+    text = "illegal aliens are flooding the border, they don't belong here"
+    assert list(restored.find(text)) == list(matcher.find(text))
+    assert restored.state_count == matcher.state_count
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda state: state.update(delta=[]),
+    lambda state: state["outputs"].pop(),
+    lambda state: state["delta"][0].update(invasion=10 ** 6),
+    lambda state: state["delta"][0].update(invasion="1"),
+    lambda state: state["outputs"][-1].append([999, 1]),
+])
+def test_from_state_rejects_malformed_tables(matcher, corrupt):
+    state = json.loads(json.dumps(matcher.to_state()))
+    corrupt(state)
+    with pytest.raises(ValueError):
+        KeywordMatcher.from_state(state)
+
+
+def test_tag_violations_adds_local_categories(matcher):
+    service = Category(description="abuse", suggest="block", words=("x",))
+    flagged = Violation(name="a.mp3", content="stop the invasion now", offset_time=3, suggest="block",
+                        categories=[service])
+    clean = Violation(name="a.mp3", content="weather report", offset_time=9, suggest="review")
+
+    tagged, local_bias = tag_violations([flagged, clean], matcher, transcripts=["build the wall"])
+
+    assert tagged[1] is clean
+    descriptions = [category.description for category in tagged[0].categories]
+    assert descriptions == ["abuse", "immigration_bias (local)"]
+    assert tagged[0].categories[1].words == ("invasion",)
+    assert flagged.categories == (service,)  # 原记录不变
+    assert local_bias["categories"]["immigration_bias"]["words"] == {"invasion": 1, "build the wall": 1}
+    assert local_bias["score"] == 0.5
+
+    # 再次标记时替换已有的本地类别而不是重复添加
+    retagged, _ = tag_violations(tagged, matcher)
+    assert [category.description for category in retagged[0].categories] == descriptions
+
+
+def test_tag_violations_without_matches(matcher):
+    clean = Violation(name="a.mp3", content="weather report")
+    assert tag_violations([clean], matcher) == ([clean], None)
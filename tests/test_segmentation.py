@@ -0,0 +1,144 @@
+import pytest
+
+from api.result_model import AnalysisResult, Violation
+from utils.segmentation import (
+    Segment, adts_frame_index, merge_segment_results, mp3_frame_index, plan_segments
+)
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, 无填充：每帧417字节、1152个采样
+MP3_HEADER = bytes([0xFF, 0xFB, 0x90, 0x00])
+MP3_FRAME_LENGTH = 417
+MP3_FRAME_SECONDS = 1152 / 44100
+AAC_FRAME_SECONDS = 1024 / 44100
+
+
+def mp3_frame():
+    return MP3_HEADER + bytes(MP3_FRAME_LENGTH - 4)
+
+
+def adts_frame(length=200):
+    """ADTS frame (AAC LC, 44.1 kHz, stereo, one raw data block) of `length` bytes"""
+    header = bytes([
+        0xFF, 0xF1,
+        (1 << 6) | (4 << 2),  # AAC LC，采样率索引4(44100)
+        (2 << 6) | (length >> 11),
+        (length >> 3) & 0xFF,
+        ((length & 0x07) << 5) | 0x1F,
+        0xFC
+    ])
+    return header + bytes(length - 7)
+
+
+def test_mp3_frame_index(tmp_path):
+    path = tmp_path / "audio.mp3"
+    # ID3v2标签后接10帧，中间夹一段损坏的数据
+    id3 = b"ID3\x04\x00\x00\x00\x00\x00\x0a" + bytes(10)
+    path.write_bytes(id3 + mp3_frame() * 4 + b"\x00\x12\x34" + mp3_frame() * 6)
+
+    frames, duration = mp3_frame_index(str(path))
+
+    assert len(frames) == 10
+    assert frames[0] == (20, 0.0)
+    assert frames[4][0] == 20 + 4 * MP3_FRAME_LENGTH + 3
+    assert frames[4][1] == pytest.approx(4 * MP3_FRAME_SECONDS)
+    assert duration == pytest.approx(10 * MP3_FRAME_SECONDS)
+
+
+def test_adts_frame_index(tmp_path):
+    path = tmp_path / "audio.aac"
+    path.write_bytes(adts_frame(200) * 3 + b"\x00\x00" + adts_frame(300) * 2)
+
+    frames, duration = adts_frame_index(str(path))
+
+    assert [offset for offset, _ in frames] == [0, 200, 400, 602, 902]
+    assert frames[3][1] == pytest.approx(3 * AAC_FRAME_SECONDS)
+    assert duration == pytest.approx(5 * AAC_FRAME_SECONDS)
+
+
+@pytest.mark.parametrize("index", [mp3_frame_index, adts_frame_index])
+def test_frame_index_of_empty_file(tmp_path, index):
+    path = tmp_path / "empty"
+    path.write_bytes(b"")
+    assert index(str(path)) == ([], 0.0)
+
+
+def test_mp3_segments_cover_file_on_frame_boundaries(tmp_path):
+    path = tmp_path / "audio.mp3"
+    path.write_bytes(mp3_frame() * 400)  # 约10.4秒
+
+    segments = plan_segments(str(path), 'mp3', segment_seconds=4, overlap_seconds=1)
+
+    assert segments[0].byte_start == 0
+    assert segments[-1].byte_end == 400 * MP3_FRAME_LENGTH
+    for segment, following in zip(segments, segments[1:]):
+        assert segment.byte_start % MP3_FRAME_LENGTH == 0
+        assert following.start_time < segment.end_time  # 相邻窗口重叠
+    assert segments[-1].end_time == pytest.approx(400 * MP3_FRAME_SECONDS)
+
+
+def test_pcm_segments_align_to_samples(tmp_path):
+    path = tmp_path / "audio.pcm"
+    path.write_bytes(bytes(16000 * 2 * 5 + 1))  # 5秒加一个多余字节
+
+    segments = plan_segments(str(path), 'pcm', segment_seconds=2, overlap_seconds=0.5)
+
+    assert [segment.start_time for segment in segments] == [0.0, 1.5, 3.0, 4.5]
+    assert all(segment.byte_start % 2 == 0 for segment in segments)
+    assert segments[-1].byte_end == 16000 * 2 * 5 + 1
+
+
+def violation(offset_time, content="go back to your country", suggest="block"):
+    return Violation(name="part", content=content, offset_time=offset_time, duration=2, suggest=suggest)
+
+
+def test_merge_shifts_offsets_and_drops_overlap_duplicates():
+    segments = [Segment(0, 0.0, 300.0, 0, 100), Segment(1, 290.0, 590.0, 90, 200)]
+    results = [
+        AnalysisResult(suggest="review", violations=[violation(10), violation(295, suggest="review")]),
+        # 第二段开头5秒处就是第一段295秒处的同一条违规
+        AnalysisResult(suggest="block", violations=[violation(5.4, suggest="review"), violation(100)]),
+    ]
+
+    merged = merge_segment_results(segments, results)
+
+    assert merged.status == "success"
+    assert merged.suggest == "block"
+    assert [v.offset_time for v in merged.violations] == [10.0, 295.0, 390.0]
+    assert merged.message is None
+
+
+def test_merge_without_violations_passes():
+    segments = [Segment(0, 0.0, 300.0, 0, 100)]
+    merged = merge_segment_results(segments, [AnalysisResult()])
+    assert merged.suggest == "pass"
+    assert merged.violations == ()
+    assert merged.message == "未发现违规内容"
+
+
+def test_merge_combines_local_bias():
+    segments = [Segment(0, 0.0, 300.0, 0, 100), Segment(1, 290.0, 590.0, 90, 200)]
+    results = [
+        AnalysisResult(local_bias={"score": 0.4, "categories": {
+            "immigration_bias": {"words": {"illegal alien": 1}, "score": 0.4}}}),
+        AnalysisResult(local_bias={"score": 0.7, "categories": {
+            "immigration_bias": {"words": {"illegal alien": 2, "go back": 1}, "score": 0.7}}}),
+    ]
+
+    merged = merge_segment_results(segments, results)
+
+    assert merged.local_bias["score"] == 0.7
+    entry = merged.local_bias["categories"]["immigration_bias"]
+    assert dict(entry["words"]) == {"illegal alien": 3, "go back": 1}
+    assert entry["score"] == 0.7
+
+
+def test_merge_reports_failed_segments():
+    segments = [Segment(0, 0.0, 300.0, 0, 100), Segment(1, 290.0, 590.0, 90, 200)]
+    results = [AnalysisResult(violations=[violation(10)], suggest="block"),
+               {"status": "error", "message": "timeout"}]
+
+    merged = merge_segment_results(segments, results)
+
+    assert merged.status == "error"
+    assert merged.message == "segment 1: timeout"
+    assert len(merged.violations) == 1
@@ -0,0 +1,117 @@
+import os
+
+import pytest
+import requests
+
+from api.uploader import ChunkedUploader, UploadExpired
+
+PART_SIZE = 1024
+
+
+@pytest.fixture
+def audio_file(tmp_path):
+    path = tmp_path / "audio.pcm"
+    path.write_bytes(os.urandom(PART_SIZE * 4 + 100))
+    return str(path)
+
+
+def make_uploader(store, tmp_path, **kwargs):
+    return ChunkedUploader(store.base_url, part_size=PART_SIZE, workers=2, retry_delay=0,
+                           state_dir=str(tmp_path / "state"), **kwargs)
+
+
+def download(url):
+    response = requests.get(url, timeout=10)
+    assert response.status_code == 200
+    return response.content
+
+
+def test_upload_assembles_parts(object_store, tmp_path, audio_file):
+    uploader = make_uploader(object_store, tmp_path)
+    progress = []
+    url = uploader.upload(audio_file, on_progress=lambda done, total: progress.append((done, total)))
+
+    with open(audio_file, 'rb') as f:
+        assert download(url) == f.read()
+    size = os.path.getsize(audio_file)
+    assert progress[-1] == (size, size)
+    assert not os.path.exists(uploader._state_path(audio_file))
+
+
+def test_resume_uploads_only_missing_parts(object_store, tmp_path, audio_file):
+    uploader = make_uploader(object_store, tmp_path)
+    state_path = uploader._state_path(audio_file)
+    # 模拟上次运行在上传完前两个分片后中断
+    upload_id = requests.post(f"{object_store.base_url}/uploads", json={"name": "audio.pcm"}).json()["upload_id"]
+    state = {"upload_id": upload_id, "parts": {}}
+    for part_number in (1, 2):
+        etag = uploader._upload_part(audio_file, upload_id, part_number, os.path.getsize(audio_file))
+        state["parts"][str(part_number)] = etag
+    uploader._save_state(state_path, state)
+
+    sent = []
+    original = uploader._upload_part
+    uploader._upload_part = lambda path, uid, n, total: sent.append(n) or original(path, uid, n, total)
+    url = uploader.upload(audio_file)
+
+    assert sorted(sent) == [3, 4, 5]
+    assert url.split('/')[-2] == upload_id
+    with open(audio_file, 'rb') as f:
+        assert download(url) == f.read()
+    assert not os.path.exists(state_path)
+
+
+def test_stale_upload_id_restarts_upload(object_store, tmp_path, audio_file):
+    uploader = make_uploader(object_store, tmp_path)
+    state_path = uploader._state_path(audio_file)
+    # 对象存储已忘记的upload_id(过期或重启)
+    uploader._save_state(state_path, {"upload_id": "forgotten", "parts": {}})
+
+    url = uploader.upload(audio_file)
+
+    assert "forgotten" not in url
+    with open(audio_file, 'rb') as f:
+        assert download(url) == f.read()
+    assert not os.path.exists(state_path)
+
+
+def test_stale_upload_id_on_complete_restarts_upload(object_store, tmp_path, audio_file):
+    uploader = make_uploader(object_store, tmp_path)
+    state_path = uploader._state_path(audio_file)
+    # 所有分片都已记录，但upload_id在合并前失效
+    uploader._save_state(state_path, {"upload_id": "forgotten",
+                                      "parts": {str(n): "stale" for n in range(1, 6)}})
+
+    url = uploader.upload(audio_file)
+
+    with open(audio_file, 'rb') as f:
+        assert download(url) == f.read()
+    assert not os.path.exists(state_path)
+
+
+def test_upload_gives_up_after_one_restart(object_store, tmp_path, audio_file):
+    uploader = make_uploader(object_store, tmp_path)
+    # 每次发起的上传都立即被对象存储遗忘
+    original_initiate = object_store.initiate
+
+    def initiate_and_forget(name):
+        upload_id = original_initiate(name)
+        object_store.uploads.pop(upload_id)
+        return upload_id
+
+    object_store.initiate = initiate_and_forget
+    with pytest.raises(UploadExpired):
+        uploader.upload(audio_file)
+    assert not os.path.exists(uploader._state_path(audio_file))
+
+
+def test_part_failures_are_retried(tmp_path, audio_file):
+    from tools.mock_object_store import MockObjectStore
+    store = MockObjectStore(fail_rate=0.3).start()
+    try:
+        uploader = make_uploader(store, tmp_path, max_retries=10)
+        url = uploader.upload(audio_file)
+        with open(audio_file, 'rb') as f:
+            assert download(url) == f.read()
+    finally:
+        store.stop()